@@ -1,2 +1,10 @@
 """backend.src marker"""
-from .api import app
+
+
+def __getattr__(name: str):
+    # `backend.src.app` without importing the API (FastAPI, every analyser)
+    # whenever a submodule – the worker, a benchmark – is imported
+    if name == "app":
+        from .api import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,217 @@
+# backend/src/analysis.py
+"""
+One analysis, start to finish: checkout → static pipeline → JSON.
+
+Kept separate from the HTTP layer so the blocking route, the job queue and
+any future entry point run exactly the same code.
+
+Results are cached per (repo URL, commit, analyser version): the remote HEAD
+is resolved with a cheap `git ls-remote` first, and on a hit neither the
+clone nor the pipeline runs.  Repos come from the shared `ClonePool`
+(incrementally fetched mirrors).  In the default "objects" mode the pipeline
+reads the commit straight from the mirror's object database; "checkout"
+mode materialises a temporary worktree instead.
+
+Each step runs in a `metrics` span; pass ``timings=True`` to get this
+analysis' spans back in the response.
+
+A wall-clock / bytes-read budget (per call, or SYPEC_BUDGET_SECONDS /
+SYPEC_BUDGET_BYTES) turns huge repos into a sampled analysis, see
+`static_analyzer.sampling`.  Sampled results are not cached – a later
+unbudgeted run must not be served an extrapolation – but a cached full
+result does answer budgeted requests.
+
+Concurrent requests for the same (repo URL, commit) – and mode and budget –
+are coalesced (`singleflight`): one of them clones and runs the pipeline, the
+others wait for its result (marked ``"coalesced": true``) or its error, and
+get its stages replayed and streamed.  Errors are shared, never cached.
+
+Every fresh analysis is also appended to the `history` store (score, kWh,
+languages, findings, stage timings) for the history and fleet endpoints.
+
+    SYPEC_ANALYSIS_MODE   objects | checkout   (default objects)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from backend.src.history import default_history
+from backend.src.metrics import count_cache, current_trace, span, trace
+from backend.src.report.service import default_service
+from backend.src.result_cache import ResultCache
+from backend.src.singleflight import SingleFlight
+from backend.src.static_analyzer.git_tree import build_git_index
+from backend.src.static_analyzer.file_records import ANALYZER_VERSION
+from backend.src.static_analyzer.sampling import Budget
+from backend.src.static_analyzer.static_pipeline import (
+    REPORT_DIR,
+    Stage,
+    iter_static_pipeline,
+)
+from backend.src.utils.clone_pool import ClonePool
+from backend.src.utils.git import resolve_remote_head
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_MODE = os.getenv("SYPEC_ANALYSIS_MODE", "objects")
+
+results = ResultCache()
+clones = ClonePool()
+inflight = SingleFlight("inflight")
+
+
+def _pdf_still_there(pdf_url: str | None) -> bool:
+    # pdf_url = "/reports/<report dir>/<file>.pdf"
+    if not pdf_url:
+        return False
+    return (REPORT_DIR / pdf_url.split("/reports/", 1)[-1]).is_file()
+
+
+def _refresh_report(result: Dict[str, Any]) -> None:
+    """Cached results hold the report state of when they were stored – update it."""
+    state = default_service().status(result["report_id"]) if result.get("report_id") else None
+    if state is not None:
+        result["pdf_url"] = state["pdf_url"]
+        result["report_status"] = state["status"]
+    elif not _pdf_still_there(result.get("pdf_url")):
+        result["pdf_url"] = None
+
+
+def _repo_name(repo_url: str) -> str:
+    name = repo_url.rstrip("/").rsplit("/", 1)[-1]
+    return name[:-4] if name.endswith(".git") else name
+
+
+def _run(
+        repo_url: str,
+        commit: Optional[str],
+        mode: str,
+        budget: Optional[Budget] = None,
+) -> Iterator[Stage]:
+    """
+    Run the pipeline on the remote's HEAD (or *commit*), yielding its stages.
+
+    A ``("commit", {"commit": sha})`` stage comes first; the final
+    ``"result"`` payload carries the repo URL and the analysed SHA.
+    """
+    with ExitStack() as stack:
+        if mode == "checkout":
+            with span("clone"):
+                ws = stack.enter_context(clones.checkout(repo_url, commit=commit))
+            logger.debug("Repository checked out → %s @ %s", ws.path, ws.commit)
+            sha, source = ws.commit, ws.path
+        else:
+            with span("clone"):
+                mirror, sha = stack.enter_context(clones.borrow(repo_url, commit=commit))
+            with span("index") as s:
+                source = build_git_index(mirror, sha, name=_repo_name(repo_url))
+                s.files = len(source)
+            stack.callback(source.close)
+            logger.debug("Analysing %s straight from the object database", sha)
+
+        yield "commit", {"commit": sha}
+        for stage, data in iter_static_pipeline(source, budget, fingerprint=sha):
+            if stage == "result":
+                data = {"repo_url": repo_url, "commit": sha, **data}
+            yield stage, data
+
+
+def _analyze(
+        repo_url: str,
+        bypass_cache: bool,
+        mode: Optional[str],
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]],
+        budget_seconds: Optional[float] = None,
+        budget_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    with span("resolve"):
+        commit = resolve_remote_head(repo_url)
+    return analyze_commit(repo_url, commit, bypass_cache, mode, on_stage, budget_seconds, budget_bytes)
+
+
+def analyze_commit(
+        repo_url: str,
+        commit: Optional[str],
+        bypass_cache: bool = False,
+        mode: Optional[str] = None,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        budget_seconds: Optional[float] = None,
+        budget_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Result for one exact *commit* of *repo_url* (the fetched HEAD if None),
+    from the result cache when possible.  Runs inside the caller's trace;
+    the budget, if any, starts counting after the cache lookup.
+    """
+    if not bypass_cache and commit:
+        with span("result_cache"):
+            cached = results.get(repo_url, commit, ANALYZER_VERSION)
+        count_cache("results", hits=int(cached is not None), misses=int(cached is None))
+        if cached is not None:
+            _refresh_report(cached)
+            return {**cached, "cache_hit": True}
+
+    def work(publish: Callable[[str, Dict[str, Any]], None]) -> Dict[str, Any]:
+        logger.debug("Running static pipeline …")
+        started = time.perf_counter()
+        response: Dict[str, Any] = {}
+        budget = Budget.resolve(budget_seconds, budget_bytes)
+        for stage, data in _run(repo_url, commit, mode or ANALYSIS_MODE, budget):
+            if stage == "result":
+                response = data
+            else:
+                publish(stage, data)
+
+        # key on what was actually analysed – HEAD may have moved since ls-remote
+        if response.get("sampling") is None:
+            results.put(repo_url, response["commit"], ANALYZER_VERSION, response)
+        history = default_history()
+        if history is not None:
+            t = current_trace()
+            history.record(
+                response,
+                ANALYZER_VERSION,
+                seconds=round(time.perf_counter() - started, 3),
+                timings=t.to_dict()["stages"] if t is not None else None,
+            )
+        return response
+
+    if not commit:                      # nothing to coalesce on
+        return {**work(on_stage or (lambda *_: None)), "cache_hit": False}
+    with span("inflight"):
+        key = (repo_url, commit, mode or ANALYSIS_MODE, budget_seconds, budget_bytes)
+        response, joined = inflight.run(key, work, on_stage)
+    # every caller gets its own copy – `analyze_repo` adds its timings to it
+    return {**response, "cache_hit": False, **({"coalesced": True} if joined else {})}
+
+
+def analyze_repo(
+        repo_url: str,
+        bypass_cache: bool = False,
+        mode: Optional[str] = None,
+        timings: bool = False,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        budget_seconds: Optional[float] = None,
+        budget_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Fetch *repo_url* and run the full static pipeline on it (blocking).
+
+    With *bypass_cache* the cache is not consulted, but the fresh result
+    still replaces whatever was stored for that commit.  *mode* overrides
+    SYPEC_ANALYSIS_MODE; *timings* adds the per-stage spans as ``timings``.
+    *on_stage(stage, partial)* is called as each pipeline stage completes
+    (not on a cache hit) – see `static_pipeline.iter_static_pipeline`.
+    *budget_seconds* / *budget_bytes* cap the per-file analysis; over budget
+    the result is extrapolated from a sample (``sampling`` section).
+    """
+    with trace() as t:
+        with span("analysis"):
+            response = _analyze(repo_url, bypass_cache, mode, on_stage, budget_seconds, budget_bytes)
+    if timings:
+        response["timings"] = t.to_dict()
+    return response
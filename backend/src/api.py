@@ -1,57 +1,168 @@
 # backend/src/api.py
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import os
+import re
 import traceback
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import List, Literal, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, ValidationError
 
-from backend.src.static_analyzer.clone import clone_repo
-from backend.src.static_analyzer.static_pipeline import run_static_pipeline
+from backend.src import metrics
+from backend.src.analysis import analyze_repo, inflight
+from backend.src.batch import MAX_REPOS, stream_batch
+from backend.src.diff import analyze_diff
+from backend.src.history import default_history
+from backend.src.jobs import JobQueue, QueueFull
+from backend.src.preload import PRELOAD, preload
+from backend.src.report.service import default_service
+from backend.src.static_analyzer.static_pipeline import REPORT_DIR
+from backend.src.trend import MAX_TREND_COMMITS, analyze_trend
+from backend.src.work_queue import QUEUE_BACKEND, SharedJobQueue
 
 # ─────────────────────────── Logging ────────────────────────────
 LOG_FILE = Path("analyzer_debug.log")
-logging.basicConfig(
-    level=logging.DEBUG,                              # ➜ change to INFO in prod
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[logging.StreamHandler(), logging.FileHandler(LOG_FILE)],
-)
+
+
+def configure_logging() -> None:
+    logging.basicConfig(
+        level=logging.DEBUG,                          # ➜ change to INFO in prod
+        format="%(asctime)s | %(levelname)s | %(message)s",
+        handlers=[logging.StreamHandler(), logging.FileHandler(LOG_FILE)],
+    )
 
 # ─────────────────────────── FastAPI app ────────────────────────
-app = FastAPI(title="Sypec – Static Auditor")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Startup side effects live here, not at import: logging, the report
+    directory, and the per-process warm-up (`preload`, SYPEC_PRELOAD).
+    """
+    configure_logging()
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    if PRELOAD:
+        await asyncio.to_thread(preload)
+    yield
+
+app = FastAPI(title="Sypec – Static Auditor", lifespan=lifespan)
 
 # Serve generated PDFs:  http://<host>:8000/static/reports/<file>.pdf
+# (the directory is checked on first request – it is created at startup)
 app.mount(
     "/static/reports",
-    StaticFiles(directory="data/reports", html=False),
+    StaticFiles(directory=REPORT_DIR, html=False, check_dir=False),
     name="reports",
 )
 
+# Every analysis runs on this bounded pool, never on the event loop – or,
+# with SYPEC_QUEUE=sqlite, in worker processes fed by the shared queue.
+jobs = SharedJobQueue() if QUEUE_BACKEND == "sqlite" else JobQueue()
+
+# /analyze/stream: how long to keep the stream open for the PDF, keep-alive period
+STREAM_PDF_WAIT_S = float(os.getenv("SYPEC_STREAM_PDF_WAIT_S", "600"))
+STREAM_KEEPALIVE_S = 15.0
+
 # ─────────────────────────── Request model ──────────────────────
 class AnalyzeRequest(BaseModel):
     repo_url: HttpUrl
+    bypass_cache: bool = False        # force a fresh clone + pipeline run
+    mode: Optional[Literal["objects", "checkout"]] = None   # default: SYPEC_ANALYSIS_MODE
+    timings: bool = False             # add per-stage timing spans to the response
+    # over budget the per-file analysis is sampled (default: SYPEC_BUDGET_*)
+    budget_seconds: Optional[float] = Field(None, gt=0)
+    budget_bytes: Optional[int] = Field(None, gt=0)
+
+class DiffRequest(AnalyzeRequest):
+    base: str = Field(..., min_length=1)       # branch, tag, refs/pull/<n>/head or SHA
+    head: str = Field("HEAD", min_length=1)
+
+class TrendRequest(BaseModel):
+    repo_url: HttpUrl
+    commits: int = Field(500, ge=1, le=MAX_TREND_COMMITS)   # first-parent commits up to `ref`
+    ref: str = Field("HEAD", min_length=1)
+    timings: bool = False
+
+class BatchRequest(BaseModel):
+    repo_urls: List[HttpUrl] = Field(..., min_length=1, max_length=MAX_REPOS)
+    concurrency: Optional[int] = Field(None, ge=1)    # default: SYPEC_BATCH_CONCURRENCY
+    bypass_cache: bool = False
+    mode: Optional[Literal["objects", "checkout"]] = None
+    timings: bool = False
+    budget_seconds: Optional[float] = Field(None, gt=0)     # per repo
+    budget_bytes: Optional[int] = Field(None, gt=0)
+
+# ─────────────────────────── Helpers ────────────────────────────
+def _enqueue(fn, **params):
+    try:
+        return jobs.submit(fn, **params)
+    except QueueFull as exc:
+        raise HTTPException(status_code=429, detail=f"Analysis queue full: {exc}") from exc
+
+
+def _submit(req: AnalyzeRequest, fn=analyze_repo, **extra):
+    return _enqueue(
+        fn,
+        repo_url=str(req.repo_url),
+        bypass_cache=req.bypass_cache,
+        mode=req.mode,
+        timings=req.timings,
+        budget_seconds=req.budget_seconds,
+        budget_bytes=req.budget_bytes,
+        **extra,
+    )
+
 
-# ─────────────────────────── Route ──────────────────────────────
+def _queued_analysis(repo_url: str, **params):
+    """
+    One batch item: a job like any other, so batches count against the queue
+    limit too – over it the item fails with `QueueFull` instead of running.
+    """
+    return jobs.submit(analyze_repo, repo_url=repo_url, **params).future.result()
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _parse_batch(body: bytes, content_type: str, query: dict) -> BatchRequest:
+    """
+    JSON body (`BatchRequest`) or a JSONL upload: one repo per line, either a
+    bare URL or ``{"repo_url": …}``; options then come from the query string.
+    """
+    try:
+        if content_type.split(";", 1)[0].strip() == "application/json":      # not application/jsonl
+            return BatchRequest.model_validate_json(body)
+        urls = []
+        for line in body.decode("utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line) if line[0] in "{\"" else line
+            urls.append(item["repo_url"] if isinstance(item, dict) else item)
+        return BatchRequest(repo_urls=urls, **query)
+    except (ValueError, KeyError, TypeError) as exc:   # ValidationError is a ValueError
+        detail = exc.errors(include_input=False) if isinstance(exc, ValidationError) else f"Invalid batch: {exc}"
+        raise HTTPException(status_code=422, detail=detail) from exc
+
+# ─────────────────────────── Routes ─────────────────────────────
 @app.post("/analyze")
 async def analyze(req: AnalyzeRequest):
+    """Blocking variant: waits for the job, but off the event loop."""
     ts = datetime.utcnow().isoformat(timespec="seconds")
     logging.info("[%s] request: %s", ts, req.repo_url)
 
+    job = _submit(req)
     try:
-        logging.debug("Cloning repository …")
-        repo_path = clone_repo(req.repo_url)          # local temp dir
-        logging.debug("Repository cloned → %s", repo_path)
-
-        logging.debug("Running static pipeline …")
-        result = run_static_pipeline(repo_path)
-
-        response = {"repo_url": str(req.repo_url), **result}
-        logging.debug("Response → %s", response)
-        return response
+        return await asyncio.wrap_future(job.future)
 
     except Exception as exc:
         logging.error("Pipeline failed:\n%s", traceback.format_exc())
@@ -59,3 +170,208 @@ async def analyze(req: AnalyzeRequest):
             status_code=500,
             detail=f"Static analysis failed: {type(exc).__name__}: {exc}",
         ) from exc
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(req: AnalyzeRequest):
+    """
+    Same analysis as `/analyze`, as Server-Sent Events: ``queued``, then one
+    event per pipeline stage as it completes (``commit``, ``digest``,
+    ``languages``, ``apis``, ``secrets``, ``energy``, ``security``,
+    ``coverage``, ``smells``, ``score``, ``report``), the full ``result`` and
+    finally ``pdf`` once the report is built – or ``error``.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_stage(stage: str, data) -> None:             # job thread → event loop
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, (stage, data))
+        except RuntimeError:                            # loop gone
+            pass
+
+    job = _submit(req, on_stage=on_stage)              # 429 before the stream starts
+    done = asyncio.wrap_future(job.future)
+
+    async def stream():
+        yield _sse("queued", {"job_id": job.id})
+        while not done.done():
+            getter = asyncio.ensure_future(events.get())
+            finished, _ = await asyncio.wait(
+                {getter, done}, timeout=STREAM_KEEPALIVE_S, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter in finished:
+                yield _sse(*getter.result())
+                continue
+            getter.cancel()
+            if not finished:
+                yield ": keep-alive\n\n"
+        while not events.empty():
+            yield _sse(*events.get_nowait())
+
+        if done.exception() is not None:
+            exc = done.exception()
+            yield _sse("error", {"detail": f"Static analysis failed: {type(exc).__name__}: {exc}"})
+            return
+        result = done.result()
+        yield _sse("result", result)
+
+        # keep the stream open until the background PDF build settles
+        report_id = result.get("report_id")
+        state = None
+        deadline = loop.time() + STREAM_PDF_WAIT_S
+        while report_id:
+            state = default_service().status(report_id)
+            if state is None or state["status"] != "pending" or loop.time() > deadline:
+                break
+            await asyncio.sleep(0.5)
+        yield _sse("pdf", {"report_id": report_id, **(state or {"status": None, "pdf_url": result.get("pdf_url")})})
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/analyze/diff")
+async def analyze_diff_route(req: DiffRequest):
+    """
+    PR check: full result for `head` plus a ``diff`` section against `base`
+    (changed files, new / fixed warnings, score, LOC and kWh change).
+    """
+    logging.info("Diff request: %s %s..%s", req.repo_url, req.base, req.head)
+    job = _submit(req, fn=analyze_diff, base=req.base, head=req.head)
+    try:
+        return await asyncio.wrap_future(job.future)
+    except Exception as exc:
+        logging.error("Diff analysis failed:\n%s", traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail=f"Diff analysis failed: {type(exc).__name__}: {exc}",
+        ) from exc
+
+@app.post("/analyze/trend")
+async def analyze_trend_route(req: TrendRequest):
+    """
+    Score, LOC, findings and kWh for each of the last `commits` commits up
+    to `ref`, oldest first – one incremental walk over the history.
+    """
+    logging.info("Trend request: %s, %s commits up to %s", req.repo_url, req.commits, req.ref)
+    job = _enqueue(analyze_trend, repo_url=str(req.repo_url), commits=req.commits, ref=req.ref, timings=req.timings)
+    try:
+        return await asyncio.wrap_future(job.future)
+    except Exception as exc:
+        logging.error("Trend analysis failed:\n%s", traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail=f"Trend analysis failed: {type(exc).__name__}: {exc}",
+        ) from exc
+
+@app.post("/analyze/batch")
+async def analyze_batch(request: Request):
+    """
+    Analyse many repos; stream one NDJSON row per repo as each finishes,
+    then a summary row.  Body: `BatchRequest` JSON, or JSONL (one repo per
+    line) with `concurrency`, `bypass_cache`, `mode`, `timings` as query
+    parameters.  Every repo is a job on the analysis queue: a repo that
+    finds the queue full gets a failed row, it never overflows the queue.
+    """
+    req = _parse_batch(
+        await request.body(),
+        request.headers.get("content-type", ""),
+        dict(request.query_params),
+    )
+    logging.info("Batch of %s repos (concurrency %s)", len(req.repo_urls), req.concurrency)
+
+    async def rows():
+        async for row in stream_batch(
+                [str(u) for u in req.repo_urls],
+                req.concurrency,
+                _queued_analysis,
+                bypass_cache=req.bypass_cache,
+                mode=req.mode,
+                timings=req.timings,
+                budget_seconds=req.budget_seconds,
+                budget_bytes=req.budget_bytes,
+        ):
+            yield json.dumps(row, default=str) + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+@app.post("/jobs", status_code=202)
+async def submit_job(req: AnalyzeRequest):
+    """Queue an analysis and return its id straight away."""
+    job = _submit(req)
+    logging.info("Job %s queued: %s", job.id, req.repo_url)
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job.to_dict()
+
+
+@app.get("/reports/{report_id}")
+async def get_report(report_id: str):
+    """Build status of a background PDF report (``pending`` → ``ready`` / ``failed``)."""
+    state = default_service().status(report_id) if re.fullmatch(r"[0-9a-f]{20}", report_id) else None
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Unknown report '{report_id}'")
+    return {"report_id": report_id, **state}
+
+
+def _history_store():
+    store = default_history()
+    if store is None:
+        raise HTTPException(status_code=404, detail="History is disabled (SYPEC_HISTORY=0)")
+    return store
+
+
+# plain `def`: SQLite reads run on the threadpool, not the event loop
+@app.get("/history")
+def get_history(
+        repo_url: Optional[str] = None,
+        commit: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = Query(100, ge=1, le=10_000),
+):
+    """Past analyses of a repo and / or commit, newest first (from the history index)."""
+    if not repo_url and not commit:
+        raise HTTPException(status_code=422, detail="Give repo_url and / or commit")
+    rows = _history_store().history(
+        repo_url, commit,
+        since.timestamp() if since else None,
+        until.timestamp() if until else None,
+        limit,
+    )
+    return {"repo_url": repo_url, "commit": commit, "analyses": rows}
+
+
+@app.get("/fleet")
+def get_fleet(since: Optional[datetime] = None, repos: bool = False):
+    """Aggregates over the latest analysis of every repo; *repos* adds the per-repo rows."""
+    store = _history_store()
+    ts = since.timestamp() if since else None
+    latest = store.latest(ts)
+    body = store.fleet(ts, latest)
+    if repos:
+        body["latest"] = latest
+    return body
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-stage histograms, processed files/bytes and cache hit counters (Prometheus text)."""
+    stats = jobs.stats()
+    body = metrics.render({
+        "sypec_jobs_in_flight": stats["in_flight"],
+        "sypec_jobs_max_workers": stats["max_workers"],
+        "sypec_jobs_max_queue": stats["max_queue"],
+        **({"sypec_queue_workers": stats["workers"]} if "workers" in stats else {}),
+        "sypec_analyses_in_flight": inflight.in_flight(),
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
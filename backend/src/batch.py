@@ -0,0 +1,136 @@
+# backend/src/batch.py
+"""
+Batch analyses: many repositories, one request, results streamed as they land.
+
+`stream_batch` keeps at most *concurrency* analyses of one batch in flight
+on a pool shared by all batches (SYPEC_BATCH_WORKERS threads in total), and
+yields one result row per repository in completion order – the NDJSON body
+of ``POST /analyze/batch``.
+
+Everything expensive is process-wide already, so a batch shares it for free:
+the clone cache and result cache (`analysis`), the in-memory hardware
+profile, the compiled rule engine, the per-file record store and the
+report service.
+
+The summary row adds the fleet's energy curve: every successful repo's
+inputs evaluated in one `energy_model.estimate_energy_batch` call and summed.
+
+    SYPEC_BATCH_WORKERS       threads for batch analyses, all batches  (default 4)
+    SYPEC_BATCH_CONCURRENCY   default in-flight analyses per batch     (default 4)
+    SYPEC_BATCH_MAX_REPOS     largest accepted batch                   (default 10000)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from backend.src.analysis import analyze_repo
+from backend.src.static_analyzer.energy_model import (
+    DEFAULT_USERS,
+    REFERENCE_KWH_PER_HOUR,
+    estimate_energy_batch,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_WORKERS = int(os.getenv("SYPEC_BATCH_WORKERS", "4"))
+BATCH_CONCURRENCY = int(os.getenv("SYPEC_BATCH_CONCURRENCY", "4"))
+MAX_REPOS = int(os.getenv("SYPEC_BATCH_MAX_REPOS", "10000"))
+
+_pool = ThreadPoolExecutor(max_workers=max(1, BATCH_WORKERS), thread_name_prefix="sypec-batch")
+
+
+def _analyze_one(
+        index: int,
+        repo_url: str,
+        params: Dict[str, Any],
+        runner: Callable[..., Dict[str, Any]] = analyze_repo,
+) -> Dict[str, Any]:
+    """One row of the batch output; failures are reported, not raised."""
+    started = time.perf_counter()
+    row: Dict[str, Any] = {"index": index, "repo_url": repo_url}
+    try:
+        row["result"] = runner(repo_url, **params)
+        row["status"] = "done"
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Batch item %s (%s) failed: %s", index, repo_url, exc)
+        row["status"] = "failed"
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    row["seconds"] = round(time.perf_counter() - started, 3)
+    return row
+
+
+def energy_inputs(result: Dict[str, Any]) -> Dict[str, Any]:
+    """The energy model's inputs, recovered from an analysis result."""
+    return {
+        "loc": result.get("loc") or 0,
+        "apis": len(result.get("apis_used") or ()),
+        "client_heavy": "typescript" in (result.get("languages") or {}),
+        "kwh_per_hour": (result.get("hardware") or {}).get("kwh_per_hour") or REFERENCE_KWH_PER_HOUR,
+    }
+
+
+def fleet_energy(inputs: List[Dict[str, Any]]) -> Dict[int, float]:
+    """Summed kWh/day of many repos per user count, one vectorised evaluation."""
+    if not inputs:
+        return {}
+    curves = estimate_energy_batch(**{k: [i[k] for i in inputs] for k in inputs[0]}, users=DEFAULT_USERS)
+    return {u: round(float(v), 2) for u, v in zip(DEFAULT_USERS, curves.sum(axis=0))}
+
+
+async def stream_batch(
+        repo_urls: Iterable[str],
+        concurrency: Optional[int] = None,
+        runner: Callable[..., Dict[str, Any]] = analyze_repo,
+        **params: Any,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyse *repo_urls* (``runner(url, **params)`` each, by default
+    `analyze_repo`) and yield a row per repo as it finishes, then a final
+    ``{"summary": …}`` row.
+
+    Repos not started yet are cancelled if the consumer goes away.
+    """
+    window = max(1, min(concurrency or BATCH_CONCURRENCY, BATCH_WORKERS))
+    todo = iter(enumerate(repo_urls))
+    pending: set = set()
+    started = time.perf_counter()
+    done = failed = 0
+    inputs: List[Dict[str, Any]] = []
+
+    def launch() -> bool:
+        item = next(todo, None)
+        if item is None:
+            return False
+        pending.add(asyncio.wrap_future(_pool.submit(_analyze_one, item[0], item[1], params, runner)))
+        return True
+
+    try:
+        while len(pending) < window and launch():
+            pass
+        while pending:
+            finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in finished:
+                pending.discard(fut)
+                row = fut.result()
+                done += 1
+                failed += row["status"] == "failed"
+                if row["status"] == "done":
+                    inputs.append(energy_inputs(row["result"]))
+                launch()
+                yield row
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+    yield {"summary": {
+        "total": done,
+        "failed": failed,
+        "concurrency": window,
+        "fleet_kwh": fleet_energy(inputs),
+        "seconds": round(time.perf_counter() - started, 3),
+    }}
@@ -0,0 +1,150 @@
+# backend/src/diff.py
+"""
+Pull-request analyses: what a change does to a repo, not the whole audit again.
+
+`analyze_diff(repo_url, base, head)` resolves both refs in the repo's mirror
+(branches, tags, ``refs/pull/<n>/head``, SHAs), lists the changed files with a
+tree diff and analyses head.  The base result comes from the result cache and
+is computed only the first time a base commit is seen.
+
+Per-file records are keyed on blob SHA (`file_records`), so for head only the
+blobs the PR touches are analysed – every unchanged file is a record-store
+hit.  A PR check costs a tree listing plus work proportional to the size of
+the PR.
+
+The response is the full head result plus a ``diff`` section: base / head
+commit, changed files, new and fixed warnings, and the change in score,
+lines of code and kWh per user tier.  Warnings are matched with their line
+numbers stripped, so code that merely moved is neither "fixed" nor "new";
+a repeated warning is placed by aligning each file's warnings in line order.
+"""
+from __future__ import annotations
+
+import difflib
+import logging
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.src.analysis import analyze_commit, clones
+from backend.src.metrics import span, trace
+from backend.src.static_analyzer.git_tree import changed_files
+
+logger = logging.getLogger(__name__)
+
+_LINE_NO = re.compile(r":\d+\b")
+
+
+def _warning_delta(before: List[str], after: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    ``(new, fixed)``.  Warnings are compared with their line numbers
+    stripped, but which occurrence of a repeated warning is the new one is
+    decided by position: each file's warnings, in line order, are aligned
+    with difflib.  Whatever is left unmatched on both sides with the same
+    text afterwards moved within the file and counts as neither.
+    """
+    def by_file(warnings: List[str]) -> Dict[Optional[str], List[Tuple[int, int, str]]]:
+        groups: Dict[Optional[str], List[Tuple[int, int, str]]] = {}
+        for i, w in enumerate(warnings):
+            m = _LINE_NO.search(w)
+            path, line = (w[:m.start()], int(m.group()[1:])) if m else (None, 0)
+            groups.setdefault(path, []).append((line, i, _LINE_NO.sub("", w)))
+        for group in groups.values():
+            group.sort()
+        return groups
+
+    old, cur = by_file(before), by_file(after)
+    new: List[int] = []
+    fixed: List[int] = []
+    for path in old.keys() | cur.keys():
+        a, b = old.get(path, []), cur.get(path, [])
+        matcher = difflib.SequenceMatcher(None, [k for _, _, k in a], [k for _, _, k in b], autojunk=False)
+        added: List[Tuple[int, str]] = []
+        removed: List[Tuple[int, str]] = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != "equal":
+                removed.extend((i, k) for _, i, k in a[i1:i2])
+                added.extend((i, k) for _, i, k in b[j1:j2])
+        moved = Counter(k for _, k in added) & Counter(k for _, k in removed)
+        for side, out in ((added, new), (removed, fixed)):
+            skip = Counter(moved)
+            for i, k in side:
+                if skip[k] > 0:
+                    skip[k] -= 1
+                else:
+                    out.append(i)
+    return [after[i] for i in sorted(new)], [before[i] for i in sorted(fixed)]
+
+
+def _result(
+        repo_url: str,
+        sha: str,
+        bypass_cache: bool,
+        mode: Optional[str],
+        on_stage=None,
+        **budget: Any,
+) -> Dict[str, Any]:
+    result = analyze_commit(repo_url, sha, bypass_cache, mode, on_stage, **budget)
+    if "warnings" not in result:                # cached before results carried them
+        result = analyze_commit(repo_url, sha, True, mode, on_stage, **budget)
+    return result
+
+
+def _delta(
+        before: Dict[str, Any],
+        after: Dict[str, Any],
+        changes: List[Tuple[str, str, Optional[str]]],
+) -> Dict[str, Any]:
+    new, fixed = _warning_delta(before["warnings"], after["warnings"])
+    return {
+        "base_commit": before["commit"],
+        "head_commit": after["commit"],
+        "changed_files": [
+            {"status": status, "path": path, **({"old_path": old} if old else {})}
+            for status, path, old in changes
+        ],
+        "new_warnings": new,
+        "fixed_warnings": fixed,
+        "score_before": before["score"],
+        "grade_before": before["grade"],
+        "score_change": after["score"] - before["score"],
+        "loc_change": after["loc"] - before["loc"],
+        "kwh_change": {k: round(v - before["kwh"].get(k, 0.0), 4) for k, v in after["kwh"].items()},
+    }
+
+
+def analyze_diff(
+        repo_url: str,
+        base: str,
+        head: str = "HEAD",
+        bypass_cache: bool = False,
+        mode: Optional[str] = None,
+        timings: bool = False,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        budget_seconds: Optional[float] = None,
+        budget_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Analyse *head* of *repo_url* against *base* (blocking).
+
+    *bypass_cache* re-runs head only; the baseline is always taken from the
+    cache when present.  The other arguments are as for `analyze_repo`; the
+    budget applies to each side separately.
+    """
+    budget = {"budget_seconds": budget_seconds, "budget_bytes": budget_bytes}
+    with trace() as t:
+        with span("analysis"):
+            with span("resolve"), clones.borrow(repo_url, ref=head) as (mirror, head_sha):
+                base_sha = clones.rev_parse(mirror, base)
+                with span("diff") as s:
+                    changes = changed_files(mirror, base_sha, head_sha)
+                    s.files = len(changes)
+            logger.info("Diff %s..%s of %s: %s files changed", base_sha[:10], head_sha[:10], repo_url, len(changes))
+
+            with span("baseline"):
+                before = _result(repo_url, base_sha, False, mode, **budget)
+            response = _result(repo_url, head_sha, bypass_cache, mode, on_stage, **budget)
+            response["diff"] = _delta(before, response, changes)
+    if timings:
+        response["timings"] = t.to_dict()
+    return response
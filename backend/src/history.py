@@ -0,0 +1,314 @@
+# backend/src/history.py
+"""
+Analysis history: every finished analysis as a row in a local SQLite store.
+
+The result cache answers "what is the result for this commit"; the history
+answers "how has this repo / the fleet developed" – dashboards read it
+instead of re-running analyses.  One row per fresh analysis (cache hits and
+coalesced requests add nothing new):
+
+    repo_url, commit_sha, analyzed_at, analyzer_version, score, grade, loc,
+    kwh (users → kWh/day), energy_stdev, languages, warnings (+ count),
+    secrets_count, coverage_percent, sampled, seconds, timings, report_id
+
+with indexes on (repo_url, analyzed_at), commit_sha and analyzed_at, plus a
+trigger-maintained ``latest`` table (newest analysis per repo), so `history`
+and `fleet` are index lookups that never touch git.
+
+Writes are batched: `record` only enqueues, and a writer thread inserts up
+to SYPEC_HISTORY_BATCH rows per transaction (WAL mode, so readers are never
+blocked), at the latest SYPEC_HISTORY_FLUSH_S after the first of them.
+
+    SYPEC_HISTORY           "0" disables the store   (default on)
+    SYPEC_HISTORY_PATH      SQLite file              (default data/history/history.sqlite)
+    SYPEC_HISTORY_BATCH     rows per transaction     (default 100)
+    SYPEC_HISTORY_FLUSH_S   longest a row waits      (default 1.0)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backend.src.result_cache import normalise_url
+
+logger = logging.getLogger(__name__)
+
+HISTORY_ENABLED = os.getenv("SYPEC_HISTORY", "1") != "0"
+HISTORY_PATH = Path(os.getenv("SYPEC_HISTORY_PATH", "data/history/history.sqlite"))
+HISTORY_BATCH = int(os.getenv("SYPEC_HISTORY_BATCH", "100"))
+HISTORY_FLUSH_S = float(os.getenv("SYPEC_HISTORY_FLUSH_S", "1.0"))
+QUEUE_MAX = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id               INTEGER PRIMARY KEY,
+    repo_url         TEXT    NOT NULL,
+    commit_sha       TEXT    NOT NULL,
+    analyzed_at      REAL    NOT NULL,
+    analyzer_version TEXT    NOT NULL,
+    score            INTEGER,
+    grade            TEXT,
+    loc              INTEGER,
+    kwh              TEXT,
+    energy_stdev     REAL,
+    languages        TEXT,
+    warnings         TEXT,
+    warnings_count   INTEGER,
+    secrets_count    INTEGER,
+    coverage_percent REAL,
+    sampled          INTEGER NOT NULL DEFAULT 0,
+    seconds          REAL,
+    timings          TEXT,
+    report_id        TEXT
+);
+CREATE INDEX IF NOT EXISTS analyses_repo_time ON analyses (repo_url, analyzed_at);
+CREATE INDEX IF NOT EXISTS analyses_commit ON analyses (commit_sha);
+CREATE INDEX IF NOT EXISTS analyses_time ON analyses (analyzed_at);
+
+-- newest analysis per repo, kept current on insert: fleet queries cost O(repos)
+CREATE TABLE IF NOT EXISTS latest (
+    repo_url    TEXT    PRIMARY KEY,
+    id          INTEGER NOT NULL,
+    analyzed_at REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS latest_time ON latest (analyzed_at);
+CREATE TRIGGER IF NOT EXISTS analyses_latest AFTER INSERT ON analyses BEGIN
+    INSERT INTO latest (repo_url, id, analyzed_at) VALUES (NEW.repo_url, NEW.id, NEW.analyzed_at)
+    ON CONFLICT (repo_url) DO UPDATE SET id = excluded.id, analyzed_at = excluded.analyzed_at
+    WHERE excluded.analyzed_at >= latest.analyzed_at;
+END;
+"""
+
+_COLUMNS = (
+    "repo_url", "commit_sha", "analyzed_at", "analyzer_version", "score", "grade", "loc",
+    "kwh", "energy_stdev", "languages", "warnings", "warnings_count", "secrets_count",
+    "coverage_percent", "sampled", "seconds", "timings", "report_id",
+)
+_JSON_COLUMNS = ("kwh", "languages", "warnings", "timings")
+# what `history` / `fleet` return – the warning texts stay in the store
+_SUMMARY = ("id",) + tuple(c for c in _COLUMNS if c != "warnings")
+_LATEST = tuple(c for c in _SUMMARY if c != "timings")
+
+_FLUSH = object()
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, separators=(",", ":"), default=str)
+
+
+def to_row(
+        result: Dict[str, Any],
+        version: str,
+        seconds: Optional[float] = None,
+        timings: Optional[List[Dict[str, Any]]] = None,
+        analyzed_at: Optional[float] = None,
+) -> tuple:
+    """The history row of an analysis result (the `/analyze` payload)."""
+    warnings = result.get("warnings") or []
+    coverage = result.get("test_coverage") or {}
+    return (
+        normalise_url(result["repo_url"]),
+        result["commit"],
+        time.time() if analyzed_at is None else analyzed_at,
+        version,
+        result.get("score"),
+        result.get("grade"),
+        result.get("loc"),
+        _dumps(result.get("kwh")),
+        result.get("energy_stdev"),
+        _dumps(result.get("languages")),
+        _dumps(warnings),
+        len(warnings),
+        len(result.get("secrets_found") or ()),
+        coverage.get("coverage_percent"),
+        int(bool(result.get("sampling"))),
+        seconds,
+        _dumps(timings),
+        result.get("report_id"),
+    )
+
+
+def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    out = dict(row)
+    for col in _JSON_COLUMNS:
+        if out.get(col) is not None:
+            out[col] = json.loads(out[col])
+    out["sampled"] = bool(out["sampled"])
+    out["analyzed_at"] = datetime.fromtimestamp(out["analyzed_at"], timezone.utc).isoformat(timespec="seconds")
+    return out
+
+
+class HistoryStore:
+    """SQLite history with a batching writer thread; safe to share between threads."""
+
+    def __init__(
+            self,
+            path: Path = HISTORY_PATH,
+            batch: int = HISTORY_BATCH,
+            flush_s: float = HISTORY_FLUSH_S,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch = max(1, batch)
+        self.flush_s = flush_s
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=QUEUE_MAX)
+        self._writer = threading.Thread(target=self._write_loop, name="sypec-history", daemon=True)
+        self._writer.start()
+
+    # ── writes ────────────────────────────────────────────────────────
+    def record(self, result: Dict[str, Any], version: str, **kw: Any) -> None:
+        """Queue *result* (see `to_row` for *kw*); never blocks the analysis."""
+        try:
+            self._queue.put_nowait(to_row(result, version, **kw))
+        except queue.Full:
+            logger.warning("History queue full, analysis of %s not recorded", result.get("repo_url"))
+
+    def record_rows(self, rows: List[tuple]) -> None:
+        """Insert ready-made `to_row` rows in one transaction (imports, backfills)."""
+        if not rows:
+            return
+        placeholders = ",".join("?" * len(_COLUMNS))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO analyses ({','.join(_COLUMNS)}) VALUES ({placeholders})", rows
+            )
+
+    def flush(self) -> None:
+        """Wait until everything recorded so far is written."""
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def _write_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            items = [first]
+            deadline = time.monotonic() + self.flush_s
+            while first is not _FLUSH and len(items) < self.batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                items.append(item)
+                if item is _FLUSH:
+                    break
+            try:
+                self.record_rows([i for i in items if i is not _FLUSH])
+            except sqlite3.Error as exc:
+                logger.warning("History write of %s rows failed: %s", len(items), exc)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    # ── reads ─────────────────────────────────────────────────────────
+    def _select(self, sql: str, args: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [_from_row(r) for r in rows]
+
+    def history(
+            self,
+            repo_url: Optional[str] = None,
+            commit: Optional[str] = None,
+            since: Optional[float] = None,
+            until: Optional[float] = None,
+            limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Analyses of *repo_url* and / or *commit*, newest first."""
+        where, args = [], []
+        if repo_url:
+            where.append("repo_url = ?")
+            args.append(normalise_url(repo_url))
+        if commit:
+            where.append("commit_sha = ?")
+            args.append(commit)
+        if since is not None:
+            where.append("analyzed_at >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("analyzed_at < ?")
+            args.append(until)
+        sql = (
+            f"SELECT {','.join(_SUMMARY)} FROM analyses"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + " ORDER BY analyzed_at DESC LIMIT ?"
+        )
+        return self._select(sql, (*args, limit))
+
+    def latest(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """The most recent analysis of every repo (analysed at or after *since*)."""
+        cond = "WHERE l.analyzed_at >= ?" if since is not None else ""
+        sql = (
+            f"SELECT {','.join('a.' + c for c in _LATEST)} FROM latest l"
+            f" JOIN analyses a ON a.id = l.id {cond} ORDER BY l.repo_url"
+        )
+        return self._select(sql, (since,) if since is not None else ())
+
+    def fleet(self, since: Optional[float] = None, rows: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Fleet-wide aggregates over the latest analysis of every repo (*rows*, if fetched already)."""
+        rows = self.latest(since) if rows is None else rows
+        with self._lock:
+            cond, args = ("WHERE analyzed_at >= ?", (since,)) if since is not None else ("", ())
+            total = self._conn.execute(f"SELECT COUNT(*) FROM analyses {cond}", args).fetchone()[0]
+
+        grades: Dict[str, int] = {}
+        languages: Dict[str, int] = {}
+        kwh: Dict[str, float] = {}
+        for r in rows:
+            grades[r["grade"]] = grades.get(r["grade"], 0) + 1
+            for lang, n in (r["languages"] or {}).items():
+                languages[lang] = languages.get(lang, 0) + n
+            for users, value in (r["kwh"] or {}).items():
+                kwh[str(users)] = round(kwh.get(str(users), 0.0) + value, 2)
+        scores = [r["score"] for r in rows if r["score"] is not None]
+        return {
+            "repos": len(rows),
+            "analyses": total,
+            "mean_score": round(sum(scores) / len(scores), 1) if scores else None,
+            "grades": grades,
+            "total_loc": sum(r["loc"] or 0 for r in rows),
+            "kwh": kwh,
+            "languages": dict(sorted(languages.items(), key=lambda kv: -kv[1])),
+            "sampled": sum(r["sampled"] for r in rows),
+            "worst": sorted(
+                ({"repo_url": r["repo_url"], "score": r["score"], "grade": r["grade"]} for r in rows),
+                key=lambda r: (r["score"] is None, r["score"]),
+            )[:10],
+        }
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+_history: Optional[HistoryStore] = None
+_history_lock = threading.Lock()
+
+
+def default_history() -> Optional[HistoryStore]:
+    """Process-wide history, opened on first use (None when disabled)."""
+    global _history
+    if not HISTORY_ENABLED:
+        return None
+    with _history_lock:
+        if _history is None:
+            try:
+                _history = HistoryStore()
+            except sqlite3.Error as exc:
+                logger.warning("History store unavailable: %s", exc)
+                return None
+        return _history
@@ -0,0 +1,140 @@
+# backend/src/jobs.py
+"""
+Bounded background job queue for analyses.
+
+Analyses are blocking (git clone, file I/O, latexmk), so they must never run
+on the event loop.  `JobQueue` hands them to a fixed-size thread pool and
+refuses new work once `max_workers + max_queue` jobs are in flight, which
+keeps memory and latency bounded under bursts.
+
+    SYPEC_MAX_WORKERS   concurrent analyses          (default 2)
+    SYPEC_MAX_QUEUE     jobs allowed to wait         (default 16)
+    SYPEC_JOB_HISTORY   finished jobs kept for GET   (default 1000)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv("SYPEC_MAX_WORKERS", "2"))
+MAX_QUEUE = int(os.getenv("SYPEC_MAX_QUEUE", "16"))
+JOB_HISTORY = int(os.getenv("SYPEC_JOB_HISTORY", "1000"))
+
+
+class QueueFull(RuntimeError):
+    """Raised by `JobQueue.submit` when no more jobs may be accepted."""
+
+
+class Job:
+    """State of one submitted analysis."""
+
+    def __init__(self, job_id: str, params: Dict[str, Any]) -> None:
+        self.id = job_id
+        self.params = params
+        self.status = "queued"                     # queued | running | done | failed
+        self.submitted_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "job_id": self.id,
+            "status": self.status,
+            **{k: v for k, v in self.params.items() if not callable(v)},     # e.g. callbacks
+            "submitted_at": self.submitted_at.isoformat(timespec="seconds"),
+            "started_at": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+        }
+        if self.status == "done":
+            out["result"] = self.result
+        elif self.status == "failed":
+            out["error"] = self.error
+        return out
+
+
+class JobQueue:
+    """Thread pool with admission control and a bounded job registry."""
+
+    def __init__(
+            self,
+            max_workers: int = MAX_WORKERS,
+            max_queue: int = MAX_QUEUE,
+            history: int = JOB_HISTORY,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.history = history
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sypec-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def submit(self, fn: Callable[..., Dict[str, Any]], **params: Any) -> Job:
+        """Queue ``fn(**params)``; raise `QueueFull` if the queue is saturated."""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                raise QueueFull(
+                    f"{self._in_flight} analyses in flight "
+                    f"(limit {self.max_workers} running + {self.max_queue} queued)"
+                )
+            self._in_flight += 1
+            job = Job(uuid.uuid4().hex, params)
+            self._jobs[job.id] = job
+            self._evict_finished()
+
+        job.future = self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    # ------------------------------------------------------------------
+    def _run(self, job: Job, fn: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(**job.params)
+            job.status = "done"
+            return job.result
+        except Exception as exc:
+            logger.error("Job %s failed:\n%s", job.id, traceback.format_exc())
+            job.error = f"{type(exc).__name__}: {exc}"
+            job.status = "failed"
+            raise
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._in_flight -= 1
+
+    def _evict_finished(self) -> None:
+        """Drop the oldest finished jobs beyond `history` (lock held)."""
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.status in ("done", "failed")][:excess]:
+            del self._jobs[job_id]
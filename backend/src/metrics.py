@@ -0,0 +1,184 @@
+# backend/src/metrics.py
+"""
+Timing spans and counters for analyses, exported as Prometheus text.
+
+Every expensive step is wrapped in a span:
+
+    with span("digest") as s:
+        digest = get_repo_digest(index, records)
+        s.files = len(digest["files"])
+
+A span feeds the process-wide per-stage histogram (duration) and counters
+(files / bytes processed) and, inside a `trace()` block, is also recorded on
+that analysis' `Trace` – which is what the optional ``timings`` block of the
+response shows.  Cache lookups are counted with `count_cache`.
+
+`render()` returns everything in the Prometheus text exposition format for
+``GET /metrics``; no client library is needed.
+"""
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# seconds – from a cached digest up to a cold clone of a big repo
+STAGE_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+class Span:
+    """One timed stage.  *files* / *bytes* may be filled in while it runs."""
+
+    __slots__ = ("stage", "seconds", "files", "bytes")
+
+    def __init__(self, stage: str, files: Optional[int] = None, bytes: Optional[int] = None) -> None:
+        self.stage = stage
+        self.seconds = 0.0
+        self.files = files
+        self.bytes = bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"stage": self.stage, "seconds": round(self.seconds, 4)}
+        if self.files is not None:
+            out["files"] = self.files
+        if self.bytes is not None:
+            out["bytes"] = self.bytes
+        return out
+
+
+class Trace:
+    """Spans and cache counts of one analysis."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self.cache: Dict[str, Dict[str, int]] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": round(sum(s.seconds for s in self.spans if s.stage == "analysis"), 4),
+            "stages": [s.to_dict() for s in self.spans if s.stage != "analysis"],
+            "cache": self.cache,
+        }
+
+
+class _Registry:
+    """Process-wide aggregates behind ``/metrics``."""
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets: Dict[str, List[int]] = defaultdict(lambda: [0] * len(self.buckets))
+            self._count: Dict[str, int] = defaultdict(int)
+            self._sum: Dict[str, float] = defaultdict(float)
+            self._files: Dict[str, int] = defaultdict(int)
+            self._bytes: Dict[str, int] = defaultdict(int)
+            self._cache: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def observe(self, span: Span) -> None:
+        with self._lock:
+            counts = self._buckets[span.stage]
+            for i, bound in enumerate(self.buckets):
+                if span.seconds <= bound:
+                    counts[i] += 1
+            self._count[span.stage] += 1
+            self._sum[span.stage] += span.seconds
+            if span.files:
+                self._files[span.stage] += span.files
+            if span.bytes:
+                self._bytes[span.stage] += span.bytes
+
+    def count_cache(self, cache: str, hits: int, misses: int) -> None:
+        with self._lock:
+            self._cache[(cache, "hit")] += hits
+            self._cache[(cache, "miss")] += misses
+
+    def render(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        lines: List[str] = []
+        with self._lock:
+            lines += [
+                "# HELP sypec_stage_duration_seconds Wall time per analysis stage.",
+                "# TYPE sypec_stage_duration_seconds histogram",
+            ]
+            for stage in sorted(self._count):
+                for bound, n in zip(self.buckets, self._buckets[stage]):
+                    lines.append(f'sypec_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {n}')
+                lines.append(f'sypec_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {self._count[stage]}')
+                lines.append(f'sypec_stage_duration_seconds_sum{{stage="{stage}"}} {self._sum[stage]:.6f}')
+                lines.append(f'sypec_stage_duration_seconds_count{{stage="{stage}"}} {self._count[stage]}')
+
+            for name, values, help_ in (
+                    ("sypec_stage_files_total", self._files, "Files processed per stage."),
+                    ("sypec_stage_bytes_total", self._bytes, "Bytes processed per stage."),
+            ):
+                lines += [f"# HELP {name} {help_}", f"# TYPE {name} counter"]
+                lines += [f'{name}{{stage="{stage}"}} {n}' for stage, n in sorted(values.items())]
+
+            lines += [
+                "# HELP sypec_cache_lookups_total Cache lookups by cache and result.",
+                "# TYPE sypec_cache_lookups_total counter",
+            ]
+            lines += [
+                f'sypec_cache_lookups_total{{cache="{cache}",result="{result}"}} {n}'
+                for (cache, result), n in sorted(self._cache.items())
+            ]
+
+        for name, value in sorted((gauges or {}).items()):
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+registry = _Registry()
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("sypec_trace", default=None)
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """Collect the spans of everything run inside the block (same thread)."""
+    t = Trace()
+    token = _current.set(t)
+    try:
+        yield t
+    finally:
+        _current.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    """The `trace()` block the caller runs in, if any."""
+    return _current.get()
+
+
+@contextmanager
+def span(stage: str, files: Optional[int] = None, bytes: Optional[int] = None) -> Iterator[Span]:
+    """Time *stage*; failed stages are recorded too."""
+    s = Span(stage, files, bytes)
+    started = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.seconds = time.perf_counter() - started
+        registry.observe(s)
+        t = _current.get()
+        if t is not None:
+            t.spans.append(s)
+
+
+def count_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    registry.count_cache(cache, hits, misses)
+    t = _current.get()
+    if t is not None:
+        c = t.cache.setdefault(cache, {"hits": 0, "misses": 0})
+        c["hits"] += hits
+        c["misses"] += misses
+
+
+def render(gauges: Optional[Dict[str, float]] = None) -> str:
+    return registry.render(gauges)
@@ -0,0 +1,64 @@
+# backend/src/preload.py
+"""
+Per-process warm-up, run once when a process starts serving.
+
+Importing the package is cheap – matplotlib, Jinja2, GitPython and requests
+are imported on first use, and nothing touches the filesystem at import –
+so the first analysis or report of a fresh process would pay for what is
+still cold.  `preload()` does that work at startup instead:
+
+• analysers: rule engine with its prefilters for every known extension,
+  Python visitor tables (`file_records.warm`);
+• hardware profiles: loaded from the disk cache or the bundled snapshot;
+• reports: LaTeX template compiled, matplotlib imported (`report.builder.warm`).
+
+The API runs it in its startup hook, `backend.src.worker` before its claim
+loops start.  Scan workers are forked from the forkserver, which warms
+itself once (`static_analyzer.scan_preload`); with SYPEC_MP_START=fork they
+inherit the state warmed here.
+
+    SYPEC_PRELOAD   "0" skips the warm-up (default on)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRELOAD = os.getenv("SYPEC_PRELOAD", "1") != "0"
+
+
+def _analysers() -> None:
+    from backend.src.static_analyzer import file_records, static_pipeline  # noqa: F401
+
+    file_records.warm()
+
+
+def _profiles() -> None:
+    from backend.src.static_analyzer.hardware_profiles import get_live_profile
+
+    for context in ("desktop", "cloud", "mobile"):
+        get_live_profile(context)
+
+
+def _reports() -> None:
+    from backend.src.report import builder
+
+    builder.warm()
+
+
+def preload(reports: bool = True) -> Dict[str, float]:
+    """Warm this process (reports too unless *reports* is False); seconds per step."""
+    steps: List[Tuple[str, Callable[[], None]]] = [("analysers", _analysers), ("profiles", _profiles)]
+    if reports:
+        steps.append(("reports", _reports))
+    timings: Dict[str, float] = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        step()
+        timings[name] = round(time.perf_counter() - started, 4)
+    logger.info("Preloaded in %.2fs %s", sum(timings.values()), timings)
+    return timings
@@ -2,32 +2,75 @@ from __future__ import annotations
 
 import logging
 import subprocess
-import uuid
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
-from jinja2 import Environment, FileSystemLoader
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+# Jinja2 and matplotlib are imported on first use (or by `warm`): a process
+# that never builds a report never pays for them.
 
 log = logging.getLogger(__name__)
 
 TEMPLATES_DIR = Path(__file__).parent / "templates"          # …/report/templates
-REPORTS_DIR   = Path("data/reports")                         # docker-volume mount
-REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+REPORTS_DIR   = Path("data/reports")                         # docker-volume mount, created per report
 
 
 # ──────────────────────────────────────────────────────────────────────────
-def _render_latex(ctx: dict) -> str:
+@lru_cache(maxsize=1)
+def _template() -> Template:
     """
-    Render `report.tex.jinja` with Jinja-2.
+    `report.tex.jinja`, compiled once per process and shared by all workers
+    (rendering a compiled template is thread-safe).
     *Important*: **autoescape=False** – LaTeX must not be HTML-escaped.
     """
+    from jinja2 import Environment, FileSystemLoader
+
     env = Environment(
         loader=FileSystemLoader(TEMPLATES_DIR),
         autoescape=False,                # ← fixes “bool is not iterable”
         trim_blocks=True,
         lstrip_blocks=True,
     )
-    template = env.get_template("report.tex.jinja")
-    return template.render(**ctx)
+    return env.get_template("report.tex.jinja")
+
+
+def _render_latex(ctx: dict) -> str:
+    """Render `report.tex.jinja` with Jinja-2."""
+    return _template().render(**ctx)
+
+
+def plot_energy(curve: dict, target: Path, bands: Optional[dict] = None) -> None:
+    """
+    Save a simple log-log energy curve as PNG, with the 5–95 % Monte Carlo
+    band shaded when *bands* (see `energy_model.energy_bands`) are given.
+
+    Uses a standalone `Figure` rather than pyplot's global state so several
+    report workers can plot concurrently.
+    """
+    from matplotlib.figure import Figure      # headless (no pyplot)
+
+    users = sorted(curve, key=int)
+    vals  = [curve[u] for u in users]
+
+    fig = Figure(figsize=(4, 3))
+    ax = fig.subplots()
+    ax.loglog([int(u) for u in users], vals, marker="o")
+    if bands and bands.get("p5") and bands.get("p95"):
+        ax.fill_between(bands["users"], bands["p5"], bands["p95"], alpha=0.25, lw=0)
+    ax.grid(True, which="both", ls=":")
+    ax.set_xlabel("Active users")
+    ax.set_ylabel("kWh per day")
+    fig.tight_layout()
+    fig.savefig(target, dpi=200)
+
+
+def warm() -> None:
+    """Compile the template and import the plotting stack now rather than in the first report."""
+    _template()
+    import matplotlib.figure  # noqa: F401
 
 
 # -------------------------------------------------------------------------
@@ -0,0 +1,155 @@
+# backend/src/report/service.py
+"""
+Background PDF reports: a bounded LaTeX worker pool with de-duplication.
+
+Plotting and `latexmk` are by far the slowest part of an analysis, so the
+pipeline no longer waits for them.  It hands the report context to
+`ReportService.submit` and returns straight away with the report's id and
+future ``pdf_url``; a worker thread then plots the energy curve and compiles
+the PDF.
+
+Reports are content-addressed: the id is a hash of the context, and the
+output directory is derived from it.  Submitting a context whose PDF is
+already built (or being built) compiles nothing.  Clients poll
+``GET /reports/{report_id}`` until the status is ``ready``.
+
+    SYPEC_REPORT_WORKERS   concurrent LaTeX builds (default 2, 0 = build inline)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..metrics import span
+from .builder import REPORTS_DIR, generate_pdf_report, plot_energy
+
+log = logging.getLogger(__name__)
+
+REPORT_WORKERS = int(os.getenv("SYPEC_REPORT_WORKERS", "2"))
+FAILED_HISTORY = 1000
+
+PENDING, READY, FAILED = "pending", "ready", "failed"
+
+
+def report_key(ctx: Dict[str, Any], fingerprint: str = "") -> str:
+    """
+    Content hash of a report context – identical contexts, identical PDF.
+
+    Only the JSON values of *ctx* are hashed; other objects (the digest's
+    `FileTable`, say) count as null, so what they stand for must be in
+    *fingerprint* – e.g. the commit and analyser version.
+    """
+    raw = json.dumps(ctx, sort_keys=True, default=lambda _obj: None, separators=(",", ":"))
+    return hashlib.sha256(f"{fingerprint}\0{raw}".encode()).hexdigest()[:20]
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)[:60] or "repo"
+
+
+class ReportService:
+    """Deduplicating front for a small pool of report builders."""
+
+    def __init__(self, workers: int = REPORT_WORKERS, report_dir: Path = REPORTS_DIR) -> None:
+        self.report_dir = Path(report_dir)
+        self._pool = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report") if workers > 0 else None
+        )
+        self._running: Dict[str, Path] = {}            # report id → output dir
+        self._failed: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def _dir(self, report_id: str, repo_name: Optional[str] = None) -> Optional[Path]:
+        if repo_name is not None:
+            return self.report_dir / f"report_{_slug(repo_name)}_{report_id}"
+        # by id alone (e.g. after a restart)
+        return next(iter(self.report_dir.glob(f"report_*_{report_id}")), None)
+
+    def _url(self, out_dir: Path) -> str:
+        return f"/reports/{out_dir.name}/report.pdf"
+
+    def submit(self, ctx: Dict[str, Any], fingerprint: str = "") -> Dict[str, Any]:
+        """
+        Queue the report for *ctx* unless it exists or is already queued.
+        *fingerprint* identifies what *ctx* was computed from (see `report_key`).
+
+        Returns ``{"report_id", "status", "pdf_url"}`` without waiting.
+        """
+        report_id = report_key(ctx, fingerprint)
+        out_dir = self._dir(report_id, ctx.get("repo_name", "repo"))
+        ticket = {"report_id": report_id, "status": PENDING, "pdf_url": self._url(out_dir)}
+
+        with self._lock:
+            if (out_dir / "report.pdf").is_file():
+                ticket["status"] = READY
+                return ticket
+            if report_id in self._running:
+                return ticket
+            self._failed.pop(report_id, None)
+            if self._pool is not None:
+                self._running[report_id] = out_dir
+                self._pool.submit(self._build, report_id, out_dir, ctx)
+                log.debug("Report %s queued", report_id)
+                return ticket
+
+        # no pool: build inline
+        self._build(report_id, out_dir, ctx)
+        return {**ticket, **self.status(report_id)}
+
+    def _build(self, report_id: str, out_dir: Path, ctx: Dict[str, Any]) -> None:
+        try:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            with span("plot"):
+                plot_energy(ctx["energy_profile"], out_dir / ctx["energy_plot"], ctx.get("energy_bands"))
+            with span("pdf"):
+                generate_pdf_report(output_base=out_dir, ctx=ctx)
+        except Exception as exc:  # noqa: BLE001
+            log.warning("Report %s failed: %s", report_id, exc)
+            with self._lock:
+                self._failed[report_id] = f"{type(exc).__name__}: {exc}"
+                while len(self._failed) > FAILED_HISTORY:
+                    self._failed.popitem(last=False)
+        finally:
+            with self._lock:
+                self._running.pop(report_id, None)
+
+    # ------------------------------------------------------------------
+    def status(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """``{"status", "pdf_url", "error"?}`` – None if the id is unknown."""
+        with self._lock:
+            running = self._running.get(report_id)
+            error = self._failed.get(report_id)
+        if running is not None:
+            return {"status": PENDING, "pdf_url": self._url(running)}
+        out_dir = self._dir(report_id)
+        if out_dir is not None and (out_dir / "report.pdf").is_file():
+            return {"status": READY, "pdf_url": self._url(out_dir)}
+        if error is not None or out_dir is not None:
+            return {"status": FAILED, "pdf_url": None, "error": error or "report not built"}
+        return None
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_service: Optional[ReportService] = None
+_service_lock = threading.Lock()
+
+
+def default_service() -> ReportService:
+    """Process-wide report service, created on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ReportService()
+        return _service
@@ -0,0 +1,105 @@
+# backend/src/result_cache.py
+"""
+Persistent, commit-keyed cache of finished analyses.
+
+Key   = sha256(repo URL, commit SHA, ANALYZER_VERSION)
+Value = the JSON payload returned by `/analyze` (one file per entry)
+
+Entries live in ``data/cache/results`` next to the reports volume.  A hit
+refreshes the file's mtime, and eviction drops the least recently used
+entries once the directory exceeds its byte or entry budget.
+
+    SYPEC_RESULT_CACHE_DIR       cache directory (default data/cache/results)
+    SYPEC_RESULT_CACHE_MB        size budget     (default 256)
+    SYPEC_RESULT_CACHE_ENTRIES   entry budget    (default 5000)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.getenv("SYPEC_RESULT_CACHE_DIR", "data/cache/results"))
+MAX_BYTES = int(float(os.getenv("SYPEC_RESULT_CACHE_MB", "256")) * 1024 * 1024)
+MAX_ENTRIES = int(os.getenv("SYPEC_RESULT_CACHE_ENTRIES", "5000"))
+
+
+def normalise_url(repo_url: str) -> str:
+    url = repo_url.strip().rstrip("/")
+    return url[:-4] if url.endswith(".git") else url
+
+
+class ResultCache:
+    """Directory of JSON results with LRU eviction (mtime = last access)."""
+
+    def __init__(
+            self,
+            directory: Path = CACHE_DIR,
+            max_bytes: int = MAX_BYTES,
+            max_entries: int = MAX_ENTRIES,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def key(repo_url: str, commit: str, version: str) -> str:
+        raw = "\0".join((normalise_url(repo_url), commit, version))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, repo_url: str, commit: str, version: str) -> Optional[Dict[str, Any]]:
+        path = self._path(self.key(repo_url, commit, version))
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)                           # LRU bookkeeping
+        except OSError:
+            pass
+        logger.debug("Result cache hit: %s @ %s", repo_url, commit)
+        return payload
+
+    def put(self, repo_url: str, commit: str, version: str, payload: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(self.key(repo_url, commit, version))
+        try:
+            # write-then-rename: readers never see a half-written entry
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, default=str)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("Result cache write failed: %s", exc)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for p in self.directory.glob("*.json"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            entries.sort(key=lambda e: e[0])         # oldest access first
+
+            total = sum(size for _, size, _ in entries)
+            while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+                _, size, victim = entries.pop(0)
+                victim.unlink(missing_ok=True)
+                total -= size
+                logger.debug("Result cache evicted %s", victim.name)
@@ -0,0 +1,107 @@
+# backend/src/singleflight.py
+"""
+Single-flight: concurrent calls for the same key share one execution.
+
+A burst of identical requests – twenty CI pipelines of one monorepo asking
+for the same commit – should cost one clone and one pipeline run.  The
+first caller of `SingleFlight.run` for a key (the leader) does the work;
+callers arriving while it runs join its flight and block on the same future.
+They get the leader's result, or its exception re-raised.  Nothing outlives
+the flight: the key is free again as soon as the leader finishes, so a
+failure is never cached and the next call starts afresh.
+
+Progress events the leader publishes are fanned out to every member, and
+members who join late first get the events they missed replayed – a
+streaming client that joins a running analysis still sees every stage.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from backend.src.metrics import count_cache
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[..., None]
+
+
+class Flight:
+    """One in-progress execution: its future plus the events published so far."""
+
+    def __init__(self) -> None:
+        self.future: Future = Future()
+        self.members = 1
+        self._events: List[Tuple[Any, ...]] = []
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def publish(self, *event: Any) -> None:
+        # listeners run under the lock, so a late subscriber's replay and
+        # live events can never interleave out of order
+        with self._lock:
+            self._events.append(event)
+            for listener in self._listeners:
+                try:
+                    listener(*event)
+                except Exception:  # noqa: BLE001 – one bad listener must not fail the flight
+                    logger.exception("Single-flight listener failed")
+
+    def subscribe(self, listener: Listener) -> None:
+        with self._lock:
+            for event in self._events:
+                listener(*event)
+            self._listeners.append(listener)
+
+
+class SingleFlight:
+    """Process-wide map of key → running `Flight`; safe to share between threads."""
+
+    def __init__(self, name: str = "singleflight") -> None:
+        self.name = name
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+
+    def run(
+            self,
+            key: Hashable,
+            fn: Callable[[Callable[..., None]], Any],
+            on_event: Optional[Listener] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        ``(result, joined)``: ``fn(publish)`` run by the leader of *key*, or the
+        running leader's outcome for everyone else (*joined* True).
+        *on_event* receives every ``publish(*event)`` of the flight.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+            else:
+                flight.members += 1
+        if on_event is not None:
+            flight.subscribe(on_event)
+        count_cache(self.name, hits=int(not leader), misses=int(leader))
+
+        if not leader:
+            logger.info("Joined in-flight analysis %s (%s waiting)", key, flight.members - 1)
+            return flight.future.result(), True
+
+        try:
+            result = fn(flight.publish)
+        except BaseException as exc:
+            flight.future.set_exception(exc)
+            raise
+        else:
+            flight.future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
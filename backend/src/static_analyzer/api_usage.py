@@ -2,10 +2,18 @@
 Very light heuristic: look for common SDK imports / curl strings
 and env-var names to guess outbound API dependencies.
 Return a list of APIs (strings).
+
+Python files are judged by their imports and string literals (`ApiVisitor`,
+see `py_ast`); other sources by the text rules below.
 """
+import ast
 import re
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from . import py_ast
+from .file_index import FileEntry, FileIndex, ensure_index, iter_file_results
+from .rules import Hit, Rule, default_engine
 
 _PATTERNS = {
     "openai": re.compile(r"\bopenai\b", re.I),
@@ -16,18 +24,103 @@ _PATTERNS = {
 }
 
 
-def find_api_usage(root: Path) -> List[str]:
-    hits = {name: 0 for name in _PATTERNS}
+# prefilter literals: every match of _PATTERNS[name] contains one of these
+_LITERALS = {
+    "openai": ("openai",),
+    "slack": ("slack",),
+    "stripe": ("stripe",),
+    "aws": ("boto3", "aws"),
+    "github": ("github",),
+}
+
+RULES = [
+    Rule(
+        id=f"api.{name}",
+        family="api",
+        literals=_LITERALS[name],
+        regex=pat,
+        label=name,
+        suffixes=frozenset({".py", ".ts", ".js"}),
+        max_size=256_000,
+        ignore_case=True,
+    )
+    for name, pat in _PATTERNS.items()
+]
+
+
+# Python files that parse: imported top-level packages and API hosts in strings
+_PY_MODULES = {
+    "openai": "openai",
+    "slack": "slack", "slack_sdk": "slack", "slack_bolt": "slack",
+    "stripe": "stripe",
+    "boto3": "aws", "botocore": "aws", "aioboto3": "aws",
+    "github": "github",
+}
+_HOSTS = {
+    "api.openai.com": "openai",
+    "slack.com/api": "slack",
+    "api.stripe.com": "stripe",
+    "amazonaws.com": "aws",
+    "api.github.com": "github",
+}
+
+
+class ApiVisitor(py_ast.Visitor):
+    key = "apis"
+
+    def __init__(self) -> None:
+        self.seen = set()
 
-    for f in root.rglob("*.*"):
-        if f.suffix.lower() in {".py", ".ts", ".js"} and f.stat().st_size < 256_000:
-            try:
-                text = f.read_text(errors="ignore")
-            except Exception:  # pragma: no cover
-                continue
+    def wants(self, data: bytes) -> bool:
+        low = data.lower()
+        return any(m.encode() in data for m in _PY_MODULES) or any(h.encode() in low for h in _HOSTS)
+
+    def visit_Import(self, node: ast.Import, ctx: py_ast.Context) -> None:
+        for a in node.names:
+            self._module(a.name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom, ctx: py_ast.Context) -> None:
+        if node.module and not node.level:
+            self._module(node.module)
+
+    def _module(self, name: str) -> None:
+        api = _PY_MODULES.get(name.split(".", 1)[0])
+        if api:
+            self.seen.add(api)
+
+    def visit_Constant(self, node: ast.Constant, ctx: py_ast.Context) -> None:
+        if isinstance(node.value, str) and "." in node.value:
+            low = node.value.lower()
+            self.seen.update(api for host, api in _HOSTS.items() if host in low)
+
+    def result(self, ctx: py_ast.Context) -> List[str]:
+        return [name for name in _PATTERNS if name in self.seen]
+
+
+def from_hits(hits: Iterable[Hit]) -> List[str]:
+    seen = {h.value for h in hits}
+    return [name for name in _PATTERNS if name in seen]
+
+
+def scan_file(entry: FileEntry) -> List[str]:
+    """
+    Per-file pass: names of the APIs referenced by one source file – from the
+    AST for Python, otherwise (and for Python that does not parse) by text.
+    """
+    parsed = py_ast.analyze(entry)
+    if parsed is not None:
+        return parsed["apis"]
+    return from_hits(default_engine().scan(entry, families=("api",)))
+
+
+def find_api_usage(
+        root: Union[FileIndex, Path],
+        records: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[str]:
+    hits = {name: 0 for name in _PATTERNS}
 
-            for name, pat in _PATTERNS.items():
-                if pat.search(text):
-                    hits[name] += 1
+    for _, names in iter_file_results(ensure_index(root), records, "apis", scan_file):
+        for name in names:
+            hits[name] += 1
 
     return [k for k, v in hits.items() if v]
@@ -1,23 +1,88 @@
-import os
+import ast
 import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from . import py_ast
+from .file_index import FileEntry, FileIndex, ensure_index, iter_file_results
 
 logger = logging.getLogger(__name__)
 
-def detect_code_smells(repo_path: str) -> list[str]:
+_MESSAGES = {
+    "long_lines": "{file} has very long lines.",
+    "many_functions": "{file} has too many functions.",
+    "wildcard_import": "{file} uses wildcard imports.",
+}
+
+
+MAX_LINE = 120
+MAX_FUNCTIONS = 10
+
+
+def _long_lines(entry: FileEntry) -> bool:
+    return any(len(line) > MAX_LINE for line in entry.read_text().splitlines())
+
+
+class SmellVisitor(py_ast.Visitor):
+    key = "smells"
+
+    def __init__(self) -> None:
+        self.functions = 0
+        self.wildcard = False
+
+    def wants(self, data: bytes) -> bool:
+        # long lines are checked on the text either way
+        return data.count(b"def ") > MAX_FUNCTIONS or b"*" in data
+
+    def visit_FunctionDef(self, node: ast.FunctionDef, ctx: py_ast.Context) -> None:
+        self.functions += 1
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ImportFrom(self, node: ast.ImportFrom, ctx: py_ast.Context) -> None:
+        self.wildcard = self.wildcard or any(a.name == "*" for a in node.names)
+
+    def result(self, ctx: py_ast.Context) -> List[str]:
+        found = []
+        if _long_lines(ctx.entry):
+            found.append("long_lines")
+        if self.functions > MAX_FUNCTIONS:
+            found.append("many_functions")
+        if self.wildcard:
+            found.append("wildcard_import")
+        return found
+
+
+def scan_file(entry: FileEntry) -> List[str]:
+    """
+    Per-file pass: smell ids (keys of `_MESSAGES`) for one Python file –
+    from the AST, or by text if the file does not parse.
+    """
+    if entry.suffix != ".py":
+        return []
+    parsed = py_ast.analyze(entry)
+    if parsed is not None:
+        return parsed["smells"]
+    lines = entry.lines()
+    found = []
+
+    if _long_lines(entry):
+        found.append("long_lines")
+    if sum(1 for line in lines if line.strip().startswith(("def ", "async def "))) > MAX_FUNCTIONS:
+        found.append("many_functions")
+    if "import *" in entry.read_text():
+        found.append("wildcard_import")
+    return found
+
+
+def detect_code_smells(
+        repo_path: Union[FileIndex, str, Path],
+        records: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> list[str]:
     smells = []
 
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            if file.endswith(".py"):
-                with open(os.path.join(root, file), "r", errors="ignore") as f:
-                    lines = f.readlines()
-
-                if any(len(line) > 120 for line in lines):
-                    smells.append(f"{file} has very long lines.")
-                if sum(1 for line in lines if line.strip().startswith("def ")) > 10:
-                    smells.append(f"{file} has too many functions.")
-                if "import *" in "".join(lines):
-                    smells.append(f"{file} uses wildcard imports.")
+    for entry, found in iter_file_results(ensure_index(repo_path), records, "smells", scan_file):
+        smells.extend(_MESSAGES[smell].format(file=entry.name) for smell in found)
 
     logger.debug(f"Code smells detected: {smells}")
     return smells
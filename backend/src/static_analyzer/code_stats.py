@@ -3,27 +3,37 @@ import os
 import logging
 from pathlib import Path
 
+from .digest import ensure_table
+
 logger = logging.getLogger(__name__)
 
-def analyze_code_stats(digest: dict, repo_path: Path) -> dict:
-    logger.debug("Starting code stats analysis...")
-    loc = digest.get("total_loc", 0)
-    files = digest.get("files", [])
+DOC_EXTS = (".md", ".rst")
+
 
+def repo_warnings(loc: int, has_docs: bool, python_files: int) -> list:
+    """The repo-level warnings, from totals alone (also used by `commit_walk`)."""
     issues = []
     if loc == 0:
         issues.append("Empty repository.")
     if loc > 100_000:
         issues.append("Repository is very large, consider modularizing.")
-    if not any(f["ext"] in [".md", ".rst"] for f in files):
+    if not has_docs:
         issues.append("Missing documentation files.")
+    if python_files < 2:
+        issues.append("Few Python files detected.")
+    return issues
+
+
+def analyze_code_stats(digest: dict, repo_path: Path) -> dict:
+    logger.debug("Starting code stats analysis...")
+    loc = digest.get("total_loc", 0)
+    files = ensure_table(digest.get("files", []))
 
     # Example: count Python files
-    python_files = [f for f in files if f["ext"] == ".py"]
-    if len(python_files) < 2:
-        issues.append("Few Python files detected.")
+    python_files = files.count_ext(".py")
+    issues = repo_warnings(loc, files.has_ext(*DOC_EXTS), python_files)
 
-    logger.debug(f"Code analysis complete: LOC={loc}, Python files={len(python_files)}")
+    logger.debug(f"Code analysis complete: LOC={loc}, Python files={python_files}")
     return {
         "loc": loc,
         "file_count": len(files),
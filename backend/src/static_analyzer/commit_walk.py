@@ -0,0 +1,359 @@
+# backend/src/static_analyzer/commit_walk.py
+"""
+Commit walk: repo-level metrics for every commit of a history, incrementally.
+
+Running the pipeline on each of the last N commits would cost N tree
+listings, N record lookups over the whole tree and N full aggregations.
+`CommitWalk` lists the oldest commit's tree once and then follows the
+first-parent history from a single ``git log --raw`` call:
+
+• per commit only the files it changes are touched – their old contribution
+  is subtracted from running totals and the new one added, so a step costs
+  O(changed files), not O(tree);
+• per-file records are the pipeline's own (`file_records`, keyed by blob):
+  the new blobs of SYPEC_TREND_CHUNK commits are looked up in the record
+  store together and the missing ones analysed in one batch (on the process
+  pool when there are many);
+• deny-listed directories and the tree's .gitignore files apply as in
+  `git_tree.build_git_index` – a commit that edits a .gitignore re-filters
+  the tree;
+• the energy curves of all points are evaluated in one
+  `energy_model.estimate_energy_batch` call at the end.
+
+A point's score is the pipeline's (`static_pipeline.score_and_grade`) over
+the same findings – risky patterns, smells, secrets (capped as in
+`scan_for_secrets`) and the repo-level `code_stats` warnings – so the last
+point matches a full analysis of that commit.
+
+    SYPEC_TREND_CHUNK   commits whose new blobs are analysed together (default 256)
+"""
+from __future__ import annotations
+
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..metrics import count_cache
+from . import loc
+from .code_stats import DOC_EXTS, repo_warnings
+from .digest import DEFAULT_DENY_DIRS
+from .energy_model import DEFAULT_USERS, REFERENCE_KWH_PER_HOUR, estimate_energy_batch
+from .file_index import FileEntry
+from .file_records import FileRecord, RecordStore, record_key
+from .git_tree import CatFile, TreeFilter, _git, _is_partial, list_tree
+from .hardware_profiles import get_live_profile
+from .language_detector import _EXT2LANG
+from .parallel import analyze_many
+from .secrets_scanner import MAX_SECRETS
+from .static_pipeline import score_and_grade
+
+logger = logging.getLogger(__name__)
+
+WALK_CHUNK = int(os.getenv("SYPEC_TREND_CHUNK", "256"))
+
+_GITLINK = "160000"              # submodule entries are not files
+
+# (path, new blob SHA – None when the path is gone)
+Change = Tuple[str, Optional[str]]
+# (commit SHA, commit time, changes against its first parent)
+Commit = Tuple[str, float, List[Change]]
+
+
+def log_changes(git_dir: Path, head: str, count: int) -> List[Commit]:
+    """The last *count* first-parent commits up to *head*, oldest first, with their changes."""
+    out = _git(
+        git_dir, "log", "--first-parent", "--diff-merges=first-parent", f"--max-count={count}",
+        "--reverse", "--raw", "-z", "--no-renames", "--no-abbrev", "--format=%x01%H %ct", head,
+    )
+    tokens = out.decode("utf-8", "surrogateescape").split("\0")
+    commits: List[Commit] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i].lstrip("\n")
+        if token.startswith("\x01"):
+            sha, ts = token[1:].split()
+            commits.append((sha, float(ts), []))
+        elif token.startswith(":"):
+            _, new_mode, _, new_sha, _ = token[1:].split()
+            i += 1
+            gone = new_mode == _GITLINK or not new_sha.strip("0")
+            commits[-1][2].append((tokens[i], None if gone else new_sha))
+        i += 1
+    return commits
+
+
+def contribution(path: str, record: FileRecord) -> Dict[str, int]:
+    """What one file adds to the running totals of a commit."""
+    ext = os.path.splitext(path)[1]
+    out = {"files": 1, "loc": record["loc"]}
+    for key in ("security", "smells", "secrets"):
+        if record.get(key):
+            out[key] = len(record[key])
+    if record.get("tests"):
+        out["test_files"], out["test_functions"] = 1, record["tests"]
+    for api in record.get("apis") or ():
+        out["api:" + api] = 1
+    lang = _EXT2LANG.get(ext.lower())
+    if lang:
+        out["lang:" + lang] = 1
+    if ext.lower() == ".py" and record.get("loc_status") != loc.ESTIMATED:
+        out["py_files"] = 1                   # test coverage: any case, read files only
+    if ext == ".py":
+        out["py_exact"] = 1                   # code stats: exact extension
+    if ext in DOC_EXTS:
+        out["docs"] = 1
+    low = path.lower()
+    for needle in ("android", "dockerfile"):   # `purpose.infer_deployment_context`
+        if needle in low:
+            out[needle] = 1
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────────
+class CommitWalk:
+    """One walk over the history of a (bare) repository; `run` it once."""
+
+    def __init__(
+            self,
+            git_dir: Path,
+            store: Optional[RecordStore] = None,
+            workers: Optional[int] = None,
+            deny_dirs: Optional[Iterable[str]] = None,
+            chunk: int = WALK_CHUNK,
+    ) -> None:
+        self.git_dir = Path(git_dir)
+        self.store = store
+        self.workers = workers
+        self.chunk = max(1, chunk)
+        self.rules = TreeFilter(DEFAULT_DENY_DIRS if deny_dirs is None else deny_dirs)
+        self.tree: Dict[str, str] = {}            # every blob path → SHA
+        self.included: Dict[str, str] = {}        # paths that pass the filter → SHA
+        self.sizes: Dict[str, Optional[int]] = {}
+        self.missing: Set[str] = set()            # partial clone: blobs never fetched
+        self.records: Dict[str, FileRecord] = {}  # record key → record, for this walk
+        self.keys: Dict[str, str] = {}            # applied path → record key
+        self._blob_keys: Dict[Tuple[str, str], str] = {}   # (suffix, SHA) → record key
+        self.totals: Counter = Counter()
+        self.analysed = 0
+        self._cat: Optional[CatFile] = None
+
+    # ── public ────────────────────────────────────────────────────────
+    def run(
+            self,
+            head: str,
+            count: int,
+            on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        One point per commit of the last *count* first-parent commits up to
+        *head*, oldest first (see `point`); *on_progress(done, total)* after
+        every chunk.
+        """
+        commits = log_changes(self.git_dir, head, count)
+        if not commits:
+            return []
+        self._cat = CatFile(self.git_dir)
+        try:
+            if _is_partial(self.git_dir):
+                listing = _git(
+                    self.git_dir, "rev-list", "--objects", "--missing=print", "--first-parent",
+                    f"--max-count={count}", head,
+                )
+                self.missing = {line[1:] for line in listing.decode().splitlines() if line.startswith("?")}
+
+            # the oldest commit: its full tree
+            listing = list_tree(self.git_dir, commits[0][0])
+            self.sizes.update((sha, size) for _, sha, size in listing)
+            self.tree = {path: sha for path, sha, _ in listing}
+            self.rules.load(listing, self._cat)
+            self.included = {p: s for p, s in self.tree.items() if self.rules.allows(p)}
+            first = list(self.included.items())
+
+            points: List[Dict[str, Any]] = []
+            for start in range(0, len(commits), self.chunk):
+                batch = commits[start:start + self.chunk]
+                steps = [
+                    first if start + i == 0 else self._advance(changes)
+                    for i, (_, _, changes) in enumerate(batch)
+                ]
+                self._ensure_records([change for step in steps for change in step])
+                for (sha, ts, changes), step in zip(batch, steps):
+                    self._apply(step)
+                    points.append(self.point(sha, ts, len(changes)))
+                if on_progress is not None:
+                    on_progress(len(points), len(commits))
+            self._add_energy(points)
+            return points
+        finally:
+            self._cat.close()
+
+    def point(self, sha: str, ts: float, changed: int) -> Dict[str, Any]:
+        """Score, LOC, findings and energy inputs of the current totals (``kwh`` added later)."""
+        t = self.totals
+        code = repo_warnings(t["loc"], t["docs"] > 0, t["py_exact"])
+        secrets = min(t["secrets"], MAX_SECRETS)
+        warnings = t["security"] + len(code) + t["smells"] + secrets
+        score, grade = score_and_grade(warnings)
+        languages = {k[5:]: v for k, v in t.items() if k.startswith("lang:") and v > 0}
+        apis = sorted(k[4:] for k, v in t.items() if k.startswith("api:") and v > 0)
+        context = "mobile" if t["android"] else "cloud" if t["dockerfile"] else "desktop"
+        return {
+            "commit": sha,
+            "committed_at": datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds"),
+            "changed_files": changed,
+            "score": score,
+            "grade": grade,
+            "loc": t["loc"],
+            "files": t["files"],
+            "warnings": warnings,
+            "findings": {
+                "security": t["security"],
+                "smells": t["smells"],
+                "secrets": secrets,
+                "repo": len(code),
+            },
+            "apis": apis,
+            "languages": languages,
+            "test_coverage": {                    # as `test_coverage.estimate_test_coverage`
+                "test_files": t["test_files"],
+                "test_functions": t["test_functions"],
+                "total_py": t["py_files"],
+                "coverage_percent": round(t["test_files"] / t["py_files"] * 100, 1) if t["py_files"] else 0,
+            },
+            "context": context,
+        }
+
+    # ── steps ─────────────────────────────────────────────────────────
+    def _advance(self, changes: List[Change]) -> List[Change]:
+        """Move the tree by one commit; return the changes to the analysed file set."""
+        ignores = []
+        for path, sha in changes:
+            if sha is None:
+                self.tree.pop(path, None)
+            else:
+                self.tree[path] = sha
+            if TreeFilter.is_gitignore(path):
+                ignores.append((path, sha))
+
+        step: List[Change] = []
+        if ignores:
+            # new rules may include or exclude any path: re-filter the whole tree
+            for path, sha in ignores:
+                self.rules.set_gitignore(path, None if sha is None else self._lines(sha))
+            wanted = {p: s for p, s in self.tree.items() if self.rules.allows(p)}
+            step = [(p, None) for p in self.included if p not in wanted]
+            step += [(p, s) for p, s in wanted.items() if self.included.get(p) != s]
+            self.included = wanted
+            return step
+
+        for path, sha in changes:
+            if sha is not None and self.rules.allows(path):
+                if self.included.get(path) != sha:
+                    self.included[path] = sha
+                    step.append((path, sha))
+            elif self.included.pop(path, None) is not None:
+                step.append((path, None))
+        return step
+
+    def _apply(self, step: List[Change]) -> None:
+        for path, sha in step:
+            old = self.keys.pop(path, None)
+            if old is not None:
+                self.totals.subtract(contribution(path, self.records[old]))
+            if sha is not None:
+                key = self._key(path, sha)
+                self.keys[path] = key
+                self.totals.update(contribution(path, self.records[key]))
+
+    # ── records ───────────────────────────────────────────────────────
+    def _entry(self, path: str, sha: str) -> FileEntry:
+        size = self.sizes.get(sha)
+        entry = FileEntry(
+            path,
+            None,
+            size or 0,
+            reader=lambda e: self._cat.read(e.blob_sha),
+            blob_sha=sha,
+            missing=size is None,                      # never fetched ⇒ skipped unread
+        )
+        entry.language = _EXT2LANG.get(entry.suffix)
+        return entry
+
+    def _key(self, path: str, sha: str) -> str:
+        # the key depends on the extension and the blob only
+        suffix = os.path.splitext(path)[1].lower()
+        key = self._blob_keys.get((suffix, sha))
+        if key is None:
+            key = self._blob_keys[suffix, sha] = record_key(self._entry(path, sha))
+        return key
+
+    def _ensure_records(self, changes: List[Change]) -> None:
+        """Records for every blob of *changes*: from this walk, the store, or analysed now."""
+        self._size_blobs({sha for _, sha in changes if sha is not None})
+        todo: Dict[str, FileEntry] = {}
+        for path, sha in changes:
+            if sha is None:
+                continue
+            key = self._key(path, sha)
+            if key not in self.records and key not in todo:
+                todo[key] = self._entry(path, sha)
+        if not todo:
+            return
+        if self.store is not None:
+            found = self.store.get_many(list(todo))
+            self.records.update(found)
+            todo = {k: e for k, e in todo.items() if k not in found}
+
+        # `analyze_many` keys by path: one round per repeat of a path
+        rounds: List[Dict[str, Tuple[str, FileEntry]]] = []
+        for key, entry in todo.items():
+            for batch in rounds:
+                if entry.path not in batch:
+                    batch[entry.path] = (key, entry)
+                    break
+            else:
+                rounds.append({entry.path: (key, entry)})
+        fresh: List[Tuple[str, FileRecord]] = []
+        for batch in rounds:
+            analysed = analyze_many([e for _, e in batch.values()], self.git_dir, self.workers)
+            fresh += [(key, analysed[path]) for path, (key, _) in batch.items()]
+        self.records.update(fresh)
+        if self.store is not None:
+            self.store.put_many(fresh)
+        self.analysed += len(fresh)
+        count_cache("file_records", hits=len(changes) - len(fresh), misses=len(fresh))
+
+    def _size_blobs(self, shas: Set[str]) -> None:
+        unknown = sorted(s for s in shas if s not in self.sizes and s not in self.missing)
+        if unknown:
+            out = _git(self.git_dir, "cat-file", "--batch-check", stdin="\n".join(unknown).encode() + b"\n")
+            for line in out.decode().splitlines():
+                parts = line.split()
+                if len(parts) == 3:
+                    self.sizes[parts[0]] = int(parts[2])
+
+    def _lines(self, sha: str) -> Optional[List[str]]:
+        try:
+            return self._cat.read(sha).decode("utf-8", errors="ignore").splitlines()
+        except OSError:
+            return None
+
+    # ── energy ────────────────────────────────────────────────────────
+    def _add_energy(self, points: List[Dict[str, Any]]) -> None:
+        """``kwh`` of every point from one vectorised evaluation of the energy model."""
+        if not points:
+            return
+        draw = {ctx: (get_live_profile(ctx) or {}).get("kwh_per_hour") or REFERENCE_KWH_PER_HOUR
+                for ctx in {p["context"] for p in points}}
+        curves = estimate_energy_batch(
+            [p["loc"] for p in points],
+            apis=[len(p["apis"]) for p in points],
+            client_heavy=["typescript" in p["languages"] for p in points],
+            kwh_per_hour=[draw[p["context"]] for p in points],
+            users=DEFAULT_USERS,
+        )
+        for p, curve in zip(points, curves):
+            p["kwh"] = {str(int(u)): round(float(v), 2) for u, v in zip(DEFAULT_USERS, curve)}
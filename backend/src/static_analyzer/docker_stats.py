@@ -1,24 +1,21 @@
 # backend/src/static_analyzer/docker_stats.py
-import os
-from typing import Dict
+from pathlib import Path
+from typing import Dict, Union
 
-def estimate_docker_usage(repo_path: str) -> Dict[str, float]:
-    dockerfile_path = os.path.join(repo_path, "Dockerfile")
-    if not os.path.isfile(dockerfile_path):
+from .file_index import FileIndex, ensure_index
+
+def estimate_docker_usage(repo_path: Union[FileIndex, str, Path]) -> Dict[str, float]:
+    dockerfile = ensure_index(repo_path).get("Dockerfile")
+    if dockerfile is None:
         return {"estimated_ram_mb": 256, "estimated_disk_mb": 100}
 
     ram = 256
     disk = 100
 
-    try:
-        with open(dockerfile_path, "r") as f:
-            lines = f.readlines()
-            for line in lines:
-                if "apt-get install" in line or "RUN" in line:
-                    disk += 50
-                if "python" in line or "pip install" in line:
-                    ram += 128
-    except Exception:
-        pass
+    for line in dockerfile.lines():
+        if "apt-get install" in line or "RUN" in line:
+            disk += 50
+        if "python" in line or "pip install" in line:
+            ram += 128
 
     return {"estimated_ram_mb": ram, "estimated_disk_mb": disk}
@@ -1,27 +1,156 @@
-# add at top
-from .hardware_profiles import get_live_profile
+# backend/src/static_analyzer/energy_model.py
+"""
+Energy model – kWh per *day* as a function of active users.
 
-# ...
-def estimate_energy(                     #  ←-- new signature
+    kWh/day(u) = LOC / 10 000 · α · (kWh/h of the target ÷ REFERENCE_KWH_PER_HOUR)
+                 · u^β · (1 + client · [client heavy] + api · #APIs)
+
+with the heuristic coefficients α = 0.2, β = 0.75, client = 0.15 and
+api = 0.08.  The hardware profile's draw scales the curve relative to the
+bundled desktop snapshot (0.098 kWh/h), so a desktop target keeps the
+historical numbers, while cloud (0.4) and mobile (0.035) targets move.
+
+Everything is evaluated with numpy over arbitrary user grids:
+
+• `energy_curve` – one repo (or a column of repos) over any grid
+• `estimate_energy_batch` – many repos at once, a ``repos × users`` array
+  for batch and fleet reports
+• `energy_bands` – the coefficients are guesses, so this draws them from
+  priors around their point values (seeded Monte Carlo) and returns
+  percentile bands and the standard deviation per user count
+
+    SYPEC_ENERGY_USERS     default user grid         (default 10,100,1000,10000)
+    SYPEC_ENERGY_SAMPLES   Monte Carlo draws         (default 2000)
+"""
+from __future__ import annotations
+
+import os
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+DEFAULT_USERS = tuple(int(u) for u in os.getenv("SYPEC_ENERGY_USERS", "10,100,1000,10000").split(","))
+MC_SAMPLES = int(os.getenv("SYPEC_ENERGY_SAMPLES", "2000"))
+
+ALPHA = 0.2                      # kWh/day per 10 000 LOC at one user
+BETA = 0.75                      # sub-linear scaling with users
+CLIENT_HEAVY = 0.15              # SPAs, WASM, …
+PER_API = 0.08                   # per external API
+REFERENCE_KWH_PER_HOUR = 0.098   # bundled desktop snapshot – the curve's calibration point
+
+# Monte Carlo priors: log-normal σ (relative spread) for the multiplicative
+# coefficients, normal σ (absolute) for the exponent
+PRIORS = {"alpha": 0.35, "beta": 0.05, "client": 0.5, "api": 0.5, "hardware": 0.2}
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def _users(users: Optional[Iterable[int]]) -> np.ndarray:
+    grid = np.asarray(DEFAULT_USERS if users is None else list(users), dtype=np.float64)
+    if grid.ndim != 1 or (grid < 0).any():
+        raise ValueError("users must be a flat grid of non-negative counts")
+    return grid
+
+
+def energy_curve(
+        loc: ArrayLike,
+        users: Optional[Iterable[int]] = None,
+        *,
+        apis: ArrayLike = 0,
+        client_heavy: ArrayLike = False,
+        kwh_per_hour: ArrayLike = REFERENCE_KWH_PER_HOUR,
+        alpha: ArrayLike = ALPHA,
+        beta: ArrayLike = BETA,
+        client: ArrayLike = CLIENT_HEAVY,
+        per_api: ArrayLike = PER_API,
+) -> np.ndarray:
+    """
+    kWh/day over *users*.  Scalars give a 1-D curve; 1-D arguments (one value
+    per repo or per Monte Carlo draw) broadcast to ``len(arg) × len(users)``.
+    """
+    grid = _users(users)
+    col = lambda v: np.asarray(v, dtype=np.float64)[..., None]   # noqa: E731 – broadcast over the grid
+    base = col(loc) / 10_000 * col(alpha) * col(kwh_per_hour) / REFERENCE_KWH_PER_HOUR
+    multiplier = 1.0 + col(client) * col(client_heavy) + col(per_api) * col(apis)
+    return base * grid ** col(beta) * multiplier
+
+
+def estimate_energy_batch(
+        loc: ArrayLike,
+        apis: ArrayLike = 0,
+        client_heavy: ArrayLike = False,
+        kwh_per_hour: ArrayLike = REFERENCE_KWH_PER_HOUR,
+        users: Optional[Iterable[int]] = None,
+) -> np.ndarray:
+    """``repos × users`` kWh/day for many repos in one evaluation (per-repo arrays)."""
+    loc = np.atleast_1d(np.asarray(loc, dtype=np.float64))
+    return energy_curve(loc, users, apis=apis, client_heavy=client_heavy, kwh_per_hour=kwh_per_hour)
+
+
+def estimate_energy(
         code_stats: dict,
         docker_stats: dict,
         profile_hint: str,
         api_list: list[str] | None = None,
         client_heavy: bool = False,
+        hardware: Optional[Mapping] = None,
+        users: Optional[Iterable[int]] = None,
 ) -> dict[int, float]:
     """
-    Return kWh / *day* at 10 · 100 · 1 000 · 10 000 users
+    Return kWh / *day* per user count of *users* (default grid 10 · 100 ·
+    1 000 · 10 000), for the target *hardware* profile (default: the desktop
+    reference).
+    """
+    grid = _users(users)
+    curve = energy_curve(
+        code_stats["loc"],
+        grid,
+        apis=len(api_list or ()),
+        client_heavy=client_heavy,
+        kwh_per_hour=_kwh_per_hour(hardware),
+    )
+    return {int(u): round(float(e), 2) for u, e in zip(grid, curve)}
+
 
-    We now:
-    • add +15 % if client_heavy (SPAs, WASM, …)
-    • add +8 % per external API in *api_list*
+def energy_bands(
+        code_stats: dict,
+        api_list: list[str] | None = None,
+        client_heavy: bool = False,
+        hardware: Optional[Mapping] = None,
+        users: Optional[Iterable[int]] = None,
+        samples: int = MC_SAMPLES,
+        seed: int = 0,
+        percentiles: Sequence[float] = (5, 50, 95),
+) -> Dict[str, list]:
+    """
+    Monte Carlo uncertainty of the curve: every coefficient drawn from its
+    prior (`PRIORS`), *samples* curves evaluated in one go.  Returns
+    ``{"users", "mean", "stdev", "p5", "p50", "p95"}`` as lists over the grid.
     """
-    base = code_stats["loc"] / 10_000 * 0.2  # (trivial heuristic)
+    grid = _users(users)
+    rng = np.random.default_rng(seed)
+    lognormal = lambda point, sigma: point * rng.lognormal(-sigma ** 2 / 2, sigma, samples)   # noqa: E731 – mean-preserving
+    draws = energy_curve(
+        np.full(samples, float(code_stats["loc"])),
+        grid,
+        apis=len(api_list or ()),
+        client_heavy=client_heavy,
+        kwh_per_hour=lognormal(_kwh_per_hour(hardware), PRIORS["hardware"]),
+        alpha=lognormal(ALPHA, PRIORS["alpha"]),
+        beta=rng.normal(BETA, PRIORS["beta"], samples),
+        client=lognormal(CLIENT_HEAVY, PRIORS["client"]),
+        per_api=lognormal(PER_API, PRIORS["api"]),
+    )
+    bands: Dict[str, list] = {
+        "users": [int(u) for u in grid],
+        "mean": np.round(draws.mean(axis=0), 2).tolist(),
+        "stdev": np.round(draws.std(axis=0), 2).tolist(),
+    }
+    for p, row in zip(percentiles, np.percentile(draws, percentiles, axis=0)):
+        bands[f"p{p:g}"] = np.round(row, 2).tolist()
+    return bands
 
-    multiplier = 1.0
-    if client_heavy:
-        multiplier += 0.15
-    if api_list:
-        multiplier += 0.08 * len(api_list)
 
-    return {u: round(base * (u ** 0.75) * multiplier, 2) for u in (10, 100, 1000, 10000)}
+def _kwh_per_hour(hardware: Optional[Mapping]) -> float:
+    value = (hardware or {}).get("kwh_per_hour")
+    return float(value) if value else REFERENCE_KWH_PER_HOUR
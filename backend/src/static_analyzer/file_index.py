@@ -0,0 +1,243 @@
+# backend/src/static_analyzer/file_index.py
+"""
+Shared file index – one walk, one stat, one read per file.
+
+`build_file_index` walks the checkout exactly once and records, for every
+file, its repo-relative path, size, extension and language.  Contents are
+loaded lazily on first access and cached, so every analyser in the pipeline
+can share the same index instead of re-walking and re-reading the tree:
+
+    index = build_file_index(repo_path)
+    digest = get_repo_digest(index)
+    secrets = scan_for_secrets(index)
+
+All analysers still accept a plain path for ad-hoc use; `ensure_index` turns
+it into a fresh index.  Entries may also be virtual (no file on disk, see
+`git_tree`): they then carry a *reader* that fetches their bytes.
+
+Blobs above SYPEC_MAX_BLOB_BYTES (default 1 MiB) or with a binary extension
+are never read – they appear in the index with their size, but empty
+contents – whichever way the index was built.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .loc import LocCount
+
+logger = logging.getLogger(__name__)
+
+MAX_BLOB_BYTES = int(os.getenv("SYPEC_MAX_BLOB_BYTES", str(1024 * 1024)))
+
+# never worth reading for any analyser
+BINARY_EXTS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tif", ".tiff",
+    ".pdf", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war",
+    ".whl", ".so", ".dll", ".dylib", ".exe", ".bin", ".o", ".a", ".class",
+    ".pyc", ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp3", ".mp4", ".mov",
+    ".avi", ".wav", ".ogg", ".psd", ".sqlite", ".db", ".npy", ".pt", ".onnx",
+})
+
+
+class FileEntry:
+    """One file of the index.  Contents are read on demand and cached."""
+
+    __slots__ = (
+        "path", "abs_path", "size", "ext", "language", "blob_sha", "missing", "read_failed",
+        "_reader", "_data", "_text", "_loc",
+    )
+
+    def __init__(
+            self,
+            path: str,
+            abs_path: Optional[Path],
+            size: int,
+            language: Optional[str] = None,
+            reader: Optional[Callable[["FileEntry"], bytes]] = None,
+            blob_sha: Optional[str] = None,
+            missing: bool = False,
+    ) -> None:
+        self.path = path                                 # posix, repo-relative
+        self.abs_path = abs_path
+        self.size = size
+        self.ext = os.path.splitext(path)[1]             # original case, "" if none
+        self.language = language
+        self.blob_sha = blob_sha                         # git object id, if known
+        self.missing = missing                           # blob not fetched (partial clone), size unknown
+        self.read_failed = False                         # read_bytes hit an OSError (contents b"")
+        self._reader = reader
+        self._data: Optional[bytes] = None
+        self._text: Optional[str] = None
+        self._loc: Optional["LocCount"] = None
+
+    # ------------------------------------------------------------------
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def suffix(self) -> str:
+        """Lower-cased extension, e.g. ``".py"``."""
+        return self.ext.lower()
+
+    @property
+    def skipped(self) -> bool:
+        """True for binary / oversized / unfetched files – decided without reading them."""
+        return self.missing or self.size > MAX_BLOB_BYTES or self.suffix in BINARY_EXTS
+
+    def read_bytes(self) -> bytes:
+        if self._data is None:
+            if self.skipped:
+                self._data = b""
+                return self._data
+            try:
+                if self._reader is not None:
+                    self._data = self._reader(self)
+                else:
+                    with open(self.abs_path, "rb") as fh:
+                        self._data = fh.read()
+            except OSError as exc:
+                logger.warning("Failed to read %s: %s", self.path, exc)
+                self.read_failed = True
+                self._data = b""
+        return self._data
+
+    def read_text(self) -> str:
+        if self._text is None:
+            self._text = self.read_bytes().decode("utf-8", errors="ignore")
+        return self._text
+
+    def lines(self) -> List[str]:
+        """Lines with their terminators – same shape as ``readlines()``."""
+        return self.read_text().splitlines(keepends=True)
+
+    @property
+    def loc_count(self) -> "LocCount":
+        """Lines (plus status, blank / comment lines) – see `loc.count_entry`."""
+        if self._loc is None:
+            from .loc import count_entry
+
+            self._loc = count_entry(self)
+        return self._loc
+
+    @property
+    def loc(self) -> int:
+        return self.loc_count.lines
+
+    def release(self) -> None:
+        """Drop cached contents (LOC is kept)."""
+        self._data = None
+        self._text = None
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"FileEntry({self.path!r}, size={self.size})"
+
+
+class FileIndex:
+    """Ordered collection of `FileEntry` objects for one analysed tree."""
+
+    def __init__(
+            self,
+            root: Path,
+            entries: Iterable[FileEntry],
+            name: Optional[str] = None,
+            on_close: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.root = Path(root)
+        self.name = name or self.root.name             # shown in reports
+        self.entries: List[FileEntry] = sorted(entries, key=lambda e: e.path)
+        self._by_path: Dict[str, FileEntry] = {e.path: e for e in self.entries}
+        self._on_close = on_close
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, path: str) -> Optional[FileEntry]:
+        return self._by_path.get(path)
+
+    def with_suffix(self, *suffixes: str) -> Iterator[FileEntry]:
+        """Entries whose lower-cased extension is one of *suffixes*."""
+        wanted = {s.lower() for s in suffixes}
+        return (e for e in self.entries if e.suffix in wanted)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(e.size for e in self.entries)
+
+    def release(self) -> None:
+        """Free all cached file contents once the analysis is done."""
+        for e in self.entries:
+            e.release()
+
+    def close(self) -> None:
+        """`release` plus shutting down whatever feeds virtual entries."""
+        self.release()
+        if self._on_close is not None:
+            self._on_close()
+            self._on_close = None
+
+
+# ──────────────────────────────────────────────────────────────────────────
+def build_file_index(
+        repo_path: Union[str, Path],
+        deny_dirs: Optional[Iterable[str]] = None,
+) -> FileIndex:
+    """
+    Walk *repo_path* once and return the shared index (contents not read yet).
+
+    Walking goes through `digest.walk_repo`, so denied directories and
+    anything matched by (nested) .gitignore files are pruned up-front.
+    """
+    from .digest import walk_repo
+    from .language_detector import _EXT2LANG
+
+    root = Path(repo_path)
+    if not root.exists():
+        logger.error("Provided path does not exist: %s", root)
+        raise FileNotFoundError(f"Invalid repo path: {root}")
+
+    entries: List[FileEntry] = []
+    for rel, de in walk_repo(root, deny_dirs):
+        try:
+            size = de.stat().st_size
+        except OSError:
+            continue
+        entry = FileEntry(rel, Path(de.path), size)
+        entry.language = _EXT2LANG.get(entry.suffix)
+        entries.append(entry)
+
+    index = FileIndex(root, entries)
+    logger.debug("File index built: %s files, %s bytes", len(index), index.total_bytes)
+    return index
+
+
+def iter_file_results(
+        index: FileIndex,
+        records: Optional[Dict[str, Dict[str, Any]]],
+        key: str,
+        scan: Callable[[FileEntry], Any],
+) -> Iterator[Tuple[FileEntry, Any]]:
+    """
+    Yield ``(entry, result)`` for every file with a non-empty per-file result.
+
+    Results come from pre-computed *records* (see `file_records`) when given,
+    otherwise *scan* runs on the spot.
+    """
+    for entry in index:
+        value = records[entry.path].get(key) if records is not None else scan(entry)
+        if value:
+            yield entry, value
+
+
+def ensure_index(source: Union[FileIndex, str, Path]) -> FileIndex:
+    """Return *source* if it already is an index, otherwise build one."""
+    if isinstance(source, FileIndex):
+        return source
+    return build_file_index(source)
@@ -0,0 +1,278 @@
+# backend/src/static_analyzer/file_records.py
+"""
+Per-file analysis records with a content-addressed, incremental cache.
+
+Every per-file analyser (LOC, security patterns, secrets, API hits, smells, tests)
+writes into one small, path-independent record per file:
+
+    {"loc": 120, "security": [[4, "subprocess"]], "apis": ["aws"], …}
+
+(``loc_status`` is added for files whose lines were not counted, ``blank`` /
+``comment`` with SYPEC_LOC_CLASSIFY – see `loc`.)
+
+Records are stored in a local SQLite file keyed by
+
+    ANALYZER_VERSION : extension : git blob SHA
+
+so re-analysing a repo only runs the analysers on blobs that changed since
+any earlier analysis (of any repo); everything repo-level is rebuilt from
+the records.  Blob SHAs come from the git index of a clean checkout (no read
+needed); dirty or untracked files are hashed from their contents.
+
+    SYPEC_FILE_CACHE        "0" disables the store   (default on)
+    SYPEC_FILE_CACHE_PATH   SQLite file              (default data/cache/file_records.sqlite)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..metrics import count_cache
+from . import api_usage, code_smells, loc, py_ast, secrets_scanner, security, test_coverage
+from .file_index import FileEntry, FileIndex
+from .rules import default_engine, hits_by_family
+
+if TYPE_CHECKING:
+    from .sampling import Budget
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever an analyser's output changes: cached results (per file and
+# per repo) keyed on an older version are then ignored.
+ANALYZER_VERSION = "1.6"
+
+STORE_PATH = Path(os.getenv("SYPEC_FILE_CACHE_PATH", "data/cache/file_records.sqlite"))
+STORE_ENABLED = os.getenv("SYPEC_FILE_CACHE", "1") != "0"
+
+FileRecord = Dict[str, Any]
+
+# rule family → (record key, hits → record value).  All families come out
+# of one `RuleEngine` pass; other (custom) families are stored as raw
+# ``[rule_id, line, column, value]`` rows under their family name.
+RULE_FAMILIES: Dict[str, Tuple[str, Callable[[List[Any]], Any]]] = {
+    "security": ("security", security.from_hits),
+    "secrets": ("secrets", secrets_scanner.from_hits),
+    "api": ("apis", api_usage.from_hits),
+}
+
+# record key → per-file pass that is not rule based; empty results are not stored.
+# For Python files that parse, the `py_ast` visitors provide these keys (and
+# replace the `py_ast.RULE_FAMILIES` rules) in one traversal instead.
+FILE_ANALYZERS: Dict[str, Callable[[FileEntry], Any]] = {
+    "smells": code_smells.scan_file,
+    "tests": test_coverage.scan_file,
+}
+
+
+def analyze_file(entry: FileEntry) -> FileRecord:
+    """Run every per-file analyser on *entry* and return its record."""
+    lines = entry.loc_count
+    record: FileRecord = {"loc": lines.lines}
+    if lines.status != loc.COUNTED:
+        record["loc_status"] = lines.status
+    if lines.blank is not None:
+        record["blank"], record["comment"] = lines.blank, lines.comment
+    engine = default_engine()
+    parsed = py_ast.analyze(entry)                       # None unless parseable Python
+    if parsed is None:
+        hits = engine.scan(entry)
+    else:
+        rest = engine.families - py_ast.RULE_FAMILIES    # secrets, custom rule sets
+        hits = engine.scan(entry, families=rest) if rest else []
+    for family, hits in hits_by_family(hits).items():
+        if family in RULE_FAMILIES:
+            key, convert = RULE_FAMILIES[family]
+            record[key] = convert(hits)
+        else:
+            record[family] = [[h.rule_id, h.line, h.column, h.value] for h in hits]
+    for key, value in (parsed or {}).items():
+        if value:
+            record[key] = value
+    for key, scan in FILE_ANALYZERS.items():
+        if parsed is not None and key in parsed:
+            continue
+        value = scan(entry)
+        if value:
+            record[key] = value
+    return record
+
+
+def warm() -> None:
+    """
+    Build what `analyze_file` otherwise builds on first use – the rule engine
+    and its prefilters for every known extension, the Python visitor tables.
+    """
+    from .language_detector import _EXT2LANG
+
+    engine = default_engine()
+    suffixes = {"", *_EXT2LANG, *(s for r in engine.rules for s in r.suffixes)}
+    engine.warm(suffixes, ((), engine.families - py_ast.RULE_FAMILIES))
+    py_ast.warm()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+class RecordStore:
+    """Tiny key → JSON store on SQLite, safe to share between threads."""
+
+    def __init__(self, path: Path = STORE_PATH) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS records (key TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str], batch: int = 500) -> Dict[str, FileRecord]:
+        keys = list(keys)
+        found: Dict[str, FileRecord] = {}
+        with self._lock:
+            for i in range(0, len(keys), batch):
+                chunk = keys[i:i + batch]
+                rows = self._conn.execute(
+                    f"SELECT key, payload FROM records WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update((k, json.loads(p)) for k, p in rows)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, FileRecord]]) -> None:
+        rows = [(k, json.dumps(v, separators=(",", ":"))) for k, v in items]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO records (key, payload) VALUES (?, ?)", rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[RecordStore] = None
+_store_lock = threading.Lock()
+
+
+def default_store() -> Optional[RecordStore]:
+    """Process-wide store, opened on first use (None when disabled)."""
+    global _store
+    if not STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = RecordStore()
+            except sqlite3.Error as exc:
+                logger.warning("File record store unavailable: %s", exc)
+                return None
+        return _store
+
+
+# ──────────────────────────────────────────────────────────────────────────
+def _git(root: Path, *args: str) -> Optional[bytes]:
+    try:
+        return subprocess.run(
+            ["git", "-C", str(root), *args], capture_output=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def attach_blob_shas(index: FileIndex) -> None:
+    """
+    Fill `FileEntry.blob_sha` from the git index of a checkout – no file reads.
+
+    Files that differ from the index (per git's stat cache) are left alone
+    and get hashed from their contents later.
+    """
+    if not (index.root / ".git").exists():
+        return
+    staged = _git(index.root, "ls-files", "-s", "-z")
+    if staged is None:
+        return
+    dirty = set(
+        (_git(index.root, "diff-files", "--name-only", "-z") or b"")
+        .decode("utf-8", errors="surrogateescape").split("\0")
+    )
+
+    shas: Dict[str, str] = {}
+    for item in staged.decode("utf-8", errors="surrogateescape").split("\0"):
+        meta, _, path = item.partition("\t")
+        if path and path not in dirty:
+            shas[path] = meta.split()[1]
+    for entry in index:
+        if entry.blob_sha is None:
+            entry.blob_sha = shas.get(entry.path)
+
+
+def blob_sha(entry: FileEntry) -> str:
+    """git's object id for *entry* – from the index if known, else hashed."""
+    if entry.blob_sha is None:
+        data = entry.read_bytes()
+        entry.blob_sha = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+    return entry.blob_sha
+
+
+def record_key(entry: FileEntry) -> str:
+    # the extension decides which analysers apply and custom rule sets change
+    # the results, so both are part of the key; a blob a partial clone never
+    # fetched gets its own key ("?", as in rev-list) so its empty record never
+    # stands in for the real one
+    missing = "?" if entry.missing else ""
+    return f"{ANALYZER_VERSION}:{default_engine().fingerprint}:{loc.FINGERPRINT}:{entry.suffix}:{blob_sha(entry)}{missing}"
+
+
+def collect_records(
+        index: FileIndex,
+        store: Optional[RecordStore] = None,
+        workers: Optional[int] = None,
+        budget: Optional[Budget] = None,
+) -> Dict[str, FileRecord]:
+    """
+    Return ``{path: record}`` for every file of *index*.
+
+    Records found in *store* are reused; only the remaining files are read
+    and analysed – on the process pool for large batches (see `parallel`,
+    *workers* overrides SYPEC_SCAN_WORKERS) – and their fresh records are
+    written back in one batch.  With a *budget* only the stratified sample
+    of the remaining files that fits it is analysed, and files left out have
+    no record (see `sampling`).
+    """
+    from .parallel import analyze_many
+    from .sampling import analyze_within
+
+    def analyze(entries: List[FileEntry]) -> Dict[str, FileRecord]:
+        if budget is None:
+            return analyze_many(entries, index.root, workers)
+        return analyze_within(entries, index.root, budget, workers)
+
+    if store is None:
+        return analyze(index.entries)
+
+    attach_blob_shas(index)
+    keys = {entry.path: record_key(entry) for entry in index}
+    cached = store.get_many(set(keys.values()))
+
+    # one analysis per distinct blob, even if the tree has duplicates
+    todo: Dict[str, FileEntry] = {}
+    for entry in index:
+        key = keys[entry.path]
+        if key not in cached and key not in todo:
+            todo[key] = entry
+    analysed = analyze(list(todo.values()))
+    fresh: List[Tuple[str, FileRecord]] = [
+        (key, analysed[e.path]) for key, e in todo.items() if e.path in analysed
+    ]
+    cached.update(fresh)
+
+    records = {entry.path: cached[keys[entry.path]] for entry in index if keys[entry.path] in cached}
+    store.put_many(fresh)
+    count_cache("file_records", hits=len(records) - len(fresh), misses=len(fresh))
+    logger.info("File records: %s reused, %s analysed", len(records) - len(fresh), len(fresh))
+    return records
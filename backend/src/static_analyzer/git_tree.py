@@ -0,0 +1,257 @@
+# backend/src/static_analyzer/git_tree.py
+"""
+Virtual tree: analyse a commit straight from the git object database.
+
+Instead of writing a checkout to disk only to read it back once, the file
+index is built from the commit's tree listing (paths, sizes, blob SHAs) and
+contents are streamed on demand through one persistent
+``git cat-file --batch`` process:
+
+    index = build_git_index(mirror_path, commit_sha)
+    result = run_static_pipeline(index)
+    index.close()
+
+Oversized and binary blobs are skipped on their size / extension before
+anything is read (`FileEntry.skipped`) – and in a partial clone the blobs
+the filter left out are never fetched (`FileEntry.missing`, loc status
+``not_fetched``).  Denied directories and .gitignore
+rules (read from the tree itself) apply exactly as in `digest.walk_repo`.
+"""
+from __future__ import annotations
+
+import logging
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pathspec
+
+from .digest import DEFAULT_DENY_DIRS, _is_ignored
+from .file_index import FileEntry, FileIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CatFile:
+    """One long-lived ``git cat-file --batch`` process (thread-safe)."""
+
+    def __init__(self, git_dir: Path) -> None:
+        self.git_dir = Path(git_dir)
+        self._proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=self.git_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._lock = threading.Lock()
+
+    def read(self, sha: str) -> bytes:
+        with self._lock:
+            self._proc.stdin.write(sha.encode() + b"\n")
+            self._proc.stdin.flush()
+            header = self._proc.stdout.readline().split()
+            if len(header) != 3:                         # "<sha> missing"
+                raise OSError(f"blob {sha} not available")
+            size = int(header[2])
+            data = self._proc.stdout.read(size)
+            self._proc.stdout.read(1)                    # trailing LF
+            return data
+
+    def close(self) -> None:
+        with self._lock:
+            if self._proc.poll() is None:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=10)
+
+
+def _git(git_dir: Path, *args: str, stdin: Optional[bytes] = None) -> bytes:
+    return subprocess.run(
+        ["git", *args], cwd=git_dir, input=stdin, capture_output=True, check=True
+    ).stdout
+
+
+def _is_partial(git_dir: Path) -> bool:
+    # older gits record the promisor in extensions.partialclone, newer ones
+    # only mark the remote (remote.<name>.promisor)
+    try:
+        return bool(_git(
+            git_dir, "config", "--get-regexp", r"^(extensions\.partialclone|remote\..*\.promisor)$",
+        ).strip())
+    except subprocess.CalledProcessError:
+        return False
+
+
+def list_tree(git_dir: Path, commit: str) -> List[Tuple[str, str, Optional[int]]]:
+    """
+    ``[(path, blob SHA, size), …]`` for every regular file in *commit*.
+
+    Size is None for blobs a partial clone never downloaded.  `ls-tree -l`
+    would lazily fetch those just to report their size, so partial clones
+    list the tree without sizes and ask `cat-file --batch-check` about the
+    blobs that are actually present.
+    """
+    if not _is_partial(git_dir):
+        files = []
+        for item in _git(git_dir, "ls-tree", "-r", "-l", "-z", commit).split(b"\0"):
+            meta, _, path = item.partition(b"\t")
+            if not path:
+                continue
+            _, kind, sha, size = meta.split()
+            if kind == b"blob":
+                files.append((path.decode("utf-8", "surrogateescape"), sha.decode(), int(size)))
+        return files
+
+    listing = _git(git_dir, "rev-list", "--objects", "--no-walk", "--missing=print", commit)
+    missing: Set[str] = {line[1:] for line in listing.decode().splitlines() if line.startswith("?")}
+
+    blobs: List[Tuple[str, str]] = []
+    for item in _git(git_dir, "ls-tree", "-r", "-z", commit).split(b"\0"):
+        meta, _, path = item.partition(b"\t")
+        if path and meta.split()[1] == b"blob":
+            blobs.append((path.decode("utf-8", "surrogateescape"), meta.split()[2].decode()))
+
+    present = sorted({sha for _, sha in blobs if sha not in missing})
+    sizes: Dict[str, int] = {}
+    if present:
+        out = _git(git_dir, "cat-file", "--batch-check", stdin="\n".join(present).encode() + b"\n")
+        for line in out.decode().splitlines():
+            parts = line.split()
+            if len(parts) == 3:
+                sizes[parts[0]] = int(parts[2])
+    return [(path, sha, sizes.get(sha)) for path, sha in blobs]
+
+
+def changed_files(git_dir: Path, base: str, head: str) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    ``[(status, path, old path), …]`` between two commits (tree diff, no
+    checkout).  Status is git's letter – A, M, D, T or R (renames detected,
+    with the old path set); old path is None otherwise.
+    """
+    out = _git(git_dir, "diff", "--name-status", "-z", "-M", base, head)
+    fields = out.decode("utf-8", "surrogateescape").split("\0")
+    changes: List[Tuple[str, str, Optional[str]]] = []
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i][0]
+        if status in "RC":
+            changes.append((status, fields[i + 2], fields[i + 1]))
+            i += 3
+        else:
+            changes.append((status, fields[i + 1], None))
+            i += 2
+    return changes
+
+
+class TreeFilter:
+    """
+    Deny-listed directories plus the tree's own .gitignore files, decided path
+    by path – the same rules `digest.walk_repo` applies to a checkout.
+    """
+
+    def __init__(self, deny_dirs: Iterable[str]) -> None:
+        self.deny = frozenset(deny_dirs)
+        self.specs: Dict[str, pathspec.PathSpec] = {}        # dir prefix ("" or "a/b/") → rules
+        self._dir_ok: Dict[str, bool] = {"": True}
+
+    @staticmethod
+    def is_gitignore(path: str) -> bool:
+        return path == ".gitignore" or path.endswith("/.gitignore")
+
+    def set_gitignore(self, path: str, lines: Optional[List[str]]) -> None:
+        """Install (or with None, drop) the rules of the .gitignore at *path*."""
+        prefix = path[: -len(".gitignore")]
+        if lines is None:
+            self.specs.pop(prefix, None)
+        else:
+            self.specs[prefix] = pathspec.PathSpec.from_lines("gitwildmatch", lines)
+        self._dir_ok = {"": True}
+
+    def load(self, files: Iterable[Tuple[str, str, Optional[int]]], cat: CatFile) -> "TreeFilter":
+        """Read every .gitignore of *files* (``(path, sha, size)``) that is present."""
+        for path, sha, size in files:
+            if self.is_gitignore(path) and size is not None:
+                try:
+                    lines = cat.read(sha).decode("utf-8", errors="ignore").splitlines()
+                except OSError:
+                    continue
+                self.set_gitignore(path, lines)
+        return self
+
+    def _rules_for(self, dir_prefix: str):
+        # ancestors root → leaf, e.g. "", "a/", "a/b/"
+        parts = dir_prefix.split("/")[:-1]
+        prefixes = [""] + ["/".join(parts[: i + 1]) + "/" for i in range(len(parts))]
+        return [(p, self.specs[p]) for p in prefixes if p in self.specs]
+
+    def _allowed_dir(self, prefix: str) -> bool:
+        if prefix not in self._dir_ok:
+            parent, _, name = prefix[:-1].rpartition("/")
+            parent = parent + "/" if parent else ""
+            self._dir_ok[prefix] = (
+                self._allowed_dir(parent)
+                and name not in self.deny
+                and not _is_ignored(self._rules_for(parent), prefix[:-1], True)
+            )
+        return self._dir_ok[prefix]
+
+    def allows(self, path: str) -> bool:
+        parent = path.rpartition("/")[0]
+        parent = parent + "/" if parent else ""
+        return self._allowed_dir(parent) and not _is_ignored(self._rules_for(parent), path, False)
+
+
+def _filter_ignored(
+        files: List[Tuple[str, str, Optional[int]]],
+        cat: CatFile,
+        deny_dirs: Iterable[str],
+) -> List[Tuple[str, str, Optional[int]]]:
+    """Apply the deny-list and the tree's own .gitignore files."""
+    rules = TreeFilter(deny_dirs).load(files, cat)
+    return [item for item in files if rules.allows(item[0])]
+
+
+def build_git_index(
+        git_dir: Path,
+        commit: str,
+        name: Optional[str] = None,
+        deny_dirs: Optional[Iterable[str]] = None,
+) -> FileIndex:
+    """
+    Build a `FileIndex` for *commit* of the (bare) repository *git_dir*.
+
+    Entries carry their blob SHA, so the per-file record cache hits without
+    reading anything.  Call `FileIndex.close()` to stop the cat-file process.
+    """
+    from .language_detector import _EXT2LANG
+
+    git_dir = Path(git_dir)
+    cat = CatFile(git_dir)
+    files = _filter_ignored(
+        list_tree(git_dir, commit), cat, DEFAULT_DENY_DIRS if deny_dirs is None else deny_dirs
+    )
+
+    def read_blob(entry: FileEntry) -> bytes:
+        return cat.read(entry.blob_sha)
+
+    entries = []
+    for path, sha, size in files:
+        # never downloaded (partial clone) ⇒ size unknown ⇒ skipped unread
+        entry = FileEntry(
+            path,
+            None,
+            size or 0,
+            reader=read_blob,
+            blob_sha=sha,
+            missing=size is None,
+        )
+        entry.language = _EXT2LANG.get(entry.suffix)
+        entries.append(entry)
+
+    index = FileIndex(git_dir, entries, name=name, on_close=cat.close)
+    logger.debug(
+        "Git index for %s: %s files (%s not read: binary/oversized/not fetched)",
+        commit[:12], len(index), sum(e.skipped for e in index),
+    )
+    return index
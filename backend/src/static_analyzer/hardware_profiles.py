@@ -1,24 +1,51 @@
 """
 Live-hardware profile helper.
 
-We pull the current Steam Hardware Survey JSON (public, no-auth) once a week
-and cache the parsed figures in /tmp so repeated analyses are instant.  You
-can extend `SOURCE_HANDLERS` with cloud-vendor endpoints later.
+We pull the current Steam Hardware Survey JSON (public, no-auth) and keep the
+parsed figures in memory (and on disk, so restarts are instant).  An analysis
+never waits on the network:
+
+• fresh profile in memory        → returned as is
+• stale profile (older than TTL) → returned as is, a background refresh starts
+• nothing yet                    → the bundled offline snapshot
+                                   (`hw_snapshot.json`), refresh in background;
+                                   a source without one gets the reference
+                                   (``steam_pc``) snapshot
+
+Failed refreshes are logged and retried after SYPEC_HW_RETRY_S at the
+earliest; the last good (or the bundled) profile stays in use.
+
+Sources are pluggable: `SOURCE_HANDLERS` maps a source name to a
+``(fetch, parse)`` pair – extend it with cloud-vendor endpoints via
+`register_source`.  With SYPEC_HW_FIXTURE_DIR set, every source is fetched
+from ``<dir>/<source>.json`` instead of the network (tests, air-gapped
+installs); SYPEC_HW_OFFLINE=1 disables refreshing altogether.
+
+    SYPEC_HW_CACHE_PATH    persisted profiles  (default data/cache/hw_profiles.json)
+    SYPEC_HW_TTL_H         refresh after       (default 168 = weekly)
+    SYPEC_HW_RETRY_S       back-off on errors  (default 300)
+    SYPEC_HW_FIXTURE_DIR   read sources from local JSON files
+    SYPEC_HW_OFFLINE       "1" = never refresh, snapshot / cached data only
 """
 from __future__ import annotations
 
 import json
 import logging
 import os
+import threading
 import time
-from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Literal, TypedDict
+from typing import Callable, Dict, Literal, Optional, Tuple, TypedDict
 
-import requests  # add to requirements.txt
+log = logging.getLogger(__name__)
 
-CACHE_PATH = Path("/tmp/sypec_hw_cache.json")
-CACHE_TTL = timedelta(days=7)  # refresh weekly
+CACHE_PATH = Path(os.getenv("SYPEC_HW_CACHE_PATH", "data/cache/hw_profiles.json"))
+CACHE_TTL = float(os.getenv("SYPEC_HW_TTL_H", str(7 * 24))) * 3600  # refresh weekly
+RETRY_AFTER = float(os.getenv("SYPEC_HW_RETRY_S", "300"))
+FIXTURE_DIR = os.getenv("SYPEC_HW_FIXTURE_DIR")
+OFFLINE = os.getenv("SYPEC_HW_OFFLINE", "0") == "1"
+SNAPSHOT_PATH = Path(__file__).with_name("hw_snapshot.json")
+REFERENCE_SOURCE = "steam_pc"      # snapshot for registered sources that have none bundled
 
 
 class HWProfile(TypedDict):
@@ -33,7 +60,9 @@ def _fetch_steam_survey() -> dict:
         "https://store.steampowered.com/hwsurvey/v1?device=pc"
         "&month=latest&format=json"
     )
-    logging.debug("Fetching Steam HW survey …")
+    import requests                    # only refreshes need it
+
+    log.debug("Fetching Steam HW survey …")
     resp = requests.get(url, timeout=20)
     resp.raise_for_status()
     return resp.json()
@@ -58,13 +87,8 @@ def _parse_steam(data: dict) -> HWProfile:
         # crude mapping: 1 GB RAM ≈ 0.003 kWh/h idle desktop
         ram_gb = float(ram_row["name"].split()[0])
     except Exception as exc:  # noqa: BLE001
-        logging.warning("Steam survey parse failed: %s", exc)
-        return {
-            "cpu": "unknown",
-            "gpu": "unknown",
-            "ram_gb": 8.0,
-            "kwh_per_hour": 0.1,
-        }
+        # keep serving the previous profile rather than caching a guess
+        raise ValueError(f"Steam survey parse failed: {exc}") from exc
     return {
         "cpu": cpu_row["name"],
         "gpu": gpu_row["name"],
@@ -73,47 +97,129 @@ def _parse_steam(data: dict) -> HWProfile:
     }
 
 
-SOURCE_HANDLERS = {
+SOURCE_HANDLERS: Dict[str, Tuple[Callable[[], dict], Callable[[dict], HWProfile]]] = {
     "steam_pc": (_fetch_steam_survey, _parse_steam),
 }
 
 
-def _load_cache() -> dict[str, HWProfile]:
-    if CACHE_PATH.exists() and (
-            datetime.fromtimestamp(CACHE_PATH.stat().st_mtime) > datetime.now() - CACHE_TTL
-    ):
+def register_source(name: str, fetch: Callable[[], dict], parse: Callable[[dict], HWProfile]) -> None:
+    """Add or replace a profile source."""
+    SOURCE_HANDLERS[name] = (fetch, parse)
+
+
+def _fetch(name: str) -> dict:
+    if FIXTURE_DIR:
+        return json.loads((Path(FIXTURE_DIR) / f"{name}.json").read_text(encoding="utf-8"))
+    return SOURCE_HANDLERS[name][0]()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+class _ProfileCache:
+    """Memory layer over the disk cache and the bundled snapshot."""
+
+    def __init__(self) -> None:
+        self._profiles: Dict[str, Tuple[HWProfile, float]] = {}    # name → (profile, fetched at)
+        self._snapshot: Optional[Dict[str, HWProfile]] = None
+        self._no_snapshot: set = set()
+        self._refreshing: set = set()
+        self._last_attempt: Dict[str, float] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        """Disk cache → memory, once per process."""
+        self._loaded = True
+        try:
+            raw = json.loads(CACHE_PATH.read_text())
+        except (OSError, json.JSONDecodeError):
+            return
+        for name, item in raw.items():
+            if isinstance(item, dict) and "profile" in item:
+                self._profiles[name] = (item["profile"], float(item.get("fetched_at", 0)))
+
+    def _save(self) -> None:
+        data = {n: {"profile": p, "fetched_at": t} for n, (p, t) in self._profiles.items()}
         try:
-            return json.loads(CACHE_PATH.read_text())
-        except json.JSONDecodeError:
-            pass
-    return {}
+            CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = CACHE_PATH.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, CACHE_PATH)
+        except OSError as exc:
+            log.debug("HW profile cache not written: %s", exc)
+
+    def snapshot(self, name: str) -> HWProfile:
+        if self._snapshot is None:
+            self._snapshot = json.loads(SNAPSHOT_PATH.read_text(encoding="utf-8"))["profiles"]
+        profile = self._snapshot.get(name)
+        if profile is None:
+            if name not in self._no_snapshot:
+                self._no_snapshot.add(name)
+                log.warning("No bundled HW snapshot for %s, using the %s profile until it is fetched",
+                            name, REFERENCE_SOURCE)
+            profile = self._snapshot[REFERENCE_SOURCE]
+        return dict(profile)
+
+    def get(self, name: str) -> HWProfile:
+        """Best profile available right now; refresh in the background if due."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            cached = self._profiles.get(name)
+        if cached is None or time.time() - cached[1] > CACHE_TTL:
+            self.refresh(name)
+        return dict(cached[0]) if cached is not None else self.snapshot(name)
+
+    def refresh(self, name: str, wait: bool = False) -> None:
+        """Start (or with *wait*, run) a refresh of *name* unless one is due later."""
+        if OFFLINE:
+            return
+        with self._lock:
+            now = time.time()
+            if name in self._refreshing or now - self._last_attempt.get(name, 0) < RETRY_AFTER:
+                return
+            self._refreshing.add(name)
+            self._last_attempt[name] = now
+        if wait:
+            self._refresh(name)
+        else:
+            threading.Thread(target=self._refresh, args=(name,), name=f"hw-refresh-{name}", daemon=True).start()
+
+    def _refresh(self, name: str) -> None:
+        try:
+            profile = SOURCE_HANDLERS[name][1](_fetch(name))
+        except Exception as exc:  # noqa: BLE001
+            log.warning("HW profile refresh for %s failed, keeping previous data: %s", name, exc)
+            with self._lock:
+                self._refreshing.discard(name)
+            return
+        with self._lock:
+            self._profiles[name] = (profile, time.time())
+            self._refreshing.discard(name)
+            self._save()
+        log.debug("HW profile %s refreshed: %s", name, profile)
 
 
-def _save_cache(cache: dict) -> None:
-    try:
-        CACHE_PATH.write_text(json.dumps(cache))
-    except OSError:
-        pass
+_cache = _ProfileCache()
+
+
+def refresh_profiles(wait: bool = False) -> None:
+    """Refresh every source now (e.g. at start-up), in the background unless *wait*."""
+    for name in SOURCE_HANDLERS:
+        _cache.refresh(name, wait=wait)
 
 
 def get_live_profile(profile_name: Literal["desktop", "cloud", "mobile"] = "desktop") -> HWProfile:
     """
-    Return a HWProfile dict, refreshing remote data if the cache is stale.
+    Return a HWProfile dict – never blocks on the network.
 
     profile_name:
-        - desktop  -> Steam PC profile
+        - desktop  -> Steam PC profile (cached / bundled snapshot)
         - cloud    -> hard-coded best-guess (update later)
         - mobile   -> hard-coded best-guess (update later)
     """
-    cache = _load_cache()
-
     # ---------------- desktop via Steam ----------------
     if profile_name == "desktop":
-        if "steam_pc" not in cache:
-            fetch, parse = SOURCE_HANDLERS["steam_pc"]
-            cache["steam_pc"] = parse(fetch())
-            _save_cache(cache)
-        return cache["steam_pc"]
+        return _cache.get("steam_pc")
 
     # ---------------- cloud & mobile placeholders ----------------
     if profile_name == "cloud":
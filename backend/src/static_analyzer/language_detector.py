@@ -8,7 +8,9 @@ plus the dominant language name.
 """
 from collections import Counter
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
+
+from .file_index import FileIndex, ensure_index
 
 _EXT2LANG = {
     ".py": "python",
@@ -31,14 +33,12 @@ _EXT2LANG = {
 }
 
 
-def detect_languages(root: Path) -> Tuple[Dict[str, int], str]:
+def detect_languages(root: Union[FileIndex, Path]) -> Tuple[Dict[str, int], str]:
     counts = Counter()
 
-    for path in root.rglob("*.*"):
-        if path.is_file():
-            lang = _EXT2LANG.get(path.suffix.lower())
-            if lang:
-                counts[lang] += 1
+    for entry in ensure_index(root):
+        if entry.language:
+            counts[entry.language] += 1
 
     dominant = counts.most_common(1)[0][0] if counts else "unknown"
     return dict(counts), dominant
@@ -0,0 +1,161 @@
+# backend/src/static_analyzer/loc.py
+"""
+LOC engine – newline counting over raw bytes, binary-aware, bounded memory.
+
+`count_entry` never decodes and never builds a list of lines:
+
+• binary files – a known binary extension, or a NUL byte in the first
+  SNIFF_BYTES (git's own heuristic) – are not counted
+• contents already in memory (every file the analysers read anyway) are
+  counted in place; bigger files on disk are counted in CHUNK_BYTES reads,
+  or through mmap from SYPEC_LOC_MMAP_BYTES up, so they are never loaded
+  whole
+• files above the caps are not counted either, and the digest reports them
+  (status ``oversized``) instead of quietly treating them as empty: on disk
+  the cap is SYPEC_MAX_LOC_BYTES; blobs read from git are capped at
+  SYPEC_MAX_BLOB_BYTES, since they would have to be fetched whole
+• blobs a partial clone never fetched have no known size: status
+  ``not_fetched``, not ``oversized``
+• files that fail to read, whatever their size, are ``unreadable`` – not
+  counted as empty
+
+With SYPEC_LOC_CLASSIFY=1 blank and comment lines are counted too, for the
+languages in `COMMENT_SYNTAX` (files up to SYPEC_MAX_BLOB_BYTES).
+
+    SYPEC_MAX_LOC_BYTES    largest file counted on disk   (default 256 MiB)
+    SYPEC_LOC_MMAP_BYTES   mmap instead of chunked reads  (default 16 MiB)
+    SYPEC_LOC_CLASSIFY     "1" = blank / comment lines    (default off)
+"""
+from __future__ import annotations
+
+import mmap
+import os
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .file_index import BINARY_EXTS, MAX_BLOB_BYTES
+
+MAX_LOC_BYTES = int(os.getenv("SYPEC_MAX_LOC_BYTES", str(256 * 1024 * 1024)))
+MMAP_BYTES = int(os.getenv("SYPEC_LOC_MMAP_BYTES", str(16 * 1024 * 1024)))
+CLASSIFY = os.getenv("SYPEC_LOC_CLASSIFY", "0") == "1"
+SNIFF_BYTES = 8000
+CHUNK_BYTES = 1024 * 1024
+
+COUNTED, BINARY, OVERSIZED, UNREADABLE = "counted", "binary", "oversized", "unreadable"
+ESTIMATED = "estimated"          # not read within the analysis budget, see `sampling`
+NOT_FETCHED = "not_fetched"      # blob left out of a partial clone, size unknown
+STATUSES = (COUNTED, BINARY, OVERSIZED, UNREADABLE, ESTIMATED, NOT_FETCHED)
+
+# part of the per-file record key: records depend on these settings
+FINGERPRINT = f"{'classify' if CLASSIFY else 'plain'}-{MAX_LOC_BYTES}"
+
+_HASH = ((b"#",), None)
+_C_LIKE = ((b"//",), (b"/*", b"*/"))
+_DASHES = ((b"--",), None)
+_MARKUP = ((), (b"<!--", b"-->"))
+
+# lower-cased extension → (line comment prefixes, (block start, block end))
+COMMENT_SYNTAX: Dict[str, Tuple[Tuple[bytes, ...], Optional[Tuple[bytes, bytes]]]] = {
+    **dict.fromkeys((".py", ".sh", ".bash", ".rb", ".pl", ".r", ".yaml", ".yml", ".toml", ".dockerfile"), _HASH),
+    **dict.fromkeys((
+        ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".java", ".kt", ".scala", ".go", ".rs",
+        ".swift", ".js", ".jsx", ".ts", ".tsx", ".dart", ".scss",
+    ), _C_LIKE),
+    ".php": ((b"//", b"#"), (b"/*", b"*/")),
+    ".css": ((), (b"/*", b"*/")),
+    **dict.fromkeys((".sql", ".lua", ".hs"), _DASHES),
+    **dict.fromkeys((".html", ".htm", ".xml", ".vue", ".svelte"), _MARKUP),
+}
+
+
+class LocCount(NamedTuple):
+    lines: int
+    status: str = COUNTED
+    blank: Optional[int] = None        # only when classified
+    comment: Optional[int] = None
+
+
+def looks_binary(head: bytes) -> bool:
+    return b"\0" in head[:SNIFF_BYTES]
+
+
+def count_newlines(data: bytes) -> int:
+    """Lines in *data* – a last line without terminator counts too."""
+    return data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+
+
+def classify_lines(data: bytes, suffix: str) -> Optional[Tuple[int, int]]:
+    """``(blank, comment)`` line counts, None for languages without known syntax."""
+    syntax = COMMENT_SYNTAX.get(suffix)
+    if syntax is None:
+        return None
+    prefixes, block = syntax
+    blank = comment = 0
+    in_block = False
+    for line in data.splitlines():
+        stripped = line.strip()
+        if in_block:
+            comment += 1
+            in_block = block[1] not in stripped
+        elif not stripped:
+            blank += 1
+        elif prefixes and stripped.startswith(prefixes):
+            comment += 1
+        elif block and stripped.startswith(block[0]):
+            comment += 1
+            in_block = block[1] not in stripped[len(block[0]):]
+    return blank, comment
+
+
+def _count_file(path: str, size: int) -> LocCount:
+    """Newlines of a file on disk, reading at most CHUNK_BYTES at a time."""
+    with open(path, "rb") as fh:
+        if size >= MMAP_BYTES:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if looks_binary(mm[:SNIFF_BYTES]):
+                    return LocCount(0, BINARY)
+                lines = 0
+                for pos in range(0, len(mm), CHUNK_BYTES):
+                    lines += mm[pos:pos + CHUNK_BYTES].count(b"\n")
+                last = mm[-1:] if len(mm) else b"\n"
+        else:
+            buf = bytearray(CHUNK_BYTES)
+            view = memoryview(buf)
+            lines, last, first = 0, b"\n", True
+            while True:
+                n = fh.readinto(buf)
+                if not n:
+                    break
+                if first and looks_binary(buf[:min(n, SNIFF_BYTES)]):
+                    return LocCount(0, BINARY)
+                first = False
+                lines += buf.count(b"\n", 0, n)
+                last = bytes(view[n - 1:n])
+    return LocCount(lines + (last != b"\n"))
+
+
+def count_entry(entry, classify: bool = CLASSIFY) -> LocCount:
+    """LOC of a `FileEntry`, without reading more than it has to."""
+    if entry.suffix in BINARY_EXTS:
+        return LocCount(0, BINARY)
+    if entry.missing:
+        return LocCount(0, NOT_FETCHED)
+    on_disk = entry.abs_path is not None              # virtual entries come from git
+    if entry.size > (MAX_LOC_BYTES if on_disk else MAX_BLOB_BYTES):
+        return LocCount(0, OVERSIZED)
+    if on_disk and entry.size > MAX_BLOB_BYTES:
+        # too big for the analysers (never read into memory): stream it
+        try:
+            return _count_file(str(entry.abs_path), entry.size)
+        except (OSError, ValueError):
+            return LocCount(0, UNREADABLE)
+
+    data = entry.read_bytes()
+    if entry.read_failed:
+        return LocCount(0, UNREADABLE)
+    if looks_binary(data):
+        return LocCount(0, BINARY)
+    lines = count_newlines(data)
+    split = classify_lines(data, entry.suffix) if classify and entry.size <= MAX_BLOB_BYTES else None
+    if split is None:
+        return LocCount(lines)
+    return LocCount(lines, COUNTED, *split)
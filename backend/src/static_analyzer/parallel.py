@@ -0,0 +1,167 @@
+# backend/src/static_analyzer/parallel.py
+"""
+Process-pool execution of the per-file analysers.
+
+LOC counting, rule scanning and smell detection are pure per-file work, so
+for large trees they are sharded across a `ProcessPoolExecutor`:
+
+• files are packed into size-balanced shards (largest first, always into the
+  lightest shard), several shards per worker so stragglers even out;
+• workers rebuild lightweight `FileEntry` objects – reading from disk, or
+  from their own ``git cat-file`` process for virtual trees – and run
+  `file_records.analyze_file`;
+• results are merged by path, so the outcome is identical to the serial path
+  whatever order shards finish in.
+
+Small inputs stay serial: below SYPEC_PARALLEL_MIN_FILES files the process
+start-up costs more than it saves.
+
+    SYPEC_SCAN_WORKERS        worker processes (default: available CPUs, 1 = serial)
+    SYPEC_PARALLEL_MIN_FILES  smallest batch worth parallelising (default 500)
+    SYPEC_MP_START            multiprocessing start method (default forkserver)
+
+With the forkserver, the server process imports `scan_preload` once and
+every worker is forked from it already warm.
+
+Custom rule sets registered with `rules.register_ruleset` at run time are
+not visible in worker processes; register them at import time instead.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .file_index import FileEntry
+
+logger = logging.getLogger(__name__)
+
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:                                # not on Linux
+        return os.cpu_count() or 1
+
+
+SCAN_WORKERS = int(os.getenv("SYPEC_SCAN_WORKERS", "0")) or _available_cpus()
+PARALLEL_MIN_FILES = int(os.getenv("SYPEC_PARALLEL_MIN_FILES", "500"))
+MP_START = os.getenv("SYPEC_MP_START", "forkserver")
+SHARDS_PER_WORKER = 4
+# imported by the forkserver before it forks any worker
+FORKSERVER_PRELOAD = [f"{__package__}.scan_preload"]
+
+# (path, absolute path or None, size, blob SHA) – picklable stand-in for FileEntry
+_Item = Tuple[str, Optional[str], int, Optional[str]]
+
+
+def shard_by_size(entries: Sequence[FileEntry], n_shards: int) -> List[List[FileEntry]]:
+    """Greedy size-balanced partition (LPT): biggest file → lightest shard."""
+    n_shards = max(1, min(n_shards, len(entries)))
+    heap = [(0, i) for i in range(n_shards)]
+    shards: List[List[FileEntry]] = [[] for _ in range(n_shards)]
+    for entry in sorted(entries, key=lambda e: (-e.size, e.path)):
+        load, i = heapq.heappop(heap)
+        shards[i].append(entry)
+        heapq.heappush(heap, (load + max(entry.size, 1), i))
+    return [s for s in shards if s]
+
+
+def _analyze_shard(root: str, items: List[_Item]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Worker side: rebuild entries for one shard and analyse them."""
+    from .file_records import analyze_file
+
+    cat = None
+
+    def read_blob(entry: FileEntry) -> bytes:
+        # virtual entries: *root* is the git dir the index was built from
+        nonlocal cat
+        if cat is None:
+            from .git_tree import CatFile
+
+            cat = CatFile(Path(root))
+        return cat.read(entry.blob_sha)
+
+    try:
+        out = []
+        for path, abs_path, size, sha in items:
+            entry = FileEntry(
+                path,
+                Path(abs_path) if abs_path else None,
+                size,
+                reader=None if abs_path else read_blob,
+                blob_sha=sha,
+            )
+            out.append((path, analyze_file(entry)))
+            entry.release()
+        return out
+    finally:
+        if cat is not None:
+            cat.close()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    """Long-lived pool shared by all analyses of this process."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            ctx = multiprocessing.get_context(MP_START)
+            if MP_START == "forkserver":
+                ctx.set_forkserver_preload(FORKSERVER_PRELOAD)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def analyze_many(
+        entries: Sequence[FileEntry],
+        root: Path,
+        workers: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    ``{path: record}`` for *entries* of the index rooted at *root*, serially
+    or on the process pool (virtual entries are re-read from the git
+    directory *root* by the workers).
+    """
+    from .file_records import analyze_file
+
+    workers = SCAN_WORKERS if workers is None else max(1, workers)
+    if workers == 1 or len(entries) < PARALLEL_MIN_FILES:
+        return {e.path: analyze_file(e) for e in entries}
+
+    shards = shard_by_size(entries, workers * SHARDS_PER_WORKER)
+    logger.debug("Analysing %s files in %s shards on %s workers", len(entries), len(shards), workers)
+    pool = _executor(workers)
+    futures = [
+        pool.submit(
+            _analyze_shard,
+            str(root),
+            [(e.path, str(e.abs_path) if e.abs_path else None, e.size, e.blob_sha) for e in shard],
+        )
+        for shard in shards
+    ]
+    results: Dict[str, Dict[str, Any]] = {}
+    for fut in futures:
+        results.update(fut.result())
+    # deterministic: same insertion order as the serial path
+    return {e.path: results[e.path] for e in entries}
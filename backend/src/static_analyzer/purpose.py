@@ -1,28 +1,29 @@
 import logging
 from pathlib import Path
+from typing import Union
+
+from .digest import ensure_table
+from .file_index import FileIndex, ensure_index
 
 logger = logging.getLogger(__name__)
 def infer_deployment_context(digest: dict) -> str:
     """Return 'desktop' | 'cloud' | 'mobile' …"""
     # … existing heuristics …
-    if any("android" in f["path"].lower() for f in digest["files"]):
+    files = ensure_table(digest["files"])
+    if files.any_path_contains("android"):
         return "mobile"
-    if any("dockerfile" in f["path"].lower() for f in digest["files"]):
+    if files.any_path_contains("dockerfile"):
         return "cloud"
     return "desktop"
 
-def infer_project_purpose(repo_path: Path) -> str:
-    readme = repo_path / "README.md"
-    if not readme.exists():
+def infer_project_purpose(repo_path: Union[FileIndex, Path]) -> str:
+    readme = ensure_index(repo_path).get("README.md")
+    if readme is None:
         logger.warning("README.md not found.")
         return ""
 
-    try:
-        content = readme.read_text(encoding="utf-8")
-        if len(content.strip()) < 100:
-            logger.warning("README.md too short.")
-            return ""
-        return content.strip()
-    except Exception as e:
-        logger.error(f"Error reading README.md: {e}")
+    content = readme.read_text()
+    if len(content.strip()) < 100:
+        logger.warning("README.md too short.")
         return ""
+    return content.strip()
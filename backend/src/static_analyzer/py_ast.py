@@ -0,0 +1,231 @@
+# backend/src/static_analyzer/py_ast.py
+"""
+Parse-once Python analysis: one AST per file, one traversal for all visitors.
+
+Text matching cannot tell code from comments and strings – "subprocess" in
+a docstring used to be a security finding.  Python files are therefore
+parsed once, and every per-file Python analyser is a `Visitor` over that
+shared tree:
+
+    security      calls of eval / exec / pickle.load* / os.system / subprocess.*
+    smells        function count and wildcard imports (long lines stay textual)
+    apis          SDK imports and API host names in string literals
+    tests         test functions / TestCase methods
+
+`analyze(entry)` runs all registered visitors in a single traversal and
+returns ``{record key: result}`` – or None for files that are not Python or
+do not parse; the analysers then fall back to their text rules.  Calls are
+matched on resolved names (``from os import system as run; run()`` is
+``os.system``), see `Context.qualname`.
+
+Files no visitor `wants` (a cheap byte-level prefilter, as in `rules`) are
+not parsed at all.  Parsed files are kept in an LRU keyed by git blob SHA (content hash), so the
+same contents are never parsed twice in a process.  Add visitors with
+`register_visitor`.
+
+    SYPEC_AST_CACHE   parsed files kept in memory (default 256)
+"""
+from __future__ import annotations
+
+import ast
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from .file_index import FileEntry
+
+logger = logging.getLogger(__name__)
+
+AST_CACHE = int(os.getenv("SYPEC_AST_CACHE", "256"))
+
+# rule-engine families the visitors replace for Python files that parse
+RULE_FAMILIES = frozenset({"security", "api"})
+
+
+class Context:
+    """Per-file traversal state shared by all visitors."""
+
+    def __init__(self, entry: FileEntry, tree: Optional[ast.Module]) -> None:
+        self.entry = entry
+        self.tree = tree
+        self.aliases: Dict[str, str] = {}           # local name → dotted import path
+
+    def _bind(self, node: ast.AST) -> None:
+        if isinstance(node, ast.Import):
+            for a in node.names:
+                if a.asname:
+                    self.aliases[a.asname] = a.name
+                else:
+                    root = a.name.split(".", 1)[0]
+                    self.aliases[root] = root
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for a in node.names:
+                if a.name != "*":
+                    self.aliases[a.asname or a.name] = f"{node.module}.{a.name}"
+
+    def qualname(self, node: ast.AST) -> Optional[str]:
+        """Dotted name of a Name / Attribute chain, imports resolved."""
+        parts: List[str] = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if not isinstance(node, ast.Name):
+            return None
+        parts.append(self.aliases.get(node.id, node.id))
+        return ".".join(reversed(parts))
+
+
+class Visitor:
+    """
+    Base for per-file visitors: ``visit_<NodeClass>(node, ctx)`` hooks are
+    called during the shared traversal, then `result` gives the value stored
+    under `key` in the file's record (falsy results are not stored).
+    """
+
+    key: str = ""
+
+    def wants(self, data: bytes) -> bool:
+        """
+        Cheap prefilter on the raw source: False if this visitor cannot find
+        anything in it.  A file is only parsed if some visitor wants it.
+        """
+        return True
+
+    def result(self, ctx: Context) -> Any:
+        return None
+
+
+class ParsedFile(NamedTuple):
+    tree: Optional[ast.Module]          # None: no visitor wanted the file, not parsed
+    results: Dict[str, Any]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+_visitors: List[Type[Visitor]] = []
+_builtin_loaded = False
+_lock = threading.Lock()
+_cache: "OrderedDict[str, Optional[ParsedFile]]" = OrderedDict()
+
+
+def register_visitor(cls: Type[Visitor]) -> None:
+    """Add (or replace, by `key`) a visitor class run on every Python file."""
+    with _lock:
+        _visitors[:] = [v for v in _visitors if v.key != cls.key]
+        _visitors.append(cls)
+        _cache.clear()
+
+
+def visitor_classes() -> List[Type[Visitor]]:
+    global _builtin_loaded
+    with _lock:
+        if not _builtin_loaded:
+            from .api_usage import ApiVisitor
+            from .code_smells import SmellVisitor
+            from .security import SecurityVisitor
+            from .test_coverage import TestVisitor
+
+            builtin = [SecurityVisitor, SmellVisitor, ApiVisitor, TestVisitor]
+            taken = {v.key for v in _visitors}
+            _visitors[:0] = [v for v in builtin if v.key not in taken]
+            _builtin_loaded = True
+        return list(_visitors)
+
+
+@lru_cache(maxsize=None)
+def _hooks(cls: Type[Visitor]) -> Tuple[Tuple[type, str], ...]:
+    """``(node class, method name)`` for the ``visit_*`` hooks of a visitor class."""
+    return tuple(
+        (getattr(ast, name[6:]), name)
+        for name in dir(cls)
+        if name.startswith("visit_") and isinstance(getattr(ast, name[6:], None), type)
+    )
+
+
+@lru_cache(maxsize=None)
+def _child_fields(cls: type) -> Tuple[str, ...]:
+    # "ctx" only ever holds Load / Store / Del markers
+    return tuple(f for f in cls._fields if f != "ctx")
+
+
+def warm() -> None:
+    """Load the visitors and fill the dispatch caches (see `preload`)."""
+    for cls in visitor_classes():
+        _hooks(cls)
+    for node_cls in vars(ast).values():
+        if isinstance(node_cls, type) and issubclass(node_cls, ast.AST):
+            _child_fields(node_cls)
+
+
+def traverse(tree: ast.Module, visitors: List[Visitor], ctx: Context) -> None:
+    """Walk *tree* once (source order), dispatching each node to its hooks."""
+    dispatch: Dict[type, List[Callable[[ast.AST, Context], None]]] = {}
+    for v in visitors:
+        for node_cls, name in _hooks(type(v)):
+            dispatch.setdefault(node_cls, []).append(getattr(v, name))
+
+    AST = ast.AST
+    stack: List[ast.AST] = [tree]
+    pop, push = stack.pop, stack.append
+    while stack:
+        node = pop()
+        cls = node.__class__
+        if cls is ast.Import or cls is ast.ImportFrom:
+            ctx._bind(node)
+        hooks = dispatch.get(cls)
+        if hooks:
+            for hook in hooks:
+                hook(node, ctx)
+        for field in reversed(_child_fields(cls)):
+            value = getattr(node, field, None)
+            if value.__class__ is list:
+                for item in reversed(value):
+                    if isinstance(item, AST):
+                        push(item)
+            elif isinstance(value, AST):
+                push(value)
+
+
+def _parse(entry: FileEntry) -> Optional[ParsedFile]:
+    if entry.skipped:
+        return None
+    data = entry.read_bytes()
+    visitors = [cls() for cls in visitor_classes()]
+    active = [v for v in visitors if v.wants(data)]
+    tree = None
+    if active:
+        try:
+            tree = ast.parse(data, filename=entry.path)
+            traverse(tree, active, Context(entry, tree))
+        except (SyntaxError, ValueError, RecursionError, MemoryError) as exc:
+            logger.debug("Not parsed, text rules apply: %s (%s)", entry.path, exc)
+            return None
+    ctx = Context(entry, tree)
+    return ParsedFile(tree, {v.key: v.result(ctx) for v in visitors})
+
+
+def parse(entry: FileEntry) -> Optional[ParsedFile]:
+    """Tree plus visitor results for a Python file, cached by content hash."""
+    if entry.suffix != ".py":
+        return None
+    from .file_records import blob_sha
+
+    key = blob_sha(entry)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    parsed = _parse(entry)
+    with _lock:
+        _cache[key] = parsed
+        while len(_cache) > AST_CACHE:
+            _cache.popitem(last=False)
+    return parsed
+
+
+def analyze(entry: FileEntry) -> Optional[Dict[str, Any]]:
+    """``{record key: result}`` of every visitor, None if *entry* is no parseable Python."""
+    parsed = parse(entry)
+    return None if parsed is None else parsed.results
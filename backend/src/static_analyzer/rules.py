@@ -0,0 +1,252 @@
+# backend/src/static_analyzer/rules.py
+"""
+Multi-pattern scanning engine shared by the security, secrets and API-usage
+analysers.
+
+Every rule names one or more *literals* that must occur for it to fire and,
+optionally, a confirmation regex.  `RuleEngine` compiles the literals of all
+rules that apply to a file type into a single prefilter, so each file is
+scanned once no matter how many rules are loaded:
+
+    1. one pass of the combined literal prefilter over the whole text
+       (a zero-width look-ahead alternation, so overlapping literals are all
+       found – the Aho-Corasick idea, executed by the C regex engine);
+    2. only on lines with a literal hit: the confirmation regexes of the
+       rules whose literals were seen – or, for ``multiline`` rules whose
+       regex may start lines before its literal, once over the whole text.
+
+Rule families are pluggable: the analysers contribute `security.RULES`,
+`secrets_scanner.RULES` and `api_usage.RULES`; anything else can be added
+with `register_ruleset` (or `load_rules` from a JSON file).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+from .file_index import FileEntry
+
+
+class Rule(NamedTuple):
+    id: str                                   # e.g. "security.subprocess"
+    family: str                               # security | secrets | api | …
+    literals: Tuple[str, ...]                 # at least one must occur on the line
+    regex: Optional[Pattern] = None           # confirmation; None = literal suffices
+    label: str = ""                           # reported value (default: regex group / literal)
+    group: Optional[str] = None               # regex group reported as the value
+    suffixes: FrozenSet[str] = frozenset()    # lower-cased extensions; empty = all files
+    max_size: Optional[int] = None            # skip files at or above this size
+    ignore_case: bool = False                 # literal matching
+    multiline: bool = False                   # regex may span lines: confirm on the whole text
+
+
+class Hit(NamedTuple):
+    rule_id: str
+    family: str
+    path: str
+    line: int                                 # 1-based
+    column: int                               # 1-based
+    value: str
+
+
+class _Compiled(NamedTuple):
+    prefilter: Optional[Pattern]
+    rules: Tuple[Rule, ...]
+    by_literal: Dict[str, Tuple[Rule, ...]]    # matched text → rules, filled lazily
+
+
+class RuleEngine:
+    """Compiled rule set.  Prefilters are built per file extension, lazily."""
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        self.families: FrozenSet[str] = frozenset(r.family for r in self.rules)
+        # identifies the rule set, e.g. in cache keys of per-file results
+        self.fingerprint = hashlib.sha1(
+            repr([(r.id, r.literals, r.regex.pattern if r.regex else None, r.label, r.group,
+                   sorted(r.suffixes), r.max_size, r.ignore_case, r.multiline) for r in self.rules]).encode()
+        ).hexdigest()[:12]
+        self._by_suffix: Dict[Tuple[str, FrozenSet[str]], _Compiled] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def _compiled(self, suffix: str, families: FrozenSet[str]) -> _Compiled:
+        key = (suffix, families)
+        compiled = self._by_suffix.get(key)
+        if compiled is None:
+            active = tuple(
+                r for r in self.rules
+                if (not r.suffixes or suffix in r.suffixes) and (not families or r.family in families)
+            )
+            alternatives = set()
+            for r in active:
+                for lit in r.literals:
+                    alternatives.add(f"(?i:{re.escape(lit)})" if r.ignore_case else re.escape(lit))
+            # longest first, inside a look-ahead so every start position is tried
+            body = "|".join(sorted(alternatives, key=len, reverse=True))
+            prefilter = re.compile(f"(?=({body}))") if body else None
+            compiled = _Compiled(prefilter, active, {})
+            with self._lock:
+                self._by_suffix[key] = compiled
+        return compiled
+
+    def warm(self, suffixes: Iterable[str], family_sets: Iterable[Iterable[str]] = ((),)) -> None:
+        """Compile the prefilters of *suffixes* × *family_sets* now instead of on first scan."""
+        for families in family_sets:
+            families = frozenset(families)
+            for suffix in suffixes:
+                self._compiled(suffix, families)
+
+    @staticmethod
+    def _rules_for_literal(compiled: _Compiled, text: str) -> Tuple[Rule, ...]:
+        """
+        Rules one of whose literals is a prefix of the matched *text* – the
+        prefilter reports the longest literal at each position, so shorter
+        literals starting there are recovered here.
+        """
+        found = compiled.by_literal.get(text)
+        if found is None:
+            low = text.lower()
+            found = compiled.by_literal[text] = tuple(
+                r for r in compiled.rules
+                if any(
+                    (low.startswith(lit.lower()) if r.ignore_case else text.startswith(lit))
+                    for lit in r.literals
+                )
+            )
+        return found
+
+    def scan_text(
+            self,
+            text: str,
+            path: str = "",
+            suffix: str = "",
+            size: Optional[int] = None,
+            families: Iterable[str] = (),
+    ) -> List[Hit]:
+        """All rule hits in *text*, ordered by line, column, rule id."""
+        compiled = self._compiled(suffix, frozenset(families))
+        if compiled.prefilter is None:
+            return []
+        too_big = frozenset(
+            r for r in compiled.rules if size is not None and r.max_size is not None and size >= r.max_size
+        )
+
+        # pass 1 – literal prefilter: rule → {line: (offset, literal) of first hit}
+        candidates: Dict[Rule, Dict[int, Tuple[int, str]]] = {}
+        line_no, counted_to = 1, 0
+        for m in compiled.prefilter.finditer(text):
+            lit = m.group(1)
+            pos = m.start()
+            line_no += text.count("\n", counted_to, pos)     # matches come in order
+            counted_to = pos
+            for r in self._rules_for_literal(compiled, lit):
+                if r not in too_big:
+                    candidates.setdefault(r, {}).setdefault(line_no, (pos, lit))
+
+        if not candidates:
+            return []
+
+        # pass 2 – confirmation on candidate lines only
+        hits: List[Hit] = []
+        for r, lines in candidates.items():
+            if r.multiline:
+                hits.extend(self._confirm_text(r, text, path))
+                continue
+            for line_no, (pos, lit) in lines.items():
+                start = text.rfind("\n", 0, pos) + 1
+                end = text.find("\n", pos)
+                end = len(text) if end < 0 else end
+                if r.regex is None:
+                    value = r.label or lit
+                    hits.append(Hit(r.id, r.family, path, line_no, pos - start + 1, value))
+                    continue
+                for cm in r.regex.finditer(text, start, end):
+                    value = r.label or (cm.group(r.group) if r.group else cm.group(0))
+                    hits.append(Hit(r.id, r.family, path, line_no, cm.start() - start + 1, value))
+
+        hits.sort(key=lambda h: (h.line, h.column, h.rule_id))
+        return hits
+
+    @staticmethod
+    def _confirm_text(r: Rule, text: str, path: str) -> List[Hit]:
+        hits = []
+        line_no, counted_to = 1, 0
+        for cm in r.regex.finditer(text):
+            pos = cm.start()
+            line_no += text.count("\n", counted_to, pos)
+            counted_to = pos
+            value = r.label or (cm.group(r.group) if r.group else cm.group(0))
+            hits.append(Hit(r.id, r.family, path, line_no, pos - text.rfind("\n", 0, pos), value))
+        return hits
+
+    def scan(self, entry: FileEntry, families: Iterable[str] = ()) -> List[Hit]:
+        """Scan one indexed file (contents come from the shared index)."""
+        compiled = self._compiled(entry.suffix, frozenset(families))
+        if compiled.prefilter is None:
+            return []
+        return self.scan_text(entry.read_text(), entry.path, entry.suffix, entry.size, families)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+_extra_rulesets: Dict[str, List[Rule]] = {}
+_engine: Optional[RuleEngine] = None
+_engine_lock = threading.Lock()
+
+
+def register_ruleset(name: str, rules: Iterable[Rule]) -> None:
+    """Add (or replace) a named rule set; the default engine is rebuilt."""
+    global _engine
+    with _engine_lock:
+        _extra_rulesets[name] = list(rules)
+        _engine = None
+
+
+def load_rules(path: Path) -> List[Rule]:
+    """
+    Read rules from JSON – a list of objects with the `Rule` fields, e.g.
+
+        [{"id": "custom.todo", "family": "custom", "literals": ["TODO"],
+          "regex": "TODO\\\\(\\\\w+\\\\)", "suffixes": [".py"]}]
+    """
+    rules = []
+    for raw in json.loads(Path(path).read_text(encoding="utf-8")):
+        flags = re.I if raw.get("ignore_case") else 0
+        rules.append(Rule(
+            id=raw["id"],
+            family=raw.get("family", "custom"),
+            literals=tuple(raw["literals"]),
+            regex=re.compile(raw["regex"], flags) if raw.get("regex") else None,
+            label=raw.get("label", ""),
+            group=raw.get("group"),
+            suffixes=frozenset(s.lower() for s in raw.get("suffixes", ())),
+            max_size=raw.get("max_size"),
+            ignore_case=bool(raw.get("ignore_case")),
+            multiline=bool(raw.get("multiline")),
+        ))
+    return rules
+
+
+def default_engine() -> RuleEngine:
+    """Process-wide engine over the built-in families plus registered rule sets."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from . import api_usage, secrets_scanner, security
+
+            rules: List[Rule] = [*security.RULES, *secrets_scanner.RULES, *api_usage.RULES]
+            for extra in _extra_rulesets.values():
+                rules.extend(extra)
+            _engine = RuleEngine(rules)
+        return _engine
+
+
+def hits_by_family(hits: Iterable[Hit]) -> Dict[str, List[Hit]]:
+    out: Dict[str, List[Hit]] = {}
+    for h in hits:
+        out.setdefault(h.family, []).append(h)
+    return out
@@ -0,0 +1,427 @@
+# backend/src/static_analyzer/sampling.py
+"""
+Time- and byte-budgeted analysis: stratified sampling for huge repositories.
+
+With a `Budget`, `collect_records` hands the files missing from the record
+store to `analyze_within`, which analyses them in a stratified random order
+– strata are (top-level directory, extension) – until the wall-clock or
+bytes-read allowance is spent.  The order interleaves strata in proportion
+to their size, so whatever prefix fits the budget is a proportionally
+allocated stratified sample; if everything fits, nothing is sampled.
+Records of sampled files are stored as usual, so repeated budgeted runs
+converge on the full analysis.
+
+`Sample` extrapolates from the files analysed in the random draw.  Files
+whose record came from the store are not part of it – which files are cached
+depends on earlier runs, not on the draw – so they are counted exactly, like
+a census, and the draw stands for the uncached files only:
+
+• LOC of every file left out – ratio estimator on file size, LOC per byte
+  fitted per extension (`Sample.complete`), so the digest, extension mix and energy model see
+  extrapolated totals; those files carry loc status ``estimated``
+• 95 % confidence intervals for total LOC, LOC per extension and per-file
+  finding counts (`Sample.report`), which also says what was sampled: seed,
+  per-stratum counts, the first MAX_PATHS sampled paths and a digest of
+  all of them.  Findings are extrapolated per extension, and only over
+  files the rule family scans (security and smells: ``.py``); they are
+  estimates and never enter the score
+• strata with fewer than MIN_STRATUM_N sampled files borrow the variance of
+  their extension, or of every sampled file around the pooled fit; where
+  even that is unknown the interval has no upper bound (``None``)
+
+Files with a binary extension are known to have no lines and are never
+part of the sample.
+
+    SYPEC_BUDGET_SECONDS   default wall-clock budget per analysis  (unset = none)
+    SYPEC_BUDGET_BYTES     default bytes-read budget per analysis  (unset = none)
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from . import loc, py_ast
+from .file_index import BINARY_EXTS, FileEntry, FileIndex
+from .rules import default_engine
+
+logger = logging.getLogger(__name__)
+
+BUDGET_SECONDS = float(os.getenv("SYPEC_BUDGET_SECONDS") or 0) or None
+BUDGET_BYTES = int(os.getenv("SYPEC_BUDGET_BYTES") or 0) or None
+
+SEED = 0
+Z95 = 1.96
+FIRST_CHUNK = 64                  # files analysed before the throughput is known
+MAX_CHUNK = 4096
+MIN_STRATUM_N = 5               # smaller samples borrow the variance of their extension
+MAX_PATHS = 20                  # sampled paths listed in the report
+# per-file finding counts extrapolated in the report (record keys)
+FINDING_KEYS = ("security", "secrets", "smells")
+
+Stratum = Tuple[str, str]         # (top-level directory, extension)
+
+
+class Budget:
+    """
+    Wall-clock and bytes-read allowance of one analysis (None = unlimited);
+    the clock starts when the budget is created.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, max_bytes: Optional[int] = None) -> None:
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.started = time.monotonic()
+        self.bytes_read = 0
+        self.exhausted: Optional[str] = None        # "time" / "bytes" once spent
+        self.drawn: Set[str] = set()                # paths analysed in the random draw
+
+    @classmethod
+    def resolve(cls, seconds: Optional[float] = None, max_bytes: Optional[int] = None) -> Optional["Budget"]:
+        """A budget from explicit limits or the SYPEC_BUDGET_* defaults, None if unlimited."""
+        seconds = BUDGET_SECONDS if seconds is None else seconds
+        max_bytes = BUDGET_BYTES if max_bytes is None else max_bytes
+        if not seconds and not max_bytes:
+            return None
+        return cls(seconds or None, max_bytes or None)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def remaining_seconds(self) -> Optional[float]:
+        return None if self.seconds is None else max(0.0, self.seconds - self.elapsed)
+
+    @property
+    def remaining_bytes(self) -> Optional[int]:
+        return None if self.max_bytes is None else max(0, self.max_bytes - self.bytes_read)
+
+    def spent(self) -> bool:
+        if self.exhausted is None:
+            if self.remaining_seconds == 0:
+                self.exhausted = "time"
+            elif self.remaining_bytes == 0:
+                self.exhausted = "bytes"
+        return self.exhausted is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seconds": self.seconds,
+            "bytes": self.max_bytes,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "bytes_read": self.bytes_read,
+            "exhausted": self.exhausted,
+        }
+
+
+def stratum(entry: FileEntry) -> Stratum:
+    top = entry.path.split("/", 1)[0] if "/" in entry.path else "."
+    return top, entry.ext or "noext"
+
+
+def scanned(kind: str, suffix: str) -> bool:
+    """Whether the analysers behind finding *kind* look at files with *suffix* at all."""
+    if kind == "smells":
+        return suffix == ".py"
+    if kind in py_ast.RULE_FAMILIES and suffix == ".py":
+        return True
+    return any(r.family == kind and (not r.suffixes or suffix in r.suffixes) for r in default_engine().rules)
+
+
+def read_cost(entry: FileEntry) -> int:
+    """Bytes analysing *entry* reads (binary extensions and unfetched blobs are never opened)."""
+    return 0 if entry.suffix in BINARY_EXTS or entry.missing else entry.size
+
+
+def stratified_order(entries: Iterable[FileEntry], seed: int = SEED) -> List[FileEntry]:
+    """
+    *entries* shuffled within each stratum, then merged so that every prefix
+    holds each stratum in proportion to its size (systematic positions
+    ``(rank + offset) / N`` with a random offset per stratum).
+    """
+    rng = random.Random(seed)
+    groups: Dict[Stratum, List[FileEntry]] = defaultdict(list)
+    for entry in entries:
+        groups[stratum(entry)].append(entry)
+    keyed: List[Tuple[float, str, FileEntry]] = []
+    for key in sorted(groups):
+        members = groups[key]
+        rng.shuffle(members)
+        offset = rng.random()
+        keyed.extend(((i + offset) / len(members), e.path, e) for i, e in enumerate(members))
+    keyed.sort(key=lambda t: (t[0], t[1]))
+    return [e for _pos, _path, e in keyed]
+
+
+def analyze_within(
+        entries: Sequence[FileEntry],
+        root: Path,
+        budget: Budget,
+        workers: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    ``{path: record}`` for the stratified prefix of *entries* that fits
+    *budget* – all of them if it does.  Chunks are sized from the measured
+    throughput so the clock is checked often enough near the deadline.
+    """
+    from .parallel import analyze_many
+
+    order = stratified_order(entries)
+    out: Dict[str, Dict[str, Any]] = {}
+    pos, chunk = 0, FIRST_CHUNK
+    while pos < len(order) and not budget.spent():
+        room = budget.remaining_bytes
+        batch: List[FileEntry] = []
+        cost = 0
+        for entry in order[pos:pos + chunk]:
+            if room is not None and cost + read_cost(entry) > room:
+                break
+            batch.append(entry)
+            cost += read_cost(entry)
+        if not batch:
+            budget.exhausted = "bytes"
+            break
+        t0 = time.monotonic()
+        out.update(analyze_many(batch, root, workers))
+        budget.bytes_read += cost
+        budget.drawn.update(e.path for e in batch)
+        pos += len(batch)
+        remaining = budget.remaining_seconds
+        if remaining is not None:
+            rate = len(batch) / max(time.monotonic() - t0, 1e-3)
+            chunk = int(min(MAX_CHUNK, max(1, rate * remaining / 2)))
+        else:
+            chunk = MAX_CHUNK
+    if pos < len(order):
+        logger.info("Budget spent (%s): %s of %s files analysed", budget.exhausted, pos, len(order))
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────────
+def _estimate(
+        observed: float,
+        total: float,
+        variance: float,
+) -> Dict[str, Any]:
+    """Value, 95 % interval (upper bound None if the variance is unknown) and observed part."""
+    if math.isinf(variance):
+        return {"value": int(round(total)), "ci95": [int(round(observed)), None], "observed": int(round(observed))}
+    half = Z95 * math.sqrt(max(variance, 0.0))
+    return {
+        "value": int(round(total)),
+        "ci95": [int(round(max(observed, total - half))), int(round(total + half))],
+        "observed": int(round(observed)),
+    }
+
+
+def _sample_var(values: np.ndarray, fallback: float = math.inf) -> float:
+    """Sample variance of *values*, *fallback* for fewer than MIN_STRATUM_N of them."""
+    return float(values.var(ddof=1)) if len(values) >= MIN_STRATUM_N else fallback
+
+
+class Sample:
+    """
+    Extrapolation from the files of *index* that have a record to those that
+    do not.  Only records of *drawn* paths (default: the budget's draw, or
+    every record without a budget) are the random sample; the others – cache
+    hits – are exact and not extrapolated from.
+    """
+
+    def __init__(
+            self,
+            index: FileIndex,
+            records: Dict[str, Dict[str, Any]],
+            budget: Optional[Budget] = None,
+            drawn: Optional[Collection[str]] = None,
+    ) -> None:
+        self.index = index
+        self.budget = budget
+        if drawn is None:
+            drawn = budget.drawn if budget is not None else records
+        self.sampled_paths = sorted(p for p in records if index.get(p) is not None)
+        self.cached = sum(1 for p in self.sampled_paths if p not in drawn)
+        self.binary: List[FileEntry] = []
+        self.not_fetched: List[FileEntry] = []           # no size to estimate from
+        members: Dict[Stratum, List[FileEntry]] = defaultdict(list)
+        for entry in index:
+            if entry.suffix in BINARY_EXTS:
+                self.binary.append(entry)
+            elif entry.missing:
+                self.not_fetched.append(entry)
+            else:
+                members[stratum(entry)].append(entry)
+
+        # per stratum: sizes (all), masks of files with a record / in the draw,
+        # LOC and finding counts of the drawn files, exact sums of the cached ones
+        self.strata: Dict[Stratum, Dict[str, Any]] = {}
+        for key, entries in sorted(members.items()):
+            recs = [records.get(e.path) for e in entries]
+            hit = np.array([r is not None for r in recs], dtype=bool)
+            in_draw = np.array([r is not None and e.path in drawn for e, r in zip(entries, recs)], dtype=bool)
+            taken = [r for r, d in zip(recs, in_draw) if d]
+            known = [r for r, d in zip(recs, hit & ~in_draw) if d]
+            self.strata[key] = {
+                "entries": entries,
+                "size": np.array([e.size for e in entries], dtype=np.float64),
+                "sampled": hit,
+                "drawn": in_draw,
+                "population": int((~hit | in_draw).sum()),   # what the draw was taken from
+                "loc": np.array([r["loc"] for r in taken], dtype=np.float64),
+                "findings": {
+                    k: np.array([len(r.get(k) or ()) for r in taken], dtype=np.float64)
+                    for k in FINDING_KEYS
+                },
+                "known_loc": float(sum(r["loc"] for r in known)),
+                "known_findings": {k: float(sum(len(r.get(k) or ()) for r in known)) for k in FINDING_KEYS},
+            }
+        self._fit()
+
+    def _fit(self) -> None:
+        """
+        LOC per byte per extension (combined ratio over its strata – lines per
+        byte depend on the language far more than on the directory), residual
+        variance per extension for strata too small to estimate their own.
+        An extension with too few sampled files itself takes the variance of
+        every sampled file around the pooled ratio: its own residuals are
+        near zero by construction (one file fits its ratio exactly).
+        """
+        sums: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0])
+        for (_top, ext), s in self.strata.items():
+            sums[ext][0] += s["loc"].sum()
+            sums[ext][1] += s["size"][s["drawn"]].sum()
+        tot_loc = sum(y for y, _x in sums.values())
+        tot_size = sum(x for _y, x in sums.values())
+        pooled = tot_loc / tot_size if tot_size else 0.0
+        ratio = {ext: (y / x if x else pooled) for ext, (y, x) in sums.items()}
+
+        residuals: Dict[str, List[np.ndarray]] = defaultdict(list)
+        around_pooled: List[np.ndarray] = []
+        for (_top, ext), s in self.strata.items():
+            s["ratio"] = ratio[ext]
+            s["residuals"] = s["loc"] - s["ratio"] * s["size"][s["drawn"]]
+            residuals[ext].append(s["residuals"])
+            around_pooled.append(s["loc"] - pooled * s["size"][s["drawn"]])
+        flat = np.concatenate(around_pooled or [np.zeros(0)])
+        overall = float(flat.var(ddof=1)) if len(flat) > 1 else math.inf
+        self._pooled_var: Dict[str, float] = {
+            ext: _sample_var(np.concatenate(rs), overall) for ext, rs in residuals.items()
+        }
+
+    def _var_total(self, n_all: int, sample: np.ndarray, pooled_var: float) -> float:
+        """Variance of an expanded stratum total (finite population corrected)."""
+        n = len(sample)
+        if n == n_all:
+            return 0.0
+        if n == 0:
+            return n_all ** 2 * pooled_var
+        return n_all ** 2 * (1 - n / n_all) / n * _sample_var(sample, pooled_var)
+
+    def estimated_loc(self) -> Dict[str, int]:
+        """Estimated LOC of every file left out of the sample."""
+        out: Dict[str, int] = {}
+        for s in self.strata.values():
+            for entry, hit, size in zip(s["entries"], s["sampled"], s["size"]):
+                if not hit:
+                    out[entry.path] = int(round(size * s["ratio"]))
+        return out
+
+    def complete(self, records: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """*records* plus stand-ins for the unsampled files: estimated LOC, no findings."""
+        full = dict(records)
+        for path, lines in self.estimated_loc().items():
+            full[path] = {"loc": lines, "loc_status": loc.ESTIMATED}
+        for entry in self.binary:
+            full.setdefault(entry.path, {"loc": 0, "loc_status": loc.BINARY})
+        for entry in self.not_fetched:
+            full.setdefault(entry.path, {"loc": 0, "loc_status": loc.NOT_FETCHED})
+        return full
+
+    def _finding_rates(self, kind: str) -> Dict[str, Tuple[float, float]]:
+        """
+        ``{ext: (mean, variance)}`` of per-file *kind* findings over the
+        sampled files of each extension the family scans; an extension with
+        too few sampled files falls back to all of them.
+        """
+        by_ext: Dict[str, List[np.ndarray]] = defaultdict(list)
+        for (_top, ext), s in self.strata.items():
+            if scanned(kind, s["entries"][0].suffix):
+                by_ext[ext].append(s["findings"][kind])
+        flat = np.concatenate([c for cs in by_ext.values() for c in cs] or [np.zeros(0)])
+        mean = float(flat.mean()) if len(flat) else 0.0
+        var = float(flat.var(ddof=1)) if len(flat) > 1 else math.inf
+        rates = {}
+        for ext, cs in by_ext.items():
+            counts = np.concatenate(cs)
+            rates[ext] = (float(counts.mean()) if len(counts) else mean, _sample_var(counts, var))
+        return rates
+
+    def report(self, max_paths: int = MAX_PATHS) -> Dict[str, Any]:
+        """
+        What was sampled (counts per stratum, the first *max_paths* sampled
+        paths plus the count and SHA-256 of the full sorted list, so the
+        sample can be checked without shipping every path) and the
+        extrapolated totals with 95 % intervals.
+        """
+        loc_obs = loc_tot = loc_var = 0.0
+        ext_parts: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0])
+        find_parts: Dict[str, List[float]] = {k: [0.0, 0.0, 0.0] for k in FINDING_KEYS}
+        rates = {k: self._finding_rates(k) for k in FINDING_KEYS}
+
+        strata_rows = []
+        for (top, ext), s in self.strata.items():
+            n_all, hit = s["population"], s["sampled"]
+            observed = s["known_loc"] + s["loc"].sum()
+            total = observed + s["ratio"] * s["size"][~hit].sum()
+            var = self._var_total(n_all, s["residuals"], self._pooled_var[ext])
+            loc_obs, loc_tot, loc_var = loc_obs + observed, loc_tot + total, loc_var + var
+            part = ext_parts[ext]
+            part[0], part[1], part[2] = part[0] + observed, part[1] + total, part[2] + var
+            for k in FINDING_KEYS:
+                counts = s["findings"][k]
+                part_k = find_parts[k]
+                part_k[0] += s["known_findings"][k] + counts.sum()
+                part_k[1] += s["known_findings"][k] + counts.sum()
+                if ext not in rates[k]:               # not scanned by this family: nothing to find
+                    continue
+                ext_mean, ext_var = rates[k][ext]
+                mean = counts.mean() if len(counts) else ext_mean
+                part_k[1] += mean * (n_all - len(counts))
+                part_k[2] += self._var_total(n_all, counts, ext_var)
+            strata_rows.append({
+                "dir": top, "ext": ext, "files": len(s["entries"]), "sampled": int(hit.sum()),
+                "cached": int((hit & ~s["drawn"]).sum()),
+                "bytes": int(s["size"].sum()), "sampled_bytes": int(s["size"][hit].sum()),
+            })
+
+        total_bytes = sum(e.size for e in self.index)
+        return {
+            "sampled": True,
+            "reason": self.budget.exhausted if self.budget else None,
+            "budget": self.budget.to_dict() if self.budget else None,
+            "method": "stratified by (top-level dir, extension); LOC by ratio estimator on file size per extension",
+            "seed": SEED,
+            "files": {"total": len(self.index), "sampled": len(self.sampled_paths),
+                      "cached": self.cached, "binary_not_sampled": len(self.binary)},
+            "bytes": {"total": total_bytes, "sampled": int(sum(r["sampled_bytes"] for r in strata_rows))},
+            "strata": strata_rows,
+            "sampled_paths": self.sampled_paths[:max_paths],
+            "sampled_paths_all": {
+                "count": len(self.sampled_paths),
+                "sha256": hashlib.sha256("\n".join(self.sampled_paths).encode("utf-8", "surrogateescape")).hexdigest(),
+                "truncated": len(self.sampled_paths) > max_paths,
+            },
+            "estimates": {
+                "loc": _estimate(loc_obs, loc_tot, loc_var),
+                "extensions": {ext: _estimate(*p) for ext, p in sorted(ext_parts.items())},
+                "findings": {k: _estimate(*p) for k, p in find_parts.items()},
+            },
+        }
@@ -0,0 +1,9 @@
+# backend/src/static_analyzer/scan_preload.py
+"""
+Imported once by the multiprocessing forkserver, before it forks any scan
+worker (see `parallel`): every worker starts with the analysers imported and
+their rule prefilters and Python visitor tables built (`file_records.warm`).
+"""
+from .file_records import warm
+
+warm()
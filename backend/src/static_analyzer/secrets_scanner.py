@@ -4,7 +4,12 @@ Flags obvious tokens in code.
 """
 import re
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .file_index import FileEntry, FileIndex, ensure_index, iter_file_results
+from .rules import Hit, Rule, default_engine
+
+MAX_SECRETS = 20             # findings reported (and scored) per repo
 
 _SECRET_RE = re.compile(
     r"""
@@ -19,17 +24,38 @@ _SECRET_RE = re.compile(
 )
 
 
-def scan_for_secrets(root: Path) -> List[str]:
-    findings: List[str] = []
+# every token shape above starts with one of these literals
+RULES = [
+    Rule(
+        id="secrets.token",
+        family="secrets",
+        literals=("sk", "AKIA", "ghp_", "gho_", "ghu_", "ghs_", "ghr_"),
+        regex=_SECRET_RE,
+        group="name",
+        suffixes=frozenset({".py", ".js", ".ts", ".env"}),
+        max_size=200_000,
+        multiline=True,              # the name may sit lines above the token (``\s*``)
+    ),
+]
+
+
+def from_hits(hits: Iterable[Hit]) -> List[str]:
+    return [h.value for h in hits]
 
-    for file in root.rglob("*"):
-        if file.suffix.lower() in {".py", ".js", ".ts", ".env"} and file.stat().st_size < 200_000:
-            try:
-                text = file.read_text(errors="ignore")
-            except Exception:  # pragma: no cover
-                continue
 
-            for m in _SECRET_RE.finditer(text):
-                findings.append(f"{file}:{m.group('name')}=***")
+def scan_file(entry: FileEntry) -> List[str]:
+    """Per-file pass: variable names holding something that looks like a secret."""
+    return from_hits(default_engine().scan(entry, families=("secrets",)))
+
+
+def scan_for_secrets(
+        root: Union[FileIndex, Path],
+        records: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[str]:
+    findings: List[str] = []
+
+    # repo-relative path: stable across clones of the same commit
+    for file, names in iter_file_results(ensure_index(root), records, "secrets", scan_file):
+        findings.extend(f"{file.path}:{name}=***" for name in names)
 
-    return findings[:20]  # cap noise
+    return findings[:MAX_SECRETS]  # cap noise
@@ -1,22 +1,85 @@
 # backend/src/static_analyzer/security.py
-from typing import List
-import os
+import ast
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from . import py_ast
+from .file_index import FileEntry, FileIndex, ensure_index, iter_file_results
+from .rules import Hit, Rule, default_engine
 
 BAD_PATTERNS = ["eval(", "exec(", "pickle.load", "subprocess", "os.system"]
 
+# one literal-only rule per pattern; the engine matches them all in one pass
+RULES = [
+    Rule(
+        id="security." + re.sub(r"\W+", "_", pattern).strip("_"),
+        family="security",
+        literals=(pattern,),
+        label=pattern,
+        suffixes=frozenset({".py"}),
+    )
+    for pattern in BAD_PATTERNS
+]
+
+
+class SecurityVisitor(py_ast.Visitor):
+    """Calls of risky functions, by resolved name – not mentions in comments or strings."""
+
+    key = "security"
+
+    def __init__(self) -> None:
+        self.found = set()
+
+    def wants(self, data: bytes) -> bool:
+        # every reported call names one of these, or imports it under an alias
+        return any(lit in data for lit in (b"eval", b"exec", b"pickle", b"system", b"subprocess"))
+
+    def visit_Call(self, node: ast.Call, ctx: py_ast.Context) -> None:
+        name = ctx.qualname(node.func)
+        if name is None:
+            return
+        if name in ("eval", "exec", "builtins.eval", "builtins.exec"):
+            pattern = name.rsplit(".", 1)[-1] + "("
+        elif name.split(".", 1)[0] in ("pickle", "cPickle", "_pickle") and name.rsplit(".", 1)[-1].startswith("load"):
+            pattern = "pickle.load"
+        elif name == "os.system":
+            pattern = "os.system"
+        elif name.startswith("subprocess."):
+            pattern = "subprocess"
+        else:
+            return
+        self.found.add((node.lineno, pattern))
+
+    def result(self, ctx: py_ast.Context) -> List[List[Any]]:
+        return [[line, p] for line, p in sorted(self.found, key=lambda f: (f[0], BAD_PATTERNS.index(f[1])))]
+
+
+def from_hits(hits: Iterable[Hit]) -> List[List[Any]]:
+    """Engine hits → ``[[line, pattern], …]`` in line / BAD_PATTERNS order."""
+    return [
+        [h.line, h.value]
+        for h in sorted(hits, key=lambda h: (h.line, BAD_PATTERNS.index(h.value)))
+    ]
+
+
+def scan_file(entry: FileEntry) -> List[List[Any]]:
+    """
+    Per-file pass: ``[[line, pattern], …]`` for one Python file (JSON-ready) –
+    from the AST, or the text rules if the file does not parse.
+    """
+    parsed = py_ast.analyze(entry)
+    if parsed is not None:
+        return parsed["security"]
+    return from_hits(default_engine().scan(entry, families=("security",)))
+
 
-def run_security_checks(repo_path: str) -> List[str]:
+def run_security_checks(
+        repo_path: Union[FileIndex, str, Path],
+        records: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[str]:
     findings = []
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            if not file.endswith(".py"):
-                continue
-            try:
-                with open(os.path.join(root, file), "r", encoding="utf-8") as f:
-                    for i, line in enumerate(f, 1):
-                        for pattern in BAD_PATTERNS:
-                            if pattern in line:
-                                findings.append(f"{file}:{i} contains risky pattern '{pattern}'")
-            except Exception:
-                continue
+    for entry, hits in iter_file_results(ensure_index(repo_path), records, "security", scan_file):
+        for i, pattern in hits:
+            findings.append(f"{entry.name}:{i} contains risky pattern '{pattern}'")
     return findings
@@ -2,37 +2,42 @@
 """
 End-to-end static-analysis pipeline
 
+• walks the repo once into a shared file index (every analyser reads from it)
+• runs the per-file analysers only on blobs not seen before (file_records)
 • digests the repo (respecting .gitignore)
 • runs a bundle of lightweight, offline analysers
 • fetches a live hardware profile (Steam survey for desktop / placeholders for
-  cloud & mobile) and produces a naïve energy-usage model
-• renders a polished PDF report (LaTeX → PDF) that now contains a graph of the
-  energy curve ± σ (std-dev)
+  cloud & mobile) and produces a naïve energy-usage model, with Monte Carlo
+  uncertainty bands (see `energy_model`)
+• queues a polished PDF report (LaTeX → PDF, with a graph of the energy
+  curve and its band) on the background report service – the JSON does not wait
+
+With a `sampling.Budget` the per-file analysers stop once the wall-clock or
+bytes-read budget is spent; the rest of the repo is extrapolated from a
+stratified sample and the result gets a ``sampling`` section.  The score
+counts the findings actually seen; extrapolated ones are only reported.
 
 Any expensive or network-bound step is cached or guarded by time-outs so the
-route stays responsive inside the container.
+route stays responsive inside the container.  Every stage runs in a timing
+span (see `metrics`).
 """
 from __future__ import annotations
 
 import logging
-import statistics as _stats
-from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
-
-import matplotlib                            # <-- run-time dep
-matplotlib.use("Agg")                        # headless
-import matplotlib.pyplot as _plt             # noqa: E402
+from typing import Dict, Any, Iterator, Optional, Tuple, Union
 
 # ──────────── internal helpers ─────────────────────────────────────────
-from ..report.builder import generate_pdf_report
-from ..utils.git import clone_repo  # still used by /api, not here
+from ..metrics import span
+from ..report.service import default_service
 
+from .file_index         import FileIndex, build_file_index
+from .file_records       import ANALYZER_VERSION, collect_records, default_store
 from .digest             import get_repo_digest
 from .code_stats         import analyze_code_stats
 from .code_smells        import detect_code_smells
 from .docker_stats       import estimate_docker_usage
-from .energy_model       import estimate_energy
+from .energy_model       import energy_bands, estimate_energy
 from .security           import run_security_checks
 from .purpose            import infer_project_purpose, infer_deployment_context
 from .test_coverage      import estimate_test_coverage
@@ -40,118 +45,187 @@ from .hardware_profiles  import get_live_profile
 from .language_detector  import detect_languages
 from .api_usage          import find_api_usage
 from .secrets_scanner    import scan_for_secrets
+from .sampling           import Budget, Sample
 
 logger = logging.getLogger(__name__)
 
-# Output folder (mounted to host via docker-compose volume)
+# Output folder (mounted to host via docker-compose volume); created at startup
 REPORT_DIR = Path("data/reports")
-REPORT_DIR.mkdir(parents=True, exist_ok=True)
-
 
-# ──────────── helpers ─────────────────────────────────────────────────
-def _plot_energy(curve: Dict[int, float], target: Path) -> None:
-    """Save a simple log-log energy curve as PNG."""
-    users = sorted(curve)
-    vals  = [curve[u] for u in users]
 
-    _plt.figure(figsize=(4, 3))
-    _plt.loglog(users, vals, marker="o")
-    _plt.grid(True, which="both", ls=":")
-    _plt.xlabel("Active users")
-    _plt.ylabel("kWh per day")
-    _plt.tight_layout()
-    _plt.savefig(target, dpi=200)
-    _plt.close()
+# (stage name, partial result) – the last stage is always "result"
+Stage = Tuple[str, Dict[str, Any]]
 
 
 # ──────────── public API ──────────────────────────────────────────────
-def run_static_pipeline(repo_path: Path) -> Dict[str, Any]:
-    """Orchestrate all offline analysers and build the JSON + PDF payload."""
+def score_and_grade(n_warnings: float) -> Tuple[int, str]:
+    """Five points off per warning (1 – 100), and the grade of that score."""
+    score = max(1, min(100, 100 - n_warnings * 5))
+    grade = ("A+++" if score >= 95 else "A" if score >= 85 else "B+" if score >= 75
+    else "B" if score >= 65 else "C" if score >= 50 else "D" if score >= 30 else "F")
+    return score, grade
+
+
+def run_static_pipeline(
+        repo_path: Union[Path, FileIndex],
+        budget: Optional[Budget] = None,
+        fingerprint: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Orchestrate all offline analysers and build the JSON + PDF payload.
+
+    *repo_path* is a checkout on disk or a ready-made index – e.g. a virtual
+    tree from `git_tree.build_git_index`, which the caller closes.  *budget*
+    bounds the per-file analysis (see `sampling`).  *fingerprint* names the
+    analysed content – the commit SHA – for report de-duplication; without
+    it the file table's own fingerprint is used.
+    """
+    for _stage, data in iter_static_pipeline(repo_path, budget, fingerprint):
+        pass
+    return data
+
+
+def iter_static_pipeline(
+        repo_path: Union[Path, FileIndex],
+        budget: Optional[Budget] = None,
+        fingerprint: Optional[str] = None,
+) -> Iterator[Stage]:
+    """
+    The pipeline as a generator: yields ``(stage, partial result)`` as each
+    stage completes – digest, languages, apis, secrets, energy, security,
+    coverage, smells, score, report – and finally ``("result", payload)``
+    with the full JSON of `run_static_pipeline`.
+    """
     logger.debug("📂  Static pipeline started on %s", repo_path)
 
+    # 0. single walk: every analyser below shares this index ------------
+    if isinstance(repo_path, FileIndex):
+        index = repo_path
+    else:
+        with span("index") as s:
+            index = build_file_index(repo_path)
+            s.files = len(index)
+    repo_name = index.name
+    sample: Optional[Sample] = None
+    with span("records", files=len(index), bytes=index.total_bytes):
+        records = collect_records(index, default_store(), budget=budget)
+        if len(records) < len(index):
+            # budget spent: extrapolate the files left out
+            sample = Sample(index, records, budget)
+            records = sample.complete(records)
+
     # 1. file digest ----------------------------------------------------
-    digest = get_repo_digest(repo_path)
+    with span("digest", files=len(index)):
+        digest = get_repo_digest(index, records)
     logger.info("Digest done: %s files, %s LOC", len(digest["files"]), digest["total_loc"])
+    yield "digest", {
+        "files": len(digest["files"]),
+        "total_loc": digest["total_loc"],
+        "extensions": digest["extensions"],
+        "skipped": digest["skipped"],
+    }
 
     # 2. language mix & basic stats ------------------------------------
-    lang_breakdown, dominant_lang = detect_languages(repo_path)
-    code_stats = analyze_code_stats(digest, repo_path)
-    apis_used  = find_api_usage(repo_path)
-    secrets    = scan_for_secrets(repo_path)
+    with span("languages"):
+        lang_breakdown, dominant_lang = detect_languages(index)
+    yield "languages", {"languages": lang_breakdown, "dominant_lang": dominant_lang}
+    with span("code_stats"):
+        code_stats = analyze_code_stats(digest, index.root)
+    with span("apis"):
+        apis_used = find_api_usage(index, records)
+    yield "apis", {"apis_used": apis_used}
+    with span("secrets"):
+        secrets = scan_for_secrets(index, records)
+    yield "secrets", {"secrets_found": secrets}
     client_heavy = "typescript" in lang_breakdown
     logger.debug("Langs=%s · APIs=%s · Secrets=%s", lang_breakdown, apis_used, len(secrets))
 
     # 3. docker footprint, purpose, context ----------------------------
-    docker_stats = estimate_docker_usage(repo_path)
-    purpose      = infer_project_purpose(repo_path)
-    context      = infer_deployment_context(digest)
-    hw_profile   = get_live_profile(context)
+    with span("context"):
+        docker_stats = estimate_docker_usage(index)
+        purpose      = infer_project_purpose(index)
+        context      = infer_deployment_context(digest)
+    with span("hardware"):
+        hw_profile = get_live_profile(context)
 
     # 4. energy model ---------------------------------------------------
-    energy_profile = estimate_energy(
-        code_stats,
-        docker_stats,
-        profile_hint=context,
-        api_list=apis_used,
-        client_heavy=client_heavy,
-    )
-    energy_stdev = _stats.pstdev(energy_profile.values()) if len(energy_profile) > 1 else 0.0
+    with span("energy"):
+        energy_profile = estimate_energy(
+            code_stats,
+            docker_stats,
+            profile_hint=context,
+            api_list=apis_used,
+            client_heavy=client_heavy,
+            hardware=hw_profile,
+        )
+        bands = energy_bands(code_stats, apis_used, client_heavy, hardware=hw_profile)
+        energy_stdev = bands["stdev"][-1]          # at the largest user count
+    # user tiers as strings: what every result that went through JSON has
+    kwh = {str(users): value for users, value in energy_profile.items()}
+    yield "energy", {
+        "kwh": kwh,
+        "energy_stdev": energy_stdev,
+        "energy_bands": bands,
+        "hardware": hw_profile,
+    }
 
     # 5. security, tests, smells ---------------------------------------
-    security_report = run_security_checks(repo_path)
-    test_coverage   = estimate_test_coverage(repo_path)
-    code_smells     = detect_code_smells(str(repo_path))
+    with span("security"):
+        security_report = run_security_checks(index, records)
+    yield "security", {"security": security_report}
+    with span("tests"):
+        test_coverage = estimate_test_coverage(index, records)
+    yield "coverage", {"test_coverage": test_coverage}
+    with span("smells"):
+        code_smells = detect_code_smells(index, records)
+    yield "smells", {"smells": code_smells}
+    index.release()                    # contents no longer needed
 
     # 6. scoring & warnings --------------------------------------------
     security_warns = security_report.get("warnings", []) if isinstance(security_report, dict) else security_report
     code_warns     = code_stats.get("warnings", [])    if isinstance(code_stats, dict)    else code_stats
     all_warnings   = security_warns + code_warns + code_smells + [f"Exposed secret: {s}" for s in secrets]
 
-    score = max(1, min(100, 100 - len(all_warnings) * 5))
-    grade = ("A+++" if score >= 95 else "A" if score >= 85 else "B+" if score >= 75
-    else "B" if score >= 65 else "C" if score >= 50 else "D" if score >= 30 else "F")
+    # observed findings only: the extrapolated counts of a sample stay in ``sampling``
+    sampling = sample.report() if sample is not None else None
+    score, grade = score_and_grade(len(all_warnings))
     logger.info("✅  Score=%s · Grade=%s · Warnings=%s", score, grade, len(all_warnings))
+    yield "score", {"score": score, "grade": grade, "bullets": all_warnings[:6]}
 
-    # 7. reporting ------------------------------------------------------
-    ts          = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    report_base = REPORT_DIR / f"report_{repo_path.name}_{ts}"
-    plot_path   = report_base.with_suffix("") / "energy_plot.png"
-    plot_path.parent.mkdir(parents=True, exist_ok=True)
-    _plot_energy(energy_profile, plot_path)
-
-    pdf_path = None
-    try:
-        pdf_path = generate_pdf_report(
-            output_base=report_base,
-            ctx={
-                "repo_name": repo_path.name,
-                "digest": digest,
-                "purpose": purpose,
-                "hardware": hw_profile,
-                "docker_stats": docker_stats,
-                "code_stats": code_stats,
-                "languages": lang_breakdown,
-                "dominant_lang": dominant_lang,
-                "apis_used": apis_used,
-                "secrets_found": secrets,
-                "energy_profile": energy_profile,
-                "energy_stdev": round(energy_stdev, 2),
-                "security": security_report,
-                "coverage": test_coverage,
-                "smells": code_smells,
-                "score": score,
-                "grade": grade,
-                "warnings": all_warnings,
-                "energy_plot": plot_path.name,
-            },
-        )
-        logger.debug("PDF generated at %s", pdf_path)
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("PDF generation failed: %s", exc, exc_info=True)
+    # 7. reporting (plot + LaTeX run in the background) ------------------
+    report = default_service().submit({
+        "repo_name": repo_name,
+        "digest": digest,
+        "purpose": purpose,
+        "hardware": hw_profile,
+        "docker_stats": docker_stats,
+        "code_stats": code_stats,
+        "languages": lang_breakdown,
+        "dominant_lang": dominant_lang,
+        "apis_used": apis_used,
+        "secrets_found": secrets,
+        "energy_profile": energy_profile,
+        "energy_stdev": round(energy_stdev, 2),
+        "energy_bands": bands,
+        "sampling": sampling,
+        "security": security_report,
+        "coverage": test_coverage,
+        "smells": code_smells,
+        "score": score,
+        "grade": grade,
+        "warnings": all_warnings,
+        "energy_plot": "energy_plot.png",
+    }, fingerprint=f"{ANALYZER_VERSION}:{fingerprint or digest['files'].fingerprint}")
+    logger.debug("Report %s: %s", report["report_id"], report["status"])
+    yield "report", {
+        "pdf_url": report["pdf_url"],
+        "report_id": report["report_id"],
+        "report_status": report["status"],
+    }
 
     # 8. JSON -----------------------------------------------------------
-    return {
-        "intro":   f"Static analysis of {repo_path.name}",
+    yield "result", {
+        "intro":   f"Static analysis of {repo_name}",
         "purpose": purpose[:300],
         "hardware": hw_profile,
         "languages": lang_breakdown,
@@ -159,9 +233,15 @@ def run_static_pipeline(repo_path: Path) -> Dict[str, Any]:
         "secrets_found": secrets,
         "score":   score,
         "grade":   grade,
-        "kwh":     energy_profile,
+        "kwh":     kwh,
         "energy_stdev": energy_stdev,
+        "energy_bands": bands,
         "test_coverage": test_coverage,
         "bullets": all_warnings[:6],
-        "pdf_url": f"/reports/{pdf_path.relative_to(REPORT_DIR).parent.name}/{pdf_path.name}" if pdf_path else None,
+        "warnings": all_warnings,
+        "loc":     digest["total_loc"],
+        "sampling": sampling,             # None: every file was analysed
+        "pdf_url": report["pdf_url"],
+        "report_id": report["report_id"],
+        "report_status": report["status"],
     }
@@ -1,23 +1,90 @@
-import os
+import ast
 import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from . import loc, py_ast
+from .file_index import FileEntry, FileIndex, ensure_index, iter_file_results
 
 logger = logging.getLogger(__name__)
 
-def estimate_test_coverage(repo_path: str) -> dict:
+# test functions of a file that does not parse – by content, like the AST path
+_TEST_DEF = re.compile(rb"^[ \t]*(?:async[ \t]+)?def[ \t]+test", re.M)
+
+
+def _is_test_function(node: ast.AST) -> bool:
+    return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test")
+
+
+class TestVisitor(py_ast.Visitor):
+    """Test functions: module-level ``test*`` and ``test*`` methods of test classes."""
+
+    __test__ = False                         # not a pytest class itself
+    key = "tests"
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def wants(self, data: bytes) -> bool:
+        return b"def test" in data
+
+    def visit_Module(self, node: ast.Module, ctx: py_ast.Context) -> None:
+        self.count += sum(1 for n in node.body if _is_test_function(n))
+
+    def visit_ClassDef(self, node: ast.ClassDef, ctx: py_ast.Context) -> None:
+        bases = {(ctx.qualname(b) or "").rsplit(".", 1)[-1] for b in node.bases}
+        if node.name.startswith("Test") or any(b.endswith("TestCase") for b in bases):
+            self.count += sum(1 for n in node.body if _is_test_function(n))
+
+    def result(self, ctx: py_ast.Context) -> int:
+        return self.count
+
+
+def scan_file(entry: FileEntry) -> int:
+    """
+    Per-file pass: number of tests in one Python file – from the AST, or
+    the ``def test…`` lines if it does not parse.  Never from the file name:
+    records are shared by every file with the same contents.
+    """
+    if entry.suffix != ".py":
+        return 0
+    parsed = py_ast.analyze(entry)
+    if parsed is not None:
+        return parsed["tests"]
+    return len(_TEST_DEF.findall(entry.read_bytes()))
+
+
+def estimate_test_coverage(
+        repo_path: Union[FileIndex, str, Path],
+        records: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> dict:
+    """
+    Share of Python files that define tests (``test*`` functions, see
+    `TestVisitor`) – since analyzer version 1.6; earlier versions counted
+    files *named* like tests.  Files whose record is only an estimate (left
+    out of a budgeted run, see `sampling`) are not counted, so the share is
+    that of the sample; ``unread_py`` says how many were left out.
+    """
+    index = ensure_index(repo_path)
+    python = list(index.with_suffix(".py"))
+    total_py = sum(
+        1 for e in python
+        if records is None or records[e.path].get("loc_status") != loc.ESTIMATED
+    )
     test_files = 0
-    total_py = 0
+    test_functions = 0
 
-    for root, _, files in os.walk(repo_path):
-        for f in files:
-            if f.endswith(".py"):
-                total_py += 1
-                if "test" in f.lower():
-                    test_files += 1
+    for entry, tests in iter_file_results(index, records, "tests", scan_file):
+        test_files += 1
+        test_functions += tests
 
     percent = (test_files / total_py * 100) if total_py else 0
     logger.debug(f"Estimated test coverage: {percent:.2f}%")
     return {
         "test_files": test_files,
+        "test_functions": test_functions,
         "total_py": total_py,
-        "coverage_percent": round(percent, 1)
+        "coverage_percent": round(percent, 1),
+        **({"unread_py": len(python) - total_py} if total_py < len(python) else {}),
     }
@@ -0,0 +1,85 @@
+# backend/src/trend.py
+"""
+Trend analyses: how a repo's score, size, findings and kWh moved over its history.
+
+`analyze_trend(repo_url, commits=500)` borrows the repo's mirror from the
+shared `ClonePool` (full history – blobs over the partial-clone limit stay
+unread, as in any analysis) and walks its last *commits* first-parent
+commits with `static_analyzer.commit_walk.CommitWalk`: the oldest tree is
+analysed once, then every commit only re-analyses the files it changes.
+Per-file records come from and go to the shared record store, so a repeated
+or extended trend – or a later full analysis – mostly reads records.
+
+The response holds one point per commit, oldest first: commit SHA and
+time, score and grade, LOC, file count, warnings and findings by kind,
+detected APIs and languages, test coverage, deployment context and the kWh
+curve per user tier.
+
+    SYPEC_TREND_MAX_COMMITS   longest history one trend may walk (default 5000)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Optional
+
+from backend.src.analysis import clones
+from backend.src.metrics import span, trace
+from backend.src.static_analyzer.commit_walk import CommitWalk
+from backend.src.static_analyzer.file_records import ANALYZER_VERSION, default_store
+
+logger = logging.getLogger(__name__)
+
+MAX_TREND_COMMITS = int(os.getenv("SYPEC_TREND_MAX_COMMITS", "5000"))
+
+
+def analyze_trend(
+        repo_url: str,
+        commits: int = 500,
+        ref: str = "HEAD",
+        timings: bool = False,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Score, LOC, findings and kWh for each of the last *commits* first-parent
+    commits up to *ref* of *repo_url* (blocking).
+
+    *on_stage("trend", {"done", "total"})* reports progress as the walk
+    advances; *timings* adds the spans as ``timings``.
+    """
+    if not 1 <= commits <= MAX_TREND_COMMITS:
+        raise ValueError(f"commits must be between 1 and {MAX_TREND_COMMITS}")
+
+    def progress(done: int, total: int) -> None:
+        if on_stage is not None:
+            on_stage("trend", {"done": done, "total": total})
+
+    start = time.perf_counter()
+    with trace() as t:
+        with span("analysis"):
+            with ExitStack() as stack:
+                with span("resolve"):
+                    mirror, head_sha = stack.enter_context(clones.borrow(repo_url, ref=ref))
+                walk = CommitWalk(mirror, default_store())
+                with span("walk") as s:
+                    points = walk.run(head_sha, commits, progress)
+                    s.files = walk.analysed
+    seconds = time.perf_counter() - start
+    logger.info(
+        "Trend of %s: %s commits up to %s in %.1fs (%s files analysed)",
+        repo_url, len(points), head_sha[:10], seconds, walk.analysed,
+    )
+    response = {
+        "repo_url": repo_url,
+        "head": head_sha,
+        "commits": len(points),
+        "analysed_files": walk.analysed,
+        "seconds": round(seconds, 3),
+        "analyzer_version": ANALYZER_VERSION,
+        "points": points,
+    }
+    if timings:
+        response["timings"] = t.to_dict()
+    return response
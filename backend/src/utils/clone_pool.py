@@ -0,0 +1,296 @@
+# backend/src/utils/clone_pool.py
+"""
+Managed clone cache: one bare mirror per repo URL, throw-away workspaces.
+
+Instead of a fresh full clone into an ever-growing ``/tmp`` for every
+request, each repo is mirrored once (partial clone: blobs above
+SYPEC_BLOB_LIMIT are never downloaded) and then only updated with
+incremental fetches.  Mirrors are bare clones of branches and tags only
+(`REFSPECS`) – not ``--mirror``, which would also pull every
+``refs/pull/*`` on GitHub; other refs are fetched when asked for.  Analyses check out into a `git worktree` of the
+mirror, which is removed again when the `checkout()` block exits.  Blobs
+the filter skipped are left out of the checkout (sparse patterns) instead of
+being lazily fetched.
+
+Mirrors are evicted least-recently-used first once the cache exceeds its
+disk quota, checked after a borrow whose clone or fetch added bytes.  Every borrower – in any process – holds a shared `flock` on the
+mirror's pin file; eviction skips a mirror whose pin it cannot lock
+exclusively.  Everything works against local ``file://`` repositories.
+
+    SYPEC_CLONE_CACHE_DIR   cache root            (default data/cache/clones)
+    SYPEC_CLONE_QUOTA_MB    disk quota            (default 5120)
+    SYPEC_BLOB_LIMIT        partial-clone filter  (default 1m, "" = full clone)
+"""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.getenv("SYPEC_CLONE_CACHE_DIR", "data/cache/clones"))
+QUOTA_BYTES = int(float(os.getenv("SYPEC_CLONE_QUOTA_MB", "5120")) * 1024 * 1024)
+BLOB_LIMIT = os.getenv("SYPEC_BLOB_LIMIT", "1m")
+
+# what a mirror holds and fetches: branches and tags
+REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+
+class CloneError(RuntimeError):
+    """A git operation on the clone cache failed."""
+
+
+def _git(*args: str, cwd: Optional[Path] = None) -> str:
+    proc = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+    if proc.returncode != 0:
+        raise CloneError(f"git {args[0]} failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(root, f)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _sparse_escape(path: str) -> str:
+    return re.sub(r"([\\*?\[\]!#])", r"\\\1", path)
+
+
+class Workspace:
+    """A checked-out commit of a mirrored repo (valid inside `checkout()`)."""
+
+    def __init__(self, repo_url: str, path: Path, commit: str, mirror: Path, skipped: List[str]) -> None:
+        self.repo_url = repo_url
+        self.path = path
+        self.commit = commit
+        self.mirror = mirror
+        self.skipped = skipped             # paths left out by the blob filter
+
+
+class ClonePool:
+    """Bare mirrors + per-analysis worktrees under one quota-managed directory."""
+
+    def __init__(
+            self,
+            root: Path = CACHE_DIR,
+            quota_bytes: int = QUOTA_BYTES,
+            blob_limit: str = BLOB_LIMIT,
+    ) -> None:
+        self.root = Path(root).absolute()          # git runs with other cwds
+        self.mirrors_dir = self.root / "mirrors"
+        self.workspaces_dir = self.root / "workspaces"
+        self.quota_bytes = quota_bytes
+        self.blob_limit = blob_limit
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._grown = threading.Event()            # bytes added since the last `evict`
+
+    # ------------------------------------------------------------------
+    def _mirror_path(self, repo_url: str) -> Path:
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", repo_url.rstrip("/").rsplit("/", 1)[-1])
+        digest = hashlib.sha1(repo_url.encode()).hexdigest()[:16]
+        return self.mirrors_dir / f"{digest}-{name}"
+
+    @contextmanager
+    def _locked(self, mirror: Path) -> Iterator[None]:
+        """Serialise work on one mirror across threads *and* processes."""
+        with self._guard:
+            lock = self._locks.setdefault(str(mirror), threading.Lock())
+        self.mirrors_dir.mkdir(parents=True, exist_ok=True)
+        with lock, open(f"{mirror}.lock", "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _pinned(self, mirror: Path) -> Iterator[None]:
+        """Shared lock on *mirror*'s pin file: `evict` leaves it alone, in any process."""
+        self.mirrors_dir.mkdir(parents=True, exist_ok=True)
+        with open(f"{mirror}.pin", "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _has_commit(self, mirror: Path, commit: str) -> bool:
+        try:
+            _git("cat-file", "-e", f"{commit}^{{commit}}", cwd=mirror)
+            return True
+        except CloneError:
+            return False
+
+    def mirror(self, repo_url: str, commit: Optional[str] = None) -> Path:
+        """
+        Return an up-to-date bare mirror of *repo_url*.
+
+        Creates it on first use; otherwise fetches incrementally – unless
+        *commit* is given and already present, in which case git is not
+        contacted at all.
+        """
+        mirror = self._mirror_path(repo_url)
+        with self._locked(mirror):
+            if not (mirror / "HEAD").exists():
+                tmp = mirror.with_name(f"{mirror.name}.tmp-{uuid.uuid4().hex[:8]}")
+                args = ["clone", "--bare", "--quiet"]
+                if self.blob_limit:
+                    args.append(f"--filter=blob:limit={self.blob_limit}")
+                log.info("Mirroring %s …", repo_url)
+                try:
+                    _git(*args, repo_url, str(tmp))
+                except CloneError:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    raise
+                os.replace(tmp, mirror)
+                self._grown.set()
+            # a known commit already in the mirror needs no fetch at all
+            elif not (commit and self._has_commit(mirror, commit)):
+                log.debug("Fetching into mirror %s", mirror.name)
+                before = _dir_size(mirror / "objects")
+                _git("fetch", "--prune", "--quiet", "origin", *REFSPECS, cwd=mirror)
+                if _dir_size(mirror / "objects") > before:
+                    self._grown.set()
+        os.utime(mirror)                                  # LRU bookkeeping
+        return mirror
+
+    def _missing_blobs(self, mirror: Path, commit: str) -> List[str]:
+        """Paths in *commit* whose blobs the partial-clone filter skipped."""
+        listing = _git("rev-list", "--objects", "--no-walk", "--missing=print", commit, cwd=mirror)
+        missing: Set[str] = {line[1:] for line in listing.splitlines() if line.startswith("?")}
+        if not missing:
+            return []
+        paths = []
+        for item in _git("ls-tree", "-r", "-z", commit, cwd=mirror).split("\0"):
+            meta, _, path = item.partition("\t")
+            if path and meta.split()[2] in missing:
+                paths.append(path)
+        return paths
+
+    @contextmanager
+    def borrow(self, repo_url: str, ref: str = "HEAD", commit: Optional[str] = None) -> Iterator[Tuple[Path, str]]:
+        """
+        Yield ``(mirror, commit SHA)`` with the mirror pinned against eviction.
+
+        For readers that work straight off the object database (see
+        `static_analyzer.git_tree`) – no checkout at all.
+        """
+        pinned = self._mirror_path(repo_url)
+        try:
+            with self._pinned(pinned):                 # before the mirror exists: no gap
+                mirror = self.mirror(repo_url, commit)
+                sha = self.rev_parse(mirror, commit or ref)
+                yield mirror, sha
+        finally:
+            if self._grown.is_set():
+                self.evict()
+
+    def rev_parse(self, mirror: Path, ref: str) -> str:
+        """
+        Commit SHA of *ref* (branch, tag, SHA) in *mirror*.  A full ref name
+        outside `REFSPECS` (``refs/pull/<n>/head``) is fetched on first use.
+        """
+        try:
+            return _git("rev-parse", f"{ref}^{{commit}}", cwd=mirror).strip()
+        except CloneError:
+            if not ref.startswith("refs/"):
+                raise
+        with self._locked(mirror):
+            log.debug("Fetching %s into mirror %s", ref, mirror.name)
+            _git("fetch", "--quiet", "origin", f"+{ref}:{ref}", cwd=mirror)
+        self._grown.set()
+        return _git("rev-parse", f"{ref}^{{commit}}", cwd=mirror).strip()
+
+    @contextmanager
+    def checkout(self, repo_url: str, ref: str = "HEAD", commit: Optional[str] = None) -> Iterator[Workspace]:
+        """
+        Check out *ref* (or the exact *commit*) into a temporary worktree.
+
+        The worktree is removed when the block exits, then the quota is
+        enforced.
+        """
+        with self.borrow(repo_url, ref, commit) as (mirror, sha):
+            ws_path = self.workspaces_dir / f"{mirror.name.split('-', 1)[1]}_{uuid.uuid4().hex[:8]}"
+            try:
+                with self._locked(mirror):
+                    self.workspaces_dir.mkdir(parents=True, exist_ok=True)
+                    _git("worktree", "add", "--detach", "--no-checkout", str(ws_path), sha, cwd=mirror)
+
+                skipped = self._missing_blobs(mirror, sha) if self.blob_limit else []
+                args = ["read-tree", "-mu", "HEAD"]
+                if skipped:
+                    git_dir = Path(_git("rev-parse", "--absolute-git-dir", cwd=ws_path).strip())
+                    (git_dir / "info").mkdir(exist_ok=True)
+                    (git_dir / "info" / "sparse-checkout").write_text(
+                        "/*\n" + "".join(f"!/{_sparse_escape(p)}\n" for p in skipped)
+                    )
+                    args = ["-c", "core.sparseCheckout=true", *args]
+                    log.debug("Skipping %s oversized blobs in checkout", len(skipped))
+                _git(*args, cwd=ws_path)
+
+                yield Workspace(repo_url, ws_path, sha, mirror, skipped)
+            finally:
+                self._remove_worktree(mirror, ws_path)
+
+    def _remove_worktree(self, mirror: Path, ws_path: Path) -> None:
+        with self._locked(mirror):
+            try:
+                _git("worktree", "remove", "--force", str(ws_path), cwd=mirror)
+            except CloneError:
+                shutil.rmtree(ws_path, ignore_errors=True)
+                try:
+                    _git("worktree", "prune", cwd=mirror)
+                except CloneError:
+                    pass
+
+    # ------------------------------------------------------------------
+    def evict(self) -> None:
+        """Drop least-recently-used mirrors that are not in use until under quota."""
+        self._grown.clear()
+        if not self.mirrors_dir.exists():
+            return
+        mirrors = [p for p in self.mirrors_dir.iterdir() if p.is_dir() and (p / "HEAD").exists()]
+        sizes = {p: _dir_size(p) for p in mirrors}
+        total = sum(sizes.values())
+        if self.workspaces_dir.exists():
+            total += _dir_size(self.workspaces_dir)
+        if total <= self.quota_bytes:
+            return
+
+        for mirror in sorted(mirrors, key=lambda p: p.stat().st_mtime):
+            if total <= self.quota_bytes:
+                break
+            with self._locked(mirror), open(f"{mirror}.pin", "w") as pin:
+                try:
+                    fcntl.flock(pin, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue                           # borrowed, here or in another process
+                try:
+                    shutil.rmtree(mirror, ignore_errors=True)
+                finally:
+                    fcntl.flock(pin, fcntl.LOCK_UN)
+            total -= sizes[mirror]
+            log.info("Clone cache evicted %s (%.1f MB)", mirror.name, sizes[mirror] / 2**20)
@@ -1,12 +1,21 @@
-import tempfile
-from pathlib import Path
-import git
+from typing import Optional
 
 
-def clone_repo(repo_url: str) -> Path:
-    tmp_dir = tempfile.mkdtemp(prefix="repo_")
+def resolve_remote_head(repo_url: str, ref: str = "HEAD") -> Optional[str]:
+    """
+    Cheap ref lookup (`git ls-remote`, no objects transferred).
+
+    Returns the commit SHA *ref* points to, or None if the remote cannot be
+    reached – callers treat that as "unknown, don't use the cache".
+    """
+    import git                      # GitPython: on first use, not at import
+
     try:
-        git.Repo.clone_from(repo_url, tmp_dir, depth=1)
-    except Exception as e:
-        raise RuntimeError(f"Failed to clone repo: {e}")
-    return Path(tmp_dir)
+        out = git.cmd.Git().ls_remote(repo_url, ref)
+    except Exception:
+        return None
+    for line in out.splitlines():
+        sha, _, name = line.partition("\t")
+        if name == ref or name.endswith("/" + ref):
+            return sha.strip() or None
+    return None
@@ -0,0 +1,513 @@
+# backend/src/work_queue.py
+"""
+Shared job queue on SQLite: API processes enqueue, worker processes run.
+
+`JobQueue` runs analyses on a thread pool inside the API process.  With
+SYPEC_QUEUE=sqlite the API only enqueues them into a SQLite file on a
+volume every node shares; `backend.src.worker` processes (any number, on
+any host that mounts it) claim and run them.  No broker – the database's
+write lock (``BEGIN IMMEDIATE``) serialises claims.
+
+Jobs are leased, not popped:
+
+• `LeaseQueue.claim` hands a queued job to one worker and sets a lease that
+  expires SYPEC_LEASE_S later; the worker's heartbeat renews it every
+  SYPEC_HEARTBEAT_S while the job runs.
+• A worker that crashes stops renewing.  The next claim by anyone sweeps
+  expired leases: the job goes back to ``queued`` (its visibility timeout)
+  and is picked up again – or ``failed`` once it has used its attempts.
+• A failing job is retried after an exponential backoff with jitter
+  (SYPEC_RETRY_BASE_S · 2ⁿ⁻¹, at most SYPEC_RETRY_MAX_S) up to
+  SYPEC_MAX_ATTEMPTS attempts.
+• Completing, failing and heartbeating check the lease owner, so a worker
+  whose lease was taken over cannot overwrite the new owner's outcome.
+
+An identical job (same kind and parameters) that is still queued or running
+is reused instead of enqueued twice – the cross-process counterpart of the
+`singleflight` coalescing inside one process.  Stage events a worker
+publishes are stored per job and attempt, so `/analyze/stream` keeps
+streaming them; only the current attempt's events are streamed, and a worker
+whose lease was taken over publishes nothing more.  Finished jobs and their
+events are deleted SYPEC_QUEUE_RETENTION_S after they finished, by whichever
+process claims next (at most once per SYPEC_QUEUE_SWEEP_S).
+
+`SharedJobQueue` is the API side: the `JobQueue` interface (``submit``,
+``get``, ``stats``) on top of a `LeaseQueue`, with one poller thread that
+relays events and resolves the futures of the jobs it submitted.
+
+    SYPEC_QUEUE               local | sqlite               (default local)
+    SYPEC_QUEUE_PATH          SQLite file                  (default data/queue/jobs.sqlite)
+    SYPEC_QUEUE_POLL_S        poll period, API and workers (default 0.5)
+    SYPEC_SHARED_MAX_QUEUE    queued jobs allowed          (default 1000)
+    SYPEC_LEASE_S             lease / visibility timeout   (default 60)
+    SYPEC_HEARTBEAT_S         lease renewal period         (default lease / 4)
+    SYPEC_MAX_ATTEMPTS        tries per job                (default 3)
+    SYPEC_RETRY_BASE_S        first retry delay            (default 5)
+    SYPEC_RETRY_MAX_S         longest retry delay          (default 300)
+    SYPEC_QUEUE_JOURNAL       SQLite journal mode          (default WAL)
+    SYPEC_QUEUE_RETENTION_S   finished jobs kept for       (default 604800, a week)
+    SYPEC_QUEUE_SWEEP_S       retention sweep period       (default 60)
+
+WAL needs shared memory, i.e. every process on one host (containers sharing
+a volume included).  Nodes that share the file over a network filesystem
+must use SYPEC_QUEUE_JOURNAL=DELETE and a filesystem with working POSIX locks.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.src.analysis import analyze_repo
+from backend.src.diff import analyze_diff
+from backend.src.jobs import Job, QueueFull
+from backend.src.trend import analyze_trend
+
+logger = logging.getLogger(__name__)
+
+QUEUE_BACKEND = os.getenv("SYPEC_QUEUE", "local")
+QUEUE_PATH = Path(os.getenv("SYPEC_QUEUE_PATH", "data/queue/jobs.sqlite"))
+POLL_S = float(os.getenv("SYPEC_QUEUE_POLL_S", "0.5"))
+SHARED_MAX_QUEUE = int(os.getenv("SYPEC_SHARED_MAX_QUEUE", "1000"))
+LEASE_S = float(os.getenv("SYPEC_LEASE_S", "60"))
+HEARTBEAT_S = float(os.getenv("SYPEC_HEARTBEAT_S", str(LEASE_S / 4)))
+MAX_ATTEMPTS = int(os.getenv("SYPEC_MAX_ATTEMPTS", "3"))
+RETRY_BASE_S = float(os.getenv("SYPEC_RETRY_BASE_S", "5"))
+RETRY_MAX_S = float(os.getenv("SYPEC_RETRY_MAX_S", "300"))
+JOURNAL_MODE = os.getenv("SYPEC_QUEUE_JOURNAL", "WAL").upper()
+RETENTION_S = float(os.getenv("SYPEC_QUEUE_RETENTION_S", str(7 * 24 * 3600)))
+SWEEP_S = float(os.getenv("SYPEC_QUEUE_SWEEP_S", "60"))
+
+# a worker whose last beat is older than this counts as gone
+WORKER_STALE_S = 3 * HEARTBEAT_S
+
+# job kind → function run by the worker as ``fn(**params, on_stage=…)``
+JOB_KINDS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "analyze": analyze_repo,
+    "diff": analyze_diff,
+    "trend": analyze_trend,
+}
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT    PRIMARY KEY,
+    kind          TEXT    NOT NULL,
+    params        TEXT    NOT NULL,
+    dedupe        TEXT    NOT NULL,
+    status        TEXT    NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    available_at  REAL    NOT NULL,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    submitted_at  REAL    NOT NULL,
+    started_at    REAL,
+    finished_at   REAL,
+    result        TEXT,
+    error         TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (status, lease_expires);
+CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe, status);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (status, finished_at);
+
+CREATE TABLE IF NOT EXISTS events (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id  TEXT    NOT NULL,
+    attempt INTEGER NOT NULL DEFAULT 1,
+    stage   TEXT    NOT NULL,
+    data    TEXT
+);
+CREATE INDEX IF NOT EXISTS events_job ON events (job_id, seq);
+
+CREATE TABLE IF NOT EXISTS workers (
+    id           TEXT    PRIMARY KEY,
+    concurrency  INTEGER NOT NULL,
+    running      INTEGER NOT NULL DEFAULT 0,
+    started_at   REAL    NOT NULL,
+    heartbeat_at REAL    NOT NULL
+);
+"""
+
+
+class JobFailed(RuntimeError):
+    """A shared job ended ``failed``; the message is the worker's last error."""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def backoff(attempt: int, base: float = RETRY_BASE_S, cap: float = RETRY_MAX_S) -> float:
+    """Delay before retry number *attempt* (1-based): capped exponential, half jittered."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+class LeaseQueue:
+    """The SQLite job table; one instance per process, safe to share between threads."""
+
+    def __init__(
+            self,
+            path: Path = QUEUE_PATH,
+            lease_s: float = LEASE_S,
+            max_attempts: int = MAX_ATTEMPTS,
+            max_queue: int = SHARED_MAX_QUEUE,
+            retention_s: float = RETENTION_S,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_s = lease_s
+        self.max_attempts = max(1, max_attempts)
+        self.max_queue = max_queue
+        self.retention_s = retention_s
+        self._swept_at = 0.0
+        # autocommit: transactions are opened explicitly, claims with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if "attempt" not in {r["name"] for r in self._conn.execute("PRAGMA table_info(events)")}:
+            self._conn.execute("ALTER TABLE events ADD COLUMN attempt INTEGER NOT NULL DEFAULT 1")
+        self._lock = threading.Lock()
+
+    def _write(self, sql: str, args: tuple = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, args).rowcount
+
+    # ── API side ──────────────────────────────────────────────────────
+    def enqueue(self, kind: str, params: Dict[str, Any], max_attempts: Optional[int] = None) -> Tuple[str, bool]:
+        """
+        ``(job_id, reused)``: queue *kind* with *params*, or return the identical
+        job that is still queued or running.  Raises `QueueFull`.
+        """
+        raw = _dumps(params)
+        dedupe = hashlib.sha256(f"{kind}\0{json.dumps(params, sort_keys=True, default=str)}".encode()).hexdigest()
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe = ? AND status IN (?, ?) LIMIT 1",
+                    (dedupe, QUEUED, RUNNING),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("COMMIT")
+                    return row["id"], True
+                queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+                if queued >= self.max_queue:
+                    raise QueueFull(f"{queued} jobs queued in the shared queue (limit {self.max_queue})")
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, params, dedupe, status, max_attempts, available_at, submitted_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, raw, dedupe, QUEUED, max_attempts or self.max_attempts, now, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id, False
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([job_id]).get(job_id)
+
+    def get_many(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not job_ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE id IN ({','.join('?' * len(job_ids))})", job_ids
+            ).fetchall()
+        return {r["id"]: dict(r) for r in rows}
+
+    def events(self, job_id: str, after: int = 0) -> List[Tuple[int, str, Any]]:
+        """
+        ``(seq, stage, data)`` published for *job_id* after sequence number
+        *after* – by its current attempt only, not by the ones that failed.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, stage, data FROM events WHERE job_id = ? AND seq > ?"
+                " AND attempt = (SELECT attempts FROM jobs WHERE id = ?) ORDER BY seq",
+                (job_id, after, job_id),
+            ).fetchall()
+        return [(r["seq"], r["stage"], json.loads(r["data"]) if r["data"] else None) for r in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Jobs per status plus the live workers and their total concurrency."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            workers, slots = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(concurrency), 0) FROM workers WHERE heartbeat_at >= ?",
+                (time.time() - WORKER_STALE_S,),
+            ).fetchone()
+        return {**{s: counts.get(s, 0) for s in (QUEUED, RUNNING, DONE, FAILED)}, "workers": workers, "slots": slots}
+
+    # ── worker side ───────────────────────────────────────────────────
+    def claim(self, owner: str, kinds: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest runnable job to *owner* (None if there is none),
+        after requeueing or failing the jobs whose lease has expired.
+        """
+        kinds = list(kinds or JOB_KINDS)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._reap(now)
+                if now - self._swept_at >= SWEEP_S:
+                    self._sweep(now)
+                row = self._conn.execute(
+                    f"SELECT * FROM jobs WHERE status = ? AND available_at <= ?"
+                    f" AND kind IN ({','.join('?' * len(kinds))}) ORDER BY available_at LIMIT 1",
+                    (QUEUED, now, *kinds),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?,"
+                        " attempts = attempts + 1, started_at = ? WHERE id = ?",
+                        (RUNNING, owner, now + self.lease_s, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = dict(row)
+        job["attempts"] += 1
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def _reap(self, now: float) -> None:
+        """Expired leases (crashed or stuck workers): retry later, or fail for good (lock and transaction held)."""
+        expired = self._conn.execute(
+            "SELECT id, attempts, max_attempts, lease_owner FROM jobs WHERE status = ? AND lease_expires < ?",
+            (RUNNING, now),
+        ).fetchall()
+        for job in expired:
+            error = f"lease of {job['lease_owner']} expired (attempt {job['attempts']})"
+            logger.warning("Job %s: %s", job["id"], error)
+            if job["attempts"] >= job["max_attempts"]:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, lease_expires = NULL, finished_at = ?, error = ? WHERE id = ?",
+                    (FAILED, now, error, job["id"]),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, available_at = ?, error = ? WHERE id = ?",
+                    (QUEUED, now + backoff(job["attempts"]), error, job["id"]),
+                )
+
+    def _sweep(self, now: float) -> None:
+        """Delete jobs finished more than `retention_s` ago and their events (lock and transaction held)."""
+        self._swept_at = now
+        args = (DONE, FAILED, now - self.retention_s)
+        finished = "SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?"
+        self._conn.execute(f"DELETE FROM events WHERE job_id IN ({finished})", args)
+        deleted = self._conn.execute(f"DELETE FROM jobs WHERE id IN ({finished})", args).rowcount
+        if deleted:
+            logger.info("Deleted %s jobs finished over %.0fs ago", deleted, self.retention_s)
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        """Extend *owner*'s lease on *job_id*; False if the lease was lost."""
+        return self._write(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = ?",
+            (time.time() + self.lease_s, job_id, owner, RUNNING),
+        ) == 1
+
+    def publish(self, job_id: str, owner: str, attempt: int, stage: str, data: Any) -> bool:
+        """Store a stage event of *attempt*; False (and nothing stored) if *owner* no longer holds it."""
+        return self._write(
+            "INSERT INTO events (job_id, attempt, stage, data) SELECT ?, ?, ?, ?"
+            " WHERE EXISTS (SELECT 1 FROM jobs WHERE id = ? AND lease_owner = ? AND attempts = ? AND status = ?)",
+            (job_id, attempt, stage, _dumps(data), job_id, owner, attempt, RUNNING),
+        ) == 1
+
+    def complete(self, job_id: str, owner: str, result: Dict[str, Any]) -> bool:
+        """Store *result*; False (and nothing stored) if *owner* no longer holds the lease."""
+        return self._write(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ?, lease_expires = NULL"
+            " WHERE id = ? AND lease_owner = ? AND status = ?",
+            (DONE, _dumps(result), time.time(), job_id, owner, RUNNING),
+        ) == 1
+
+    def fail(self, job_id: str, owner: str, error: str, retry: bool = True) -> Optional[str]:
+        """
+        Record a failed attempt: back to ``queued`` after a backoff while
+        attempts remain (and *retry*), else ``failed``.  Returns the new status,
+        None if *owner* no longer holds the lease.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ? AND status = ?",
+                (job_id, owner, RUNNING),
+            ).fetchone()
+            if row is None:
+                return None
+            if retry and row["attempts"] < row["max_attempts"]:
+                status, sets, args = QUEUED, "lease_owner = NULL, available_at = ?", (now + backoff(row["attempts"]),)
+            else:
+                status, sets, args = FAILED, "finished_at = ?", (now,)
+            updated = self._conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, lease_expires = NULL, {sets}"
+                " WHERE id = ? AND lease_owner = ? AND status = ?",
+                (status, error, *args, job_id, owner, RUNNING),
+            ).rowcount
+        return status if updated else None
+
+    def beat(self, worker_id: str, concurrency: int, running: int) -> None:
+        """Liveness row of a worker process (for `stats` and `/metrics`)."""
+        now = time.time()
+        self._write(
+            "INSERT INTO workers (id, concurrency, running, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (id) DO UPDATE SET running = excluded.running, heartbeat_at = excluded.heartbeat_at",
+            (worker_id, concurrency, running, now, now),
+        )
+
+    def retire(self, worker_id: str) -> None:
+        self._write("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+def _ts(value: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(value) if value is not None else None
+
+
+class SharedJob(Job):
+    """A `Job` backed by a row of the shared queue."""
+
+    def __init__(self, job_id: str, params: Dict[str, Any]) -> None:
+        super().__init__(job_id, params)
+        self.attempts = 0
+        self.worker: Optional[str] = None
+
+    def update(self, row: Dict[str, Any]) -> None:
+        self.status = row["status"]
+        self.attempts = row["attempts"]
+        self.worker = row["lease_owner"]
+        self.submitted_at = _ts(row["submitted_at"])
+        self.started_at = _ts(row["started_at"])
+        self.finished_at = _ts(row["finished_at"])
+        self.result = json.loads(row["result"]) if row["result"] else None
+        self.error = row["error"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**super().to_dict(), "attempts": self.attempts, "worker": self.worker}
+
+
+class SharedJobQueue:
+    """`JobQueue` interface over a `LeaseQueue`: enqueue here, run in `backend.src.worker`."""
+
+    def __init__(self, queue: Optional[LeaseQueue] = None, poll_s: float = POLL_S) -> None:
+        self._queue = queue                 # opened on first use, not at import of the API
+        self.poll_s = poll_s
+        # job id → [job, on_stage, last event seq] per submitter awaiting it here
+        self._watched: Dict[str, List[list]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+
+    @property
+    def queue(self) -> LeaseQueue:
+        with self._lock:
+            if self._queue is None:
+                self._queue = LeaseQueue()
+            return self._queue
+
+    def submit(self, fn: Callable[..., Dict[str, Any]], **params: Any) -> SharedJob:
+        """Enqueue ``fn(**params)``; its ``future`` resolves when a worker finishes it."""
+        on_stage = params.pop("on_stage", None)
+        kind = next((k for k, f in JOB_KINDS.items() if f is fn), None)
+        if kind is None:
+            raise ValueError(f"{getattr(fn, '__name__', fn)!r} is not a shared job kind")
+        job_id, reused = self.queue.enqueue(kind, params)
+        if reused:
+            logger.info("Joined queued job %s", job_id)
+
+        job = SharedJob(job_id, params)
+        job.future = Future()
+        with self._lock:
+            self._watched.setdefault(job_id, []).append([job, on_stage, 0])
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll_loop, name="sypec-queue-poll", daemon=True)
+                self._poller.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[SharedJob]:
+        row = self.queue.get(job_id)
+        if row is None:
+            return None
+        job = SharedJob(job_id, json.loads(row["params"]))
+        job.update(row)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        counts = self.queue.stats()
+        return {
+            "in_flight": counts[QUEUED] + counts[RUNNING],
+            "max_workers": counts["slots"],
+            "max_queue": self.queue.max_queue,
+            "workers": counts["workers"],
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        if wait and self._poller is not None:
+            self._poller.join()
+
+    # ------------------------------------------------------------------
+    def _poll_loop(self) -> None:
+        while not self._stop.wait(self.poll_s):
+            try:
+                self._poll()
+            except sqlite3.Error as exc:
+                logger.warning("Shared queue poll failed: %s", exc)
+
+    def _poll(self) -> None:
+        with self._lock:
+            watched = {job_id: list(watchers) for job_id, watchers in self._watched.items()}
+        # status first: every event published before the outcome is then relayed too
+        rows = self.queue.get_many(list(watched))
+        for job_id, watchers in watched.items():
+            for watcher in watchers:
+                _, on_stage, seq = watcher
+                if on_stage is None:
+                    continue
+                for seq, stage, data in self.queue.events(job_id, seq):
+                    try:
+                        on_stage(stage, data)
+                    except Exception:  # noqa: BLE001 – a gone client must not stop the poller
+                        logger.exception("Stage listener of job %s failed", job_id)
+                watcher[2] = seq
+            row = rows.get(job_id)
+            if row is None or row["status"] not in (DONE, FAILED):
+                continue
+            with self._lock:
+                del self._watched[job_id]
+            for job, _, _ in watchers:
+                job.update(row)
+                if row["status"] == DONE:
+                    job.future.set_result(job.result)
+                else:
+                    job.future.set_exception(JobFailed(job.error or "job failed"))
@@ -0,0 +1,167 @@
+# backend/src/worker.py
+"""
+Worker process for the shared job queue (see `work_queue`).
+
+    python -m backend.src.worker [--concurrency N] [--queue PATH]
+
+Runs *N* claim loops: each leases the next job from the SQLite queue, runs
+it (`work_queue.JOB_KINDS`) with its stage events written back for
+streaming clients, and stores the result – or records the failure, which
+the queue retries with backoff.  One heartbeat thread renews the leases of
+every running job and the worker's liveness row.
+
+SIGTERM / SIGINT stop claiming and let the running jobs finish; a second
+signal exits at once.  Jobs of a worker that dies without finishing are
+re-queued by the next claim once their lease has expired.  Start as many
+workers as you like, on any host that mounts the queue, cache and report
+volumes.  Analysers, templates and profiles are warmed before the first
+claim (`preload`).
+
+    SYPEC_WORKER_CONCURRENCY   jobs run at once per worker   (default SYPEC_MAX_WORKERS)
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import traceback
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.src.jobs import MAX_WORKERS
+from backend.src.preload import PRELOAD, preload
+from backend.src.report.service import default_service
+from backend.src.work_queue import HEARTBEAT_S, JOB_KINDS, POLL_S, QUEUE_PATH, LeaseQueue
+
+logger = logging.getLogger(__name__)
+
+WORKER_CONCURRENCY = int(os.getenv("SYPEC_WORKER_CONCURRENCY", str(MAX_WORKERS)))
+
+
+class Worker:
+    """*concurrency* claim loops plus a heartbeat thread over one `LeaseQueue`."""
+
+    def __init__(
+            self,
+            queue: LeaseQueue,
+            concurrency: int = WORKER_CONCURRENCY,
+            poll_s: float = POLL_S,
+            heartbeat_s: float = HEARTBEAT_S,
+    ) -> None:
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.poll_s = poll_s
+        self.heartbeat_s = heartbeat_s
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stopping = threading.Event()
+        self._finished = threading.Event()
+        self._running: Dict[str, str] = {}            # job id → kind
+        self._lock = threading.Lock()
+
+    def run(self) -> None:
+        """Claim and run jobs until `stop`; returns once the running jobs have finished."""
+        logger.info("Worker %s: %s slots on %s", self.id, self.concurrency, self.queue.path)
+        self.queue.beat(self.id, self.concurrency, 0)
+        beat = threading.Thread(target=self._heartbeat_loop, name="sypec-heartbeat", daemon=True)
+        beat.start()
+        slots = [
+            threading.Thread(target=self._claim_loop, name=f"sypec-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        for t in slots:
+            t.start()
+        for t in slots:
+            t.join()
+        self._finished.set()
+        beat.join()
+        self.queue.retire(self.id)
+        logger.info("Worker %s stopped", self.id)
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    # ------------------------------------------------------------------
+    def _claim_loop(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                job = self.queue.claim(self.id)
+            except sqlite3.Error as exc:               # e.g. locked past the timeout
+                logger.warning("Claim failed: %s", exc)
+                job = None
+            if job is None:
+                self.stopping.wait(self.poll_s)
+                continue
+            with self._lock:
+                self._running[job["id"]] = job["kind"]
+            try:
+                self._execute(job)
+            finally:
+                with self._lock:
+                    del self._running[job["id"]]
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        logger.info("Job %s (%s, attempt %s/%s) started", job_id, job["kind"], job["attempts"], job["max_attempts"])
+
+        def on_stage(stage: str, data: Any) -> None:
+            self.queue.publish(job_id, self.id, job["attempts"], stage, data)
+
+        try:
+            result = JOB_KINDS[job["kind"]](**job["params"], on_stage=on_stage)
+        except Exception as exc:  # noqa: BLE001 – every failure is recorded on the job
+            logger.error("Job %s failed:\n%s", job_id, traceback.format_exc())
+            status = self.queue.fail(job_id, self.id, f"{type(exc).__name__}: {exc}")
+            if status is None:
+                logger.warning("Job %s: lease lost, failure not recorded", job_id)
+            else:
+                logger.info("Job %s → %s", job_id, status)
+            return
+        if self.queue.complete(job_id, self.id, result):
+            logger.info("Job %s done", job_id)
+        else:
+            logger.warning("Job %s: lease lost, result discarded", job_id)
+
+    def _heartbeat_loop(self) -> None:
+        while not self._finished.wait(self.heartbeat_s):
+            with self._lock:
+                running = list(self._running)
+            try:
+                for job_id in running:
+                    if not self.queue.heartbeat(job_id, self.id):
+                        logger.warning("Job %s: lease lost to another worker", job_id)
+                self.queue.beat(self.id, self.concurrency, len(running))
+            except sqlite3.Error as exc:               # e.g. locked past the timeout: retry next beat
+                logger.warning("Heartbeat failed: %s", exc)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run analyses from the shared Sypec job queue.")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="jobs run at once")
+    parser.add_argument("--queue", type=Path, default=QUEUE_PATH, help="SQLite queue file")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    if PRELOAD:
+        preload()                            # before the first job, not during it
+    worker = Worker(LeaseQueue(args.queue), args.concurrency)
+
+    def on_signal(signum, _frame) -> None:
+        if worker.stopping.is_set():
+            logger.warning("Second signal – exiting without waiting for running jobs")
+            os._exit(1)
+        logger.info("Signal %s – finishing running jobs, claiming no more", signum)
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    worker.run()
+    default_service().shutdown(wait=True)      # let queued PDF builds finish
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# backend/tests/conftest.py
+"""Shared fixtures: throw-away git repositories served over ``file://``."""
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@localhost", *args],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    ).stdout.strip()
+
+
+def commit(repo: Path, files: Dict[str, Optional[bytes]], message: str = "change") -> str:
+    """Write (or, for None, delete) *files* in *repo*, commit them, return the SHA."""
+    for path, data in files.items():
+        target = repo / path
+        if data is None:
+            target.unlink()
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def src_repo(tmp_path: Path) -> Path:
+    """A small repo with one commit: a Python module, a README and a 2 MB blob."""
+    repo = tmp_path / "src"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "uploadpack.allowFilter", "true")      # partial clones over file://
+    commit(repo, {
+        "app.py": b"import os\n\ndef main():\n    return os.getcwd()\n",
+        "README.md": b"# demo\n",
+        "assets/big.bin": b"\0" * (2 * 1024 * 1024),
+    }, "initial")
+    return repo
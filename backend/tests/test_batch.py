@@ -0,0 +1,96 @@
+"""`batch.stream_batch` and the NDJSON body of ``POST /analyze/batch``."""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src import api
+from backend.src.batch import stream_batch
+from backend.src.jobs import JobQueue
+
+RESULT = {"loc": 100, "apis_used": [], "languages": {"python": 1.0}, "hardware": {"kwh_per_hour": 0.1}}
+
+
+def fake_analysis(repo_url: str, **params: Any) -> Dict[str, Any]:
+    """Repos named ``…/slow`` finish last, ``…/broken`` fail."""
+    if repo_url.endswith("/broken"):
+        raise RuntimeError("clone failed")
+    time.sleep(0.3 if repo_url.endswith("/slow") else 0.01)
+    return {**RESULT, "repo_url": repo_url}
+
+
+def _collect(urls: List[str], **kwargs: Any) -> List[Dict[str, Any]]:
+    async def run() -> List[Dict[str, Any]]:
+        return [row async for row in stream_batch(urls, runner=fake_analysis, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_rows_in_completion_order_then_summary() -> None:
+    rows = _collect(["https://x/slow", "https://x/a", "https://x/broken"], concurrency=3)
+    assert [r["index"] for r in rows[:-1]][-1] == 0          # the slow repo lands last
+    assert sorted(r["index"] for r in rows[:-1]) == [0, 1, 2]
+    broken = next(r for r in rows if r.get("index") == 2)
+    assert broken["status"] == "failed" and broken["error"] == "RuntimeError: clone failed"
+    summary = rows[-1]["summary"]
+    assert (summary["total"], summary["failed"], summary["concurrency"]) == (3, 1, 3)
+    assert summary["fleet_kwh"] and all(v > 0 for v in summary["fleet_kwh"].values())
+
+
+def test_window_bounds_analyses_in_flight() -> None:
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def runner(repo_url: str, **params: Any) -> Dict[str, Any]:
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return RESULT
+
+    async def run() -> List[Dict[str, Any]]:
+        return [row async for row in stream_batch([f"https://x/{i}" for i in range(12)], 2, runner)]
+    rows = asyncio.run(run())
+    assert len(rows) == 13 and peak[0] <= 2
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "analyze_repo", fake_analysis)
+    monkeypatch.setattr(api, "jobs", JobQueue(max_workers=2, max_queue=0))
+    yield TestClient(api.app)
+    api.jobs.shutdown()
+
+
+def test_batch_route_streams_ndjson(client) -> None:
+    body = "https://github.com/o/slow\n{\"repo_url\": \"https://github.com/o/a\"}\nhttps://github.com/o/broken\n"
+    resp = client.post("/analyze/batch?concurrency=2", content=body, headers={"content-type": "application/jsonl"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["repo_url"] for r in rows[:-1]][-1] == "https://github.com/o/slow"
+    assert {r["index"]: r["status"] for r in rows[:-1]} == {0: "done", 1: "done", 2: "failed"}
+    assert rows[-1]["summary"]["failed"] == 1
+
+
+def test_batch_items_count_against_the_queue_limit(client) -> None:
+    urls = [f"https://github.com/o/slow{i}" for i in range(4)]
+    resp = client.post("/analyze/batch", json={"repo_urls": urls, "concurrency": 4})
+    rows = [json.loads(line) for line in resp.text.splitlines()][:-1]
+    full = [r for r in rows if r["status"] == "failed"]
+    assert len(full) == 2 and all(r["error"].startswith("QueueFull") for r in full)
+    assert api.jobs.stats()["in_flight"] == 0
+
+
+def test_invalid_batch_is_422(client) -> None:
+    resp = client.post("/analyze/batch", content=b"{not json", headers={"content-type": "application/json"})
+    assert resp.status_code == 422
+    resp = client.post("/analyze/batch", content=b"not-a-url\n", headers={"content-type": "text/plain"})
+    assert resp.status_code == 422
@@ -0,0 +1,124 @@
+# backend/tests/test_clone_pool.py
+"""`ClonePool` against local ``file://`` repositories."""
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+from backend.src.utils.clone_pool import ClonePool
+from backend.tests.conftest import commit, git
+
+
+def test_mirror_is_created_once_then_fetched(tmp_path: Path, src_repo: Path) -> None:
+    pool = ClonePool(tmp_path / "cache")
+    url = src_repo.as_uri()
+    with pool.borrow(url) as (mirror, sha):
+        assert sha == git(src_repo, "rev-parse", "HEAD")
+    head = commit(src_repo, {"app.py": b"print('v2')\n"}, "v2")
+    with pool.borrow(url) as (again, sha):
+        assert again == mirror
+        assert sha == head                         # incremental fetch picked it up
+    assert len(list(pool.mirrors_dir.glob("*/HEAD"))) == 1
+
+
+def test_partial_clone_skips_big_blobs_in_checkout(tmp_path: Path, src_repo: Path) -> None:
+    pool = ClonePool(tmp_path / "cache", blob_limit="1m")
+    with pool.checkout(src_repo.as_uri()) as ws:
+        assert ws.skipped == ["assets/big.bin"]
+        assert (ws.path / "app.py").is_file()
+        assert not (ws.path / "assets" / "big.bin").exists()
+        path = ws.path
+    assert not path.exists()                       # worktree removed on exit
+    assert not any(pool.workspaces_dir.iterdir())
+
+
+def test_full_clone_checks_out_everything(tmp_path: Path, src_repo: Path) -> None:
+    pool = ClonePool(tmp_path / "cache", blob_limit="")
+    with pool.checkout(src_repo.as_uri()) as ws:
+        assert ws.skipped == []
+        assert (ws.path / "assets" / "big.bin").stat().st_size == 2 * 1024 * 1024
+
+
+def test_checkout_of_an_older_commit(tmp_path: Path, src_repo: Path) -> None:
+    first = git(src_repo, "rev-parse", "HEAD")
+    commit(src_repo, {"README.md": None}, "drop readme")
+    pool = ClonePool(tmp_path / "cache")
+    with pool.checkout(src_repo.as_uri(), commit=first) as ws:
+        assert ws.commit == first
+        assert (ws.path / "README.md").is_file()
+
+
+def test_eviction_over_quota_drops_idle_mirrors(tmp_path: Path, src_repo: Path) -> None:
+    other = tmp_path / "other"
+    git(tmp_path, "clone", "-q", str(src_repo), str(other))
+    pool = ClonePool(tmp_path / "cache", quota_bytes=0)
+    with pool.borrow(src_repo.as_uri()) as (kept, _):
+        with pool.borrow(other.as_uri()):
+            pass
+        # over quota: the idle mirror went, the borrowed one stayed
+        assert (kept / "HEAD").exists()
+        assert [p for p in pool.mirrors_dir.glob("*/HEAD")] == [kept / "HEAD"]
+    assert (kept / "HEAD").exists()                # nothing added since: no new sweep
+    pool.evict()
+    assert not list(pool.mirrors_dir.glob("*/HEAD"))
+
+
+def test_evict_runs_only_after_the_cache_grew(tmp_path: Path, src_repo: Path, monkeypatch) -> None:
+    pool = ClonePool(tmp_path / "cache")
+    calls = []
+    evict = pool.evict
+    monkeypatch.setattr(pool, "evict", lambda: calls.append(1) or evict())
+    url = src_repo.as_uri()
+    with pool.borrow(url) as (_, sha):                 # clone
+        pass
+    assert len(calls) == 1
+    with pool.borrow(url, commit=sha):                 # known commit: no fetch
+        pass
+    with pool.borrow(url):                             # fetch, nothing new
+        pass
+    assert len(calls) == 1
+    commit(src_repo, {"app.py": b"print('v2')\n"}, "v2")
+    with pool.borrow(url):
+        pass
+    assert len(calls) == 2
+
+
+def test_mirror_holds_branches_and_tags_not_pull_refs(tmp_path: Path, src_repo: Path) -> None:
+    base = git(src_repo, "rev-parse", "HEAD")
+    git(src_repo, "tag", "v1")
+    pr = commit(src_repo, {"feature.py": b"x = 1\n"}, "pr")
+    git(src_repo, "update-ref", "refs/pull/1/head", pr)
+    git(src_repo, "reset", "-q", "--hard", base)
+    pool = ClonePool(tmp_path / "cache")
+    with pool.borrow(src_repo.as_uri()) as (mirror, sha):
+        assert sha == base
+        refs = git(mirror, "for-each-ref", "--format=%(refname)").split()
+        assert refs == ["refs/heads/main", "refs/tags/v1"]
+        assert pool.rev_parse(mirror, "refs/pull/1/head") == pr      # fetched on demand
+        assert pool.rev_parse(mirror, "v1") == base
+
+
+def test_eviction_skips_mirrors_borrowed_by_another_process(tmp_path: Path, src_repo: Path) -> None:
+    cache = tmp_path / "cache"
+    borrower = subprocess.Popen(
+        [sys.executable, "-c", (
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from backend.src.utils.clone_pool import ClonePool\n"
+            f"with ClonePool(Path({str(cache)!r})).borrow({src_repo.as_uri()!r}) as (mirror, _):\n"
+            "    print(mirror, flush=True)\n"
+            "    sys.stdin.readline()\n"
+        )],
+        cwd=Path(__file__).resolve().parents[2],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        mirror = Path(borrower.stdout.readline().strip())
+        pool = ClonePool(cache, quota_bytes=0)
+        pool.evict()
+        assert (mirror / "HEAD").exists()          # objects mode: no worktree, still pinned
+    finally:
+        borrower.communicate("\n", timeout=30)
+    pool.evict()
+    assert not mirror.exists()
@@ -0,0 +1,67 @@
+"""`CommitWalk` against full pipeline runs on the same commits."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from backend.src.static_analyzer import hardware_profiles, static_pipeline
+from backend.src.static_analyzer.commit_walk import CommitWalk
+from backend.src.static_analyzer.git_tree import build_git_index
+from backend.tests.conftest import commit, git
+
+APP = b"import os\n\n\ndef run(cmd):\n    os.system(cmd)\n    return eval(cmd)\n"
+UTIL = b"const stripe = require('stripe');\nmodule.exports = stripe;\n"
+
+
+class _NoReports:
+    def submit(self, payload, fingerprint=None):
+        return {"pdf_url": None, "report_id": fingerprint, "status": "skipped"}
+
+
+@pytest.fixture
+def history(tmp_path: Path) -> Path:
+    """A repo whose history edits .gitignore and renames a file."""
+    repo = tmp_path / "hist"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    commit(repo, {
+        "app.py": APP,
+        "README.md": b"# demo\n",
+        "lib/util.js": UTIL,
+        "gen/gen.py": b"def generated():\n    return eval('1')\n",
+        "tests/test_app.py": b"def test_run():\n    assert True\n",
+        "config.py": b"API_SECRET_KEY = 'sk-abcdefghijklmnopqrstuvwxyz'\n",
+    }, "initial")
+    commit(repo, {".gitignore": b"gen/\n*.log\n"}, "ignore generated code")
+    commit(repo, {"lib/util.js": None, "src/util.js": UTIL}, "move util")
+    commit(repo, {"app.py": APP + b"\n\ndef again(x):\n    return exec(x)\n"}, "more")
+    commit(repo, {".gitignore": b"*.log\n", "debug.log": b"noise\n"}, "un-ignore gen")
+    return repo
+
+
+def test_every_point_matches_the_pipeline(history: Path, monkeypatch) -> None:
+    monkeypatch.setattr(static_pipeline, "default_service", lambda: _NoReports())
+    monkeypatch.setattr(hardware_profiles, "OFFLINE", True)
+    git_dir = history / ".git"
+    head = git(history, "rev-parse", "HEAD")
+    points = CommitWalk(git_dir).run(head, 10)
+    assert [p["commit"] for p in points] == git(history, "rev-list", "--reverse", "HEAD").split()
+
+    for point in points:
+        index = build_git_index(git_dir, point["commit"])
+        try:
+            result = static_pipeline.run_static_pipeline(index, fingerprint=point["commit"])
+        finally:
+            index.close()
+        assert point["score"] == result["score"] and point["grade"] == result["grade"]
+        assert point["loc"] == result["loc"]
+        assert point["warnings"] == len(result["warnings"])
+        assert point["findings"]["secrets"] == len(result["secrets_found"])
+        assert point["apis"] == sorted(result["apis_used"])
+        assert point["test_coverage"] == result["test_coverage"]
+        assert point["kwh"] == result["kwh"]
+
+    # the .gitignore commits moved gen/gen.py out of the totals and back in
+    assert [p["files"] for p in points] == [6, 6, 6, 6, 7]
+    assert points[1]["findings"]["security"] < points[0]["findings"]["security"]
@@ -0,0 +1,32 @@
+"""`test_coverage`: tests are found by content, never by file name."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from backend.src.static_analyzer.file_index import build_file_index
+from backend.src.static_analyzer.file_records import analyze_file, record_key
+from backend.src.static_analyzer.test_coverage import estimate_test_coverage, scan_file
+
+BROKEN = b"def test_one():\n    assert 1\n\nasync def test_two(:\n    pass\n"      # does not parse
+
+
+def test_same_content_same_result_whatever_the_name(tmp_path: Path) -> None:
+    for name in ("test_api.py", "api.py"):
+        (tmp_path / name).write_bytes(BROKEN)
+    (tmp_path / "test_empty.py").write_bytes(b"x = (\n")
+    index = build_file_index(tmp_path)
+    named, plain = index.get("test_api.py"), index.get("api.py")
+
+    assert record_key(named) == record_key(plain)              # one shared record …
+    assert scan_file(named) == scan_file(plain) == 2           # … so the name cannot matter
+    assert analyze_file(named) == analyze_file(plain)
+    assert scan_file(index.get("test_empty.py")) == 0
+
+
+def test_coverage_counts_files_that_define_tests(tmp_path: Path) -> None:
+    (tmp_path / "test_named_only.py").write_bytes(b"x = 1\n")
+    (tmp_path / "checks.py").write_bytes(b"class TestX:\n    def test_a(self):\n        pass\n")
+    (tmp_path / "lib.py").write_bytes(b"def helper():\n    pass\n")
+    (tmp_path / "broken.py").write_bytes(BROKEN)
+    result = estimate_test_coverage(tmp_path)
+    assert result == {"test_files": 2, "test_functions": 3, "total_py": 4, "coverage_percent": 50.0}
@@ -0,0 +1,29 @@
+from backend.src.diff import _warning_delta
+
+
+def risky(path, line, pattern="eval("):
+    return f"{path}:{line} contains risky pattern '{pattern}'"
+
+
+def test_repeated_warning_reported_at_its_own_line():
+    before = [risky("app.py", 10)]
+    after = [risky("app.py", 10), risky("app.py", 11)]
+    assert _warning_delta(before, after) == ([risky("app.py", 11)], [])
+
+
+def test_moved_warnings_are_neither_new_nor_fixed():
+    before = [risky("app.py", 3), risky("app.py", 8, "exec(")]
+    after = [risky("app.py", 5, "exec("), risky("app.py", 20)]
+    assert _warning_delta(before, after) == ([], [])
+
+
+def test_new_and_fixed_across_files():
+    before = [risky("a.py", 1), risky("b.py", 4), "c.py has very long lines."]
+    after = [risky("a.py", 1), risky("a.py", 7, "exec("), "c.py has very long lines."]
+    assert _warning_delta(before, after) == ([risky("a.py", 7, "exec(")], [risky("b.py", 4)])
+
+
+def test_removed_duplicate_reported_at_its_own_line():
+    before = [risky("app.py", 2), risky("app.py", 9, "exec("), risky("app.py", 12)]
+    after = [risky("app.py", 2), risky("app.py", 9, "exec(")]
+    assert _warning_delta(before, after) == ([], [risky("app.py", 12)])
@@ -0,0 +1,64 @@
+"""`FileTable`: the columnar file list of a digest."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from backend.src.static_analyzer import loc
+from backend.src.static_analyzer.digest import FileTable, ensure_table, get_repo_digest
+
+ROWS = [
+    ("src/app.py", ".py", 120, 4000, loc.COUNTED, None, None),
+    ("src/App.PY", ".PY", 30, 900, loc.COUNTED, None, None),
+    ("web/main.ts", ".ts", 80, 2500, loc.COUNTED, None, None),
+    ("Makefile", "noext", 12, 300, loc.COUNTED, None, None),
+    ("logo.png", ".png", 0, 50_000, loc.BINARY, None, None),
+]
+
+
+def test_count_and_has_ext_are_exact() -> None:
+    table = FileTable.from_rows(ROWS)
+    assert table.count_ext(".py") == 1                       # case-sensitive, like the old list
+    assert table.count_ext(".py", ".PY", ".ts") == 3
+    assert table.count_ext("noext") == 1
+    assert table.count_ext(".go") == 0
+    assert table.has_ext(".png") and not table.has_ext(".go", ".rs")
+    assert table.loc_by_ext() == {".py": 120, ".PY": 30, ".ts": 80, "noext": 12, ".png": 0}
+    assert table.skipped() == {loc.BINARY: {"files": 1, "bytes": 50_000, "paths": ["logo.png"]}}
+
+
+def test_fingerprint_is_stable_and_content_sensitive() -> None:
+    table = FileTable.from_rows(ROWS)
+    assert table.fingerprint == FileTable.from_rows(list(ROWS)).fingerprint
+    assert table.fingerprint == table.fingerprint and repr(table).endswith(f"{table.fingerprint})")
+    changed = [*ROWS[:-1], ("logo.png", ".png", 0, 50_001, loc.BINARY, None, None)]
+    assert FileTable.from_rows(changed).fingerprint != table.fingerprint
+    reordered = [ROWS[1], ROWS[0], *ROWS[2:]]
+    assert FileTable.from_rows(reordered).fingerprint != table.fingerprint
+
+
+def test_fingerprint_of_a_digest_is_stable_across_walks(tmp_path: Path) -> None:
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_bytes(b"x = 1\ny = 2\n")
+    (tmp_path / "README.md").write_bytes(b"# hi\n")
+    first = get_repo_digest(tmp_path)["files"]
+    assert get_repo_digest(tmp_path)["files"].fingerprint == first.fingerprint
+    (tmp_path / "pkg" / "a.py").write_bytes(b"x = 1\n")
+    assert get_repo_digest(tmp_path)["files"].fingerprint != first.fingerprint
+
+
+def test_ensure_table_accepts_the_legacy_list() -> None:
+    legacy = [
+        {"path": "a.py", "loc": 10, "ext": ".py"},
+        {"path": "b", "loc": 3, "ext": ""},                   # old digests: "" for no extension
+        {"path": "c.js", "ext": ".js"},                       # no loc
+    ]
+    table = ensure_table(legacy)
+    assert isinstance(table, FileTable) and ensure_table(table) is table
+    assert table.to_list() == [
+        {"path": "a.py", "loc": 10, "ext": ".py"},
+        {"path": "b", "loc": 3, "ext": "noext"},
+        {"path": "c.js", "loc": 0, "ext": ".js"},
+    ]
+    assert table.total_loc == 13 and table.count_ext("noext") == 1
+    assert table.skipped() == {} and table.classified() is None
+    assert ensure_table([]).total_loc == 0 and len(ensure_table([])) == 0
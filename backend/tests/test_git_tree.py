@@ -0,0 +1,45 @@
+"""Virtual trees (`build_git_index`) over partial and full mirrors."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from backend.src.static_analyzer import loc
+from backend.src.static_analyzer.commit_walk import CommitWalk
+from backend.src.static_analyzer.digest import get_repo_digest
+from backend.src.static_analyzer.file_records import collect_records, record_key
+from backend.src.static_analyzer.git_tree import build_git_index
+from backend.src.utils.clone_pool import ClonePool
+from backend.tests.conftest import commit
+
+
+def test_blob_left_out_of_a_partial_clone_is_not_fetched(tmp_path: Path, src_repo: Path) -> None:
+    commit(src_repo, {"data/dump.sql": b"SELECT 1;\n" * 200_000}, "dump")   # 2 MB of text
+    pool = ClonePool(tmp_path / "cache", blob_limit="1m")
+    with pool.borrow(src_repo.as_uri()) as (mirror, sha):
+        index = build_git_index(mirror, sha)
+        try:
+            big = index.get("data/dump.sql")
+            assert big.missing and big.skipped and big.size == 0
+            assert big.loc_count.status == loc.NOT_FETCHED
+            records = collect_records(index)
+            skipped = get_repo_digest(index, records)["skipped"]
+            assert skipped[loc.NOT_FETCHED] == {"files": 1, "bytes": 0, "paths": ["data/dump.sql"]}
+            assert loc.OVERSIZED not in skipped
+            assert skipped[loc.BINARY]["paths"] == ["assets/big.bin"]   # known from the extension
+            assert not index.get("app.py").missing
+        finally:
+            index.close()
+
+        points = CommitWalk(mirror).run(sha, 1)
+        assert points[-1]["loc"] == sum(r["loc"] for r in records.values())
+
+    full = ClonePool(tmp_path / "full", blob_limit="")
+    with full.borrow(src_repo.as_uri()) as (mirror, sha):
+        index = build_git_index(mirror, sha)
+        try:
+            fetched = index.get("data/dump.sql")
+            assert not fetched.missing and fetched.size == 2_000_000
+            assert fetched.loc_count.status == loc.OVERSIZED
+            assert record_key(fetched) != record_key(big)        # the empty record stays apart
+        finally:
+            index.close()
@@ -0,0 +1,29 @@
+"""Hardware profiles: offline snapshot and fallbacks when a refresh fails."""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from backend.src.static_analyzer import hardware_profiles as hw
+
+
+def _failing_fetch() -> dict:
+    raise OSError("network down")
+
+
+def test_source_without_snapshot_falls_back_to_the_reference(tmp_path: Path, monkeypatch, caplog) -> None:
+    monkeypatch.setattr(hw, "CACHE_PATH", tmp_path / "hw_profiles.json")
+    monkeypatch.setattr(hw, "OFFLINE", False)
+    monkeypatch.setattr(hw, "FIXTURE_DIR", None)
+    monkeypatch.setitem(hw.SOURCE_HANDLERS, "acme_cloud", (_failing_fetch, hw._parse_steam))
+    cache = hw._ProfileCache()
+    reference = cache.snapshot(hw.REFERENCE_SOURCE)
+
+    with caplog.at_level(logging.WARNING, logger=hw.__name__):
+        cache.refresh("acme_cloud", wait=True)                 # the live fetch fails …
+        assert cache.get("acme_cloud") == reference            # … and there is no snapshot for it
+        assert cache.get("acme_cloud") == reference
+    messages = [r.getMessage() for r in caplog.records]
+    assert any("refresh for acme_cloud failed" in m for m in messages)
+    assert sum("No bundled HW snapshot for acme_cloud" in m for m in messages) == 1
+    assert not (tmp_path / "hw_profiles.json").exists()        # nothing cached from the failure
@@ -0,0 +1,68 @@
+"""`HistoryStore`: batched writes, the ``latest`` table and fleet aggregates."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.src.history import HistoryStore, to_row
+
+
+def _result(repo: str, commit: str, score: Optional[int], **extra: Any) -> Dict[str, Any]:
+    return {
+        "repo_url": repo, "commit": commit, "score": score,
+        "grade": None if score is None else ("A" if score >= 80 else "C"),
+        "loc": 100, "kwh": {"100": 1.5}, "languages": {"python": 100},
+        "warnings": ["w1", "w2"], "secrets_found": ["s"],
+        "test_coverage": {"coverage_percent": 25.0}, **extra,
+    }
+
+
+def test_record_is_written_on_flush(tmp_path: Path) -> None:
+    store = HistoryStore(tmp_path / "h.sqlite", batch=10, flush_s=60)
+    store.record(_result("https://github.com/o/r.git", "c1", 90), "1.6", seconds=2.5,
+                 timings=[{"stage": "clone", "seconds": 1.0}])
+    store.record(_result("https://github.com/o/r", "c2", 70, sampling={"reason": "time"}), "1.6")
+    store.flush()                                      # long before flush_s
+    rows = store.history("https://github.com/o/r")
+    assert [r["commit_sha"] for r in rows] == ["c2", "c1"]
+    first = rows[1]
+    assert first["repo_url"] == "https://github.com/o/r"        # URLs normalised
+    assert first["warnings_count"] == 2 and first["secrets_count"] == 1
+    assert first["kwh"] == {"100": 1.5} and first["timings"] == [{"stage": "clone", "seconds": 1.0}]
+    assert "warnings" not in first and not first["sampled"] and rows[0]["sampled"]
+    store.close()
+    assert len(HistoryStore(tmp_path / "h.sqlite").history(commit="c1")) == 1   # durable
+
+
+def test_latest_ignores_an_older_analysis_inserted_late(tmp_path: Path) -> None:
+    store = HistoryStore(tmp_path / "h.sqlite")
+    repo = "https://example.com/r"
+    store.record_rows([to_row(_result(repo, "new", 90), "1.6", analyzed_at=2000.0)])
+    store.record_rows([to_row(_result(repo, "old", 40), "1.6", analyzed_at=1000.0)])   # backfill
+    latest = store.latest()
+    assert [(r["commit_sha"], r["score"]) for r in latest] == [("new", 90)]
+    assert store.latest(since=2500.0) == []
+    assert [r["commit_sha"] for r in store.history(repo)] == ["new", "old"]
+    store.close()
+
+
+def test_fleet_with_missing_scores(tmp_path: Path) -> None:
+    store = HistoryStore(tmp_path / "h.sqlite")
+    store.record_rows([
+        to_row(_result("https://example.com/a", "1", 90), "1.6", analyzed_at=1.0),
+        to_row(_result("https://example.com/b", "2", None), "1.6", analyzed_at=2.0),
+        to_row(_result("https://example.com/c", "3", 60), "1.6", analyzed_at=3.0),
+        to_row(_result("https://example.com/d", "4", None, loc=None, kwh=None, languages=None), "1.6",
+               analyzed_at=4.0),
+    ])
+    fleet = store.fleet()
+    assert fleet["repos"] == fleet["analyses"] == 4
+    assert fleet["mean_score"] == 75.0                  # over the scored repos only
+    assert fleet["grades"] == {"A": 1, None: 2, "C": 1}
+    assert fleet["total_loc"] == 300 and fleet["kwh"] == {"100": 4.5}
+    assert [w["score"] for w in fleet["worst"]] == [60, 90, None, None]
+    assert store.fleet(since=3.5)["analyses"] == 1
+
+    empty = HistoryStore(tmp_path / "e.sqlite").fleet()
+    assert empty["mean_score"] is None and empty["repos"] == 0
+    store.close()
@@ -0,0 +1,41 @@
+"""`JobQueue` admission control and job states."""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from backend.src.jobs import JobQueue, QueueFull
+
+
+def test_queue_full_once_workers_and_queue_are_taken() -> None:
+    queue = JobQueue(max_workers=1, max_queue=1)
+    release = threading.Event()
+    try:
+        first = queue.submit(lambda: release.wait(10) and {"n": 1})
+        second = queue.submit(lambda: {"n": 2})
+        with pytest.raises(QueueFull):
+            queue.submit(lambda: {"n": 3})
+        assert queue.stats()["in_flight"] == 2
+        release.set()
+        assert first.future.result(timeout=10) == {"n": 1}
+        assert second.future.result(timeout=10) == {"n": 2}
+        assert queue.stats()["in_flight"] == 0
+        assert queue.submit(lambda: {"n": 4}).future.result(timeout=10) == {"n": 4}
+    finally:
+        release.set()
+        queue.shutdown()
+
+
+def test_failed_job_records_its_error() -> None:
+    queue = JobQueue(max_workers=1, max_queue=0)
+
+    def boom() -> dict:
+        raise ValueError("bad repo")
+
+    job = queue.submit(boom)
+    with pytest.raises(ValueError):
+        job.future.result(timeout=10)
+    assert queue.get(job.id).to_dict()["error"] == "ValueError: bad repo"
+    assert queue.stats()["in_flight"] == 0
+    queue.shutdown()
@@ -0,0 +1,65 @@
+"""LOC engine: statuses, chunked / mmap counting and comment classification."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from backend.src.static_analyzer import loc
+from backend.src.static_analyzer.file_index import FileEntry, build_file_index
+from backend.src.static_analyzer.loc import LocCount, classify_lines, count_entry, count_newlines
+
+
+def _entry(root: Path, name: str, data: bytes) -> FileEntry:
+    (root / name).write_bytes(data)
+    return build_file_index(root).get(name)
+
+
+def test_every_status(tmp_path: Path, monkeypatch) -> None:
+    assert count_entry(_entry(tmp_path, "a.py", b"x = 1\ny = 2")) == LocCount(2)
+    assert count_entry(_entry(tmp_path, "logo.png", b"x\n")).status == loc.BINARY       # by extension
+    assert count_entry(_entry(tmp_path, "data.txt", b"ab\0cd\n")).status == loc.BINARY  # NUL sniffed
+
+    gone = _entry(tmp_path, "gone.py", b"x = 1\n")
+    (tmp_path / "gone.py").unlink()
+    assert count_entry(gone) == LocCount(0, loc.UNREADABLE)                         # small file
+
+    blob = FileEntry("big.py", None, loc.MAX_BLOB_BYTES + 1, reader=lambda e: b"x\n", blob_sha="0" * 40)
+    assert count_entry(blob).status == loc.OVERSIZED                                # from git: blob cap
+    missing = FileEntry("far.py", None, 0, blob_sha="1" * 40, missing=True)
+    assert count_entry(missing).status == loc.NOT_FETCHED
+
+    monkeypatch.setattr(loc, "MAX_BLOB_BYTES", 4)                                   # stream from 5 bytes
+    big = _entry(tmp_path, "big.txt", b"one\ntwo\nthree")
+    assert count_entry(big) == LocCount(3)
+    (tmp_path / "big.txt").unlink()
+    assert count_entry(big) == LocCount(0, loc.UNREADABLE)                          # streamed file
+    monkeypatch.setattr(loc, "MAX_LOC_BYTES", 8)
+    assert count_entry(_entry(tmp_path, "huge.txt", b"x\n" * 5)).status == loc.OVERSIZED
+
+
+@pytest.mark.parametrize("mmap_bytes", [1, 10 ** 9], ids=["mmap", "chunked"])
+def test_streamed_count_across_chunk_boundaries(tmp_path: Path, monkeypatch, mmap_bytes: int) -> None:
+    monkeypatch.setattr(loc, "CHUNK_BYTES", 4)
+    monkeypatch.setattr(loc, "MMAP_BYTES", mmap_bytes)
+    path = tmp_path / "f.txt"
+    for data in (b"abc\n", b"abc\ndef\n", b"abc\nde", b"abcd\nefgh", b"\n\n\n\n\n", b"a\nbcdefgh\n\n" * 3):
+        path.write_bytes(data)
+        assert loc._count_file(str(path), len(data)) == LocCount(count_newlines(data)), data
+    path.write_bytes(b"ab\0d" + b"\n" * 10)                                          # NUL in the first chunk
+    assert loc._count_file(str(path), 14).status == loc.BINARY
+
+
+def test_comment_syntax_classification(tmp_path: Path) -> None:
+    py = b"# header\n\nx = 1  # trailing\n    # indented\n"
+    assert classify_lines(py, ".py") == (1, 2)
+    c = b"/* one */\nint x;\n/*\n * two\n */\n// three\n\n"
+    assert classify_lines(c, ".c") == (1, 5)
+    html = b"<!-- a\nb -->\n<p>hi</p>\n"
+    assert classify_lines(html, ".html") == (0, 2)
+    assert classify_lines(b"-- q\nSELECT 1;\n", ".sql") == (0, 1)
+    assert classify_lines(b"# not a comment here\n", ".md") is None
+
+    entry = _entry(tmp_path, "m.py", py)
+    assert count_entry(entry, classify=True) == LocCount(4, loc.COUNTED, 1, 2)
+    assert count_entry(_entry(tmp_path, "m.md", b"# x\n"), classify=True) == LocCount(1)
@@ -0,0 +1,60 @@
+"""Spans, traces and the Prometheus text rendered by `metrics`."""
+from __future__ import annotations
+
+import re
+
+from backend.src.metrics import STAGE_BUCKETS, Span, _Registry, count_cache, registry, span, trace
+
+_SAMPLE = re.compile(r'^[a-z_]+(\{([a-z]+="[^"]*",?)+\})? -?[0-9.e+]+$')
+
+
+def _span(stage: str, seconds: float, files=None, bytes=None) -> Span:
+    s = Span(stage, files, bytes)
+    s.seconds = seconds
+    return s
+
+
+def test_render_is_prometheus_text() -> None:
+    reg = _Registry()
+    reg.observe(_span("digest", 0.02, files=3, bytes=900))
+    reg.observe(_span("digest", 7.0))
+    reg.count_cache("results", hits=1, misses=2)
+    text = reg.render({"sypec_jobs_in_flight": 2})
+
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        assert line.startswith(("# HELP ", "# TYPE ")) or _SAMPLE.match(line), line
+    lines = set(text.splitlines())
+    assert "# TYPE sypec_stage_duration_seconds histogram" in lines
+    assert 'sypec_stage_duration_seconds_bucket{stage="digest",le="0.025"} 1' in lines
+    assert 'sypec_stage_duration_seconds_bucket{stage="digest",le="10.0"} 2' in lines
+    assert 'sypec_stage_duration_seconds_bucket{stage="digest",le="+Inf"} 2' in lines
+    assert 'sypec_stage_duration_seconds_count{stage="digest"} 2' in lines
+    assert 'sypec_stage_files_total{stage="digest"} 3' in lines
+    assert 'sypec_cache_lookups_total{cache="results",result="miss"} 2' in lines
+    assert "sypec_jobs_in_flight 2" in lines
+
+
+def test_buckets_are_cumulative() -> None:
+    reg = _Registry()
+    for seconds in (0.001, 0.3, 400.0):
+        reg.observe(_span("x", seconds))
+    counts = [int(line.rsplit(" ", 1)[1]) for line in reg.render().splitlines()
+              if line.startswith('sypec_stage_duration_seconds_bucket{stage="x"')]
+    assert len(counts) == len(STAGE_BUCKETS) + 1
+    assert counts == sorted(counts) and counts[-1] == 3 and counts[-2] == 2
+
+
+def test_trace_collects_spans_and_cache_counts() -> None:
+    with trace() as t:
+        with span("analysis"):
+            with span("index", files=4):
+                pass
+            count_cache("records", hits=3, misses=1)
+    with span("outside"):
+        pass
+    out = t.to_dict()
+    assert [s["stage"] for s in out["stages"]] == ["index"]
+    assert out["stages"][0]["files"] == 4
+    assert out["cache"] == {"records": {"hits": 3, "misses": 1}}
+    assert 'stage="outside"' in registry.render()
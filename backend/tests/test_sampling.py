@@ -0,0 +1,66 @@
+import hashlib
+
+from backend.src.static_analyzer.file_index import build_file_index
+from backend.src.static_analyzer.file_records import analyze_file
+from backend.src.static_analyzer.sampling import MIN_STRATUM_N, Sample
+
+RISKY = b"import os\n\ndef run(x):\n    return eval(x)\n\n\ndef go(c):\n    os.system(c)\n"
+
+
+def _sample(root, files, read):
+    for name, data in files.items():
+        (root / name).write_bytes(data)
+    index = build_file_index(root)
+    records = {e.path: analyze_file(e) for e in index if e.path in read}
+    return Sample(index, records).report()
+
+
+def test_findings_extrapolated_only_over_scanned_extensions(tmp_path):
+    files = {
+        "app.py": RISKY, "tool.py": RISKY,
+        "README.md": b"# demo\n" * 20, "kept.txt": b"notes\n" * 10,
+        "blob.dat": b"x" * 50, ".gitignore": b"*.log\n",
+    }
+    report = _sample(tmp_path, files, {"app.py", "README.md"})
+    security = report["estimates"]["findings"]["security"]
+    assert security["observed"] == 2
+    assert security["value"] == 4                 # tool.py only: no .md/.txt/.dat rules
+    smells = report["estimates"]["findings"]["smells"]
+    assert smells["value"] == smells["observed"] == 0
+
+
+def test_no_zero_width_interval_from_small_samples(tmp_path):
+    files = {f"m{i}.py": b"x = 1\n" * (i + 1) * 3 for i in range(4)}
+    files.update({f"n{i}.txt": b"word " * (i + 2) + b"\n" for i in range(4)})
+    report = _sample(tmp_path, files, {"m0.py", "n0.txt"})
+    low, high = report["estimates"]["loc"]["ci95"]
+    assert high is None or high > low
+    assert report["files"]["sampled"] == 2 < MIN_STRATUM_N
+
+
+def test_sampled_paths_listed_in_part_with_a_digest_of_all(tmp_path):
+    files = {f"f{i:03}.py": b"a = 1\n" for i in range(60)}
+    report = _sample(tmp_path, files, {f"f{i:03}.py" for i in range(50)})
+    assert report["files"]["sampled"] == 50
+    sampled = [f"f{i:03}.py" for i in range(50)]
+    assert report["sampled_paths"] == sampled[:20]
+    assert report["sampled_paths_all"] == {
+        "count": 50,
+        "sha256": hashlib.sha256("\n".join(sampled).encode()).hexdigest(),
+        "truncated": True,
+    }
+
+
+def test_cache_hits_are_counted_exactly_not_extrapolated_from(tmp_path):
+    files = {f"c{i}.py": b"x" * 59 + b"\n" for i in range(10)}         # cached: 1 line per 60 bytes
+    files.update({f"d{i}.py": b"a = 1\n" * 10 for i in range(5)})     # drawn: 10 lines per 60 bytes
+    files.update({f"u{i}.py": b"a = 1\n" * 10 for i in range(5)})     # left out, like the drawn ones
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+    index = build_file_index(tmp_path)
+    records = {e.path: analyze_file(e) for e in index if not e.path.startswith("u")}
+    sample = Sample(index, records, drawn={f"d{i}.py" for i in range(5)})
+    report = sample.report()
+    assert report["estimates"]["loc"] == {"value": 110, "ci95": [110, 110], "observed": 60}
+    assert report["files"]["cached"] == 10 and report["strata"][0]["cached"] == 10
+    assert sample.estimated_loc() == {f"u{i}.py": 10 for i in range(5)}
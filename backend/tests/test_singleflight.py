@@ -0,0 +1,99 @@
+"""`SingleFlight`: one execution per key, shared outcome, replayed events."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, List
+
+from backend.src import analysis
+from backend.src.singleflight import SingleFlight
+
+N = 8
+
+
+def _wait_for_members(flights: SingleFlight, key: str, n: int) -> None:
+    deadline = time.monotonic() + 10
+    while flights._flights[key].members < n:
+        assert time.monotonic() < deadline, "callers never joined"
+        time.sleep(0.005)
+
+
+def _burst(flights: SingleFlight, key: str, work) -> List[Any]:
+    """Run *work* from N threads at once: ``[(outcome, joined, events), …]``."""
+    out: List[Any] = [None] * N
+    start = threading.Barrier(N)
+
+    def call(i: int) -> None:
+        events: List[Any] = []
+        start.wait()
+        try:
+            result, joined = flights.run(key, work, lambda *e: events.append(e))
+            out[i] = (result, joined, events)
+        except Exception as exc:  # noqa: BLE001
+            out[i] = (exc, None, events)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(N)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+    return out
+
+
+def test_concurrent_callers_share_one_run_and_see_every_stage() -> None:
+    flights = SingleFlight("test")
+    calls = []
+
+    def work(publish):
+        calls.append(1)
+        publish("commit", {"commit": "abc"})
+        _wait_for_members(flights, "k", N)               # everyone else has joined (and been replayed)
+        publish("digest", {"files": 3})
+        return {"score": 90}
+
+    out = _burst(flights, "k", work)
+    assert len(calls) == 1
+    assert sorted(joined for _, joined, _ in out) == [False] + [True] * (N - 1)
+    for result, _, events in out:
+        assert result == {"score": 90}
+        assert events == [("commit", {"commit": "abc"}), ("digest", {"files": 3})]
+    assert flights.in_flight() == 0
+
+
+def test_errors_are_shared_and_never_cached() -> None:
+    flights = SingleFlight("test")
+    calls = []
+
+    def fail(publish):
+        calls.append(1)
+        publish("commit", {"commit": "abc"})
+        _wait_for_members(flights, "k", N)
+        raise ValueError("clone failed")
+
+    out = _burst(flights, "k", fail)
+    assert len(calls) == 1
+    assert all(isinstance(exc, ValueError) and str(exc) == "clone failed" for exc, _, _ in out)
+    assert all(events == [("commit", {"commit": "abc"})] for _, _, events in out)
+
+    assert flights.in_flight() == 0
+    assert flights.run("k", lambda publish: "ok") == ("ok", False)   # a fresh run, not the failure
+
+
+def test_analyses_in_different_modes_are_not_coalesced(monkeypatch) -> None:
+    keys = []
+
+    class Recorder:
+        def run(self, key, work, on_event=None):
+            keys.append(key)
+            return {"commit": key[1]}, False
+
+    monkeypatch.setattr(analysis, "inflight", Recorder())
+    url = "file:///repo"
+    analysis.analyze_commit(url, "abc", bypass_cache=True, mode="checkout")
+    analysis.analyze_commit(url, "abc", bypass_cache=True)
+    analysis.analyze_commit(url, "abc", bypass_cache=True, budget_seconds=5)
+    assert keys == [
+        (url, "abc", "checkout", None, None),
+        (url, "abc", analysis.ANALYSIS_MODE, None, None),
+        (url, "abc", analysis.ANALYSIS_MODE, 5, None),
+    ]
@@ -0,0 +1,57 @@
+"""Server-Sent Events of ``POST /analyze/stream``."""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src import api
+from backend.src.jobs import JobQueue
+
+
+def fake_analysis(repo_url: str, on_stage=None, **params: Any) -> Dict[str, Any]:
+    if repo_url.endswith("/broken"):
+        on_stage("commit", {"commit": "abc"})
+        raise RuntimeError("clone failed")
+    for stage, data in (("commit", {"commit": "abc"}), ("digest", {"files": 3}), ("score", {"score": 90})):
+        on_stage(stage, data)
+    return {"repo_url": repo_url, "commit": "abc", "score": 90, "report_id": None, "pdf_url": None}
+
+
+def _events(text: str) -> List[Tuple[str, Any]]:
+    out = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        out.append((fields["event"], json.loads(fields["data"])))
+    return out
+
+
+class FakeQueue(JobQueue):
+    """Runs `fake_analysis` whatever the route submits."""
+
+    def submit(self, fn, **params: Any):
+        return super().submit(fake_analysis, **params)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "jobs", FakeQueue(max_workers=1, max_queue=0))
+    yield TestClient(api.app)
+    api.jobs.shutdown()
+
+
+def test_stages_then_result_then_pdf(client) -> None:
+    resp = client.post("/analyze/stream", json={"repo_url": "https://github.com/o/r"})
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _events(resp.text)
+    assert [e for e, _ in events] == ["queued", "commit", "digest", "score", "result", "pdf"]
+    assert events[-2][1]["score"] == 90
+    assert events[-1][1] == {"report_id": None, "status": None, "pdf_url": None}
+
+
+def test_failure_ends_in_error(client) -> None:
+    events = _events(client.post("/analyze/stream", json={"repo_url": "https://github.com/o/broken"}).text)
+    assert [e for e, _ in events] == ["queued", "commit", "error"]
+    assert "RuntimeError: clone failed" in events[-1][1]["detail"]
@@ -0,0 +1,173 @@
+"""`LeaseQueue` on its own and with several `backend.src.worker` processes."""
+from __future__ import annotations
+
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from backend.src.work_queue import DONE, FAILED, QUEUED, RUNNING, LeaseQueue
+from backend.src.worker import Worker
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# a worker process; with a pause it stops after the first stage event of every job
+_WORKER = """
+import sys, time
+from backend.src import analysis, worker
+pause = float(sys.argv[1])
+if pause:
+    run = analysis._run
+    def paused(*args, **kwargs):
+        stages = run(*args, **kwargs)
+        yield next(stages)
+        time.sleep(pause)
+        yield from stages
+    analysis._run = paused
+worker.main(sys.argv[2:])
+"""
+
+
+def _wait(queue: LeaseQueue, job_id: str, statuses, timeout: float = 120) -> Dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        row = queue.get(job_id)
+        if row["status"] in statuses:
+            return row
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} still {row['status']}")
+
+
+@pytest.fixture
+def workers(tmp_path: Path):
+    """Start worker processes on the queue in *tmp_path*: ``start(pause=0) -> Popen``."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "SYPEC_LEASE_S": "2",
+        "SYPEC_HEARTBEAT_S": "0.3",
+        "SYPEC_RETRY_BASE_S": "0.2",
+        "SYPEC_QUEUE_POLL_S": "0.1",
+        "SYPEC_FILE_CACHE": "0",
+        "SYPEC_HW_OFFLINE": "1",
+        "SYPEC_PRELOAD": "0",
+        "SYPEC_HISTORY": "0",
+    }
+    started: List[subprocess.Popen] = []
+
+    def start(pause: float = 0) -> subprocess.Popen:
+        proc = subprocess.Popen(
+            [sys.executable, "-c", _WORKER, str(pause), "--concurrency", "1", "--queue", str(tmp_path / "jobs.sqlite")],
+            cwd=tmp_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        started.append(proc)
+        return proc
+
+    yield start
+    for proc in started:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+def test_jobs_run_across_worker_processes(tmp_path: Path, src_repo: Path, workers) -> None:
+    queue = LeaseQueue(tmp_path / "jobs.sqlite")
+    procs = [workers() for _ in range(3)]
+    url = src_repo.as_uri()
+    ids = [queue.enqueue("analyze", {"repo_url": url, "bypass_cache": True, "budget_bytes": 10 ** 9 + i})[0]
+           for i in range(4)]
+    assert queue.enqueue("analyze", {"repo_url": url, "bypass_cache": True, "budget_bytes": 10 ** 9})[0] == ids[0]
+    bad, _ = queue.enqueue("analyze", {"repo_url": (tmp_path / "missing").as_uri()}, max_attempts=2)
+
+    for job_id in ids:
+        row = _wait(queue, job_id, (DONE,))
+        assert row["attempts"] == 1
+        stages = [stage for _, stage, _ in queue.events(job_id)]
+        assert stages[0] == "commit" and len(stages) == len(set(stages))
+    result = json.loads(queue.get(ids[0])["result"])
+    assert all(isinstance(users, str) for users in result["kwh"])
+    row = _wait(queue, bad, (FAILED,))
+    assert row["attempts"] == 2
+
+    for proc in procs:
+        proc.send_signal(signal.SIGTERM)
+    assert [proc.wait(timeout=60) for proc in procs] == [0, 0, 0]
+    assert queue.stats()["workers"] == 0
+
+
+def test_crashed_worker_job_is_retried_without_its_events(tmp_path: Path, src_repo: Path, workers) -> None:
+    queue = LeaseQueue(tmp_path / "jobs.sqlite")
+    stuck = workers(pause=60)
+    job_id, _ = queue.enqueue("analyze", {"repo_url": src_repo.as_uri(), "bypass_cache": True})
+    _wait(queue, job_id, (RUNNING,))
+    deadline = time.monotonic() + 60
+    while not queue.events(job_id) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert [stage for _, stage, _ in queue.events(job_id)] == ["commit"]
+    stuck.kill()
+    stuck.wait()
+
+    workers()
+    row = _wait(queue, job_id, (DONE,))
+    assert row["attempts"] == 2
+    stages = [stage for _, stage, _ in queue.events(job_id)]
+    assert stages.count("commit") == 1                # attempt 1's events are not replayed
+
+
+def test_stale_attempt_cannot_publish(tmp_path: Path) -> None:
+    queue = LeaseQueue(tmp_path / "jobs.sqlite")
+    job_id, _ = queue.enqueue("analyze", {"repo_url": "file:///x"})
+    assert queue.claim("a")["attempts"] == 1
+    assert queue.publish(job_id, "a", 1, "commit", {"commit": "1"})
+    assert queue.fail(job_id, "a", "boom") == QUEUED
+    queue._conn.execute("UPDATE jobs SET available_at = 0")
+    assert queue.claim("b")["attempts"] == 2
+    assert not queue.publish(job_id, "a", 1, "digest", {})
+    assert queue.publish(job_id, "b", 2, "commit", {"commit": "2"})
+    assert [data for _, _, data in queue.events(job_id)] == [{"commit": "2"}]
+
+
+def test_finished_jobs_are_swept_after_retention(tmp_path: Path) -> None:
+    path = tmp_path / "jobs.sqlite"
+    queue = LeaseQueue(path)
+    old, _ = queue.enqueue("analyze", {"repo_url": "file:///old"})
+    queue.claim("a")
+    queue.publish(old, "a", 1, "commit", {})
+    assert queue.complete(old, "a", {"kwh": {}})
+    recent, _ = queue.enqueue("analyze", {"repo_url": "file:///recent"})
+
+    queue = LeaseQueue(path, retention_s=0)
+    time.sleep(0.01)
+    assert queue.claim("b")["id"] == recent           # the claim sweeps first
+    assert queue.get(old) is None
+    assert queue._conn.execute("SELECT COUNT(*) FROM events WHERE job_id = ?", (old,)).fetchone()[0] == 0
+    assert queue.get(recent)["status"] == RUNNING
+
+
+def test_heartbeat_survives_a_locked_database(tmp_path: Path) -> None:
+    beats = []
+
+    class FlakyQueue(LeaseQueue):
+        def beat(self, worker_id, slots, running):
+            beats.append(running)
+            if len(beats) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            super().beat(worker_id, slots, running)
+
+    worker = Worker(FlakyQueue(tmp_path / "jobs.sqlite"), heartbeat_s=0.01)
+    loop = threading.Thread(target=worker._heartbeat_loop)
+    loop.start()
+    deadline = time.monotonic() + 10
+    while len(beats) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker._finished.set()
+    loop.join(timeout=10)
+    assert len(beats) >= 3                             # kept beating after the failure
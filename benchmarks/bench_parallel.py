@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Serial vs. process-pool per-file analysis on a synthetic repository.
+
+    python benchmarks/bench_parallel.py --files 5000 --workers 1 2 4 8
+
+Generates a throw-away synthetic tree (see `synth.py`), then times
+`collect_records` for every worker count – the record cache is bypassed –
+and checks that all runs return exactly the same records as the serial one.  Prints one JSON
+document with the timings and speed-ups.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from backend.src.static_analyzer import parallel                      # noqa: E402
+from backend.src.static_analyzer.file_index import build_file_index   # noqa: E402
+from backend.src.static_analyzer.file_records import collect_records  # noqa: E402
+from synth import generate                                             # noqa: E402
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--files", type=int, default=5000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sypec-bench-") as tmp:
+        generate(Path(tmp), args.files)
+        index = build_file_index(tmp)
+        baseline = None
+        report = {"files": len(index), "bytes": index.total_bytes, "runs": []}
+        for workers in sorted(set(args.workers)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                index.release()
+                started = time.perf_counter()
+                records = collect_records(index, store=None, workers=workers)
+                best = min(best, time.perf_counter() - started)
+            if baseline is None:
+                baseline = (records, best)
+            elif records != baseline[0]:
+                raise SystemExit(f"results with {workers} workers differ from the serial run")
+            report["runs"].append({
+                "workers": workers,
+                "seconds": round(best, 4),
+                "speedup": round(baseline[1] / best, 2),
+            })
+        parallel.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Cold-start cost of the entry points, against a budget.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--scale 1.5]
+
+Every measurement runs in a fresh interpreter inside an empty scratch
+directory (best of --repeat):
+
+    package   import backend.src
+    worker    import backend.src.worker         (CLI / worker process)
+    api       import backend.src.api            (uvicorn import of the app)
+    preload   preload() after importing the API (the startup hook's warm-up)
+
+Each child also reports which lazily imported dependencies (matplotlib,
+Jinja2, GitPython, requests) got loaded and whether the import created any
+files.  Prints one JSON document; exits non-zero when a measurement exceeds
+its budget (BUDGETS_MS × --scale, for slower machines), a lazy dependency
+is imported by an import, or an import touches the filesystem.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# wall-clock budget per measurement, milliseconds
+BUDGETS_MS = {"package": 50, "worker": 500, "api": 1500, "preload": 2500}
+
+LAZY = ("matplotlib", "jinja2", "git", "requests")
+
+_CHILD = """
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+{code}
+seconds = time.perf_counter() - started
+print(json.dumps({{
+    "ms": round(seconds * 1000, 1),
+    "lazy_loaded": sorted(m for m in {lazy!r} if m in sys.modules),
+    "files": sorted(os.listdir(".")),
+}}))
+"""
+
+_CODE = {
+    "package": "import backend.src",
+    "worker": "import backend.src.worker",
+    "api": "import backend.src.api",
+    # the clock restarts after the import: only the warm-up is timed
+    "preload": "import backend.src.api\nstarted = time.perf_counter()\n"
+               "from backend.src.preload import preload\npreload()",
+}
+
+
+def _measure(name: str) -> dict:
+    code = _CODE[name]
+    with tempfile.TemporaryDirectory(prefix="sypec-start-") as tmp:
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD.format(root=str(ROOT), code=code, lazy=LAZY)],
+            cwd=tmp,
+            env={**os.environ, "SYPEC_HW_OFFLINE": "1"},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=5, help="best of N fresh interpreters")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    args = ap.parse_args()
+
+    report = {"python": sys.version.split()[0], "results": [], "failures": []}
+    for name in _CODE:
+        runs = [_measure(name) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["ms"])
+        budget = BUDGETS_MS[name] * args.scale
+        report["results"].append({"entry": name, "ms": best["ms"], "budget_ms": budget, **best})
+        if best["ms"] > budget:
+            report["failures"].append(f"{name}: {best['ms']} ms > {budget} ms")
+        if name != "preload":
+            if best["lazy_loaded"]:
+                report["failures"].append(f"{name}: imports {', '.join(best['lazy_loaded'])}")
+            if best["files"]:
+                report["failures"].append(f"{name}: created {', '.join(best['files'])}")
+    print(json.dumps(report, indent=2))
+    if report["failures"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+History walk (`commit_walk.CommitWalk`) on a synthetic repository with a long history.
+
+    python benchmarks/bench_trend.py --files 2000 --commits 2000 --check 5
+
+Generates a throw-away synthetic tree plus --commits small commits on top
+(see `synth.add_history`), then times the walk over all of them twice: cold
+(empty record store – the oldest tree and every changed blob are analysed)
+and warm (the store from the cold run).  The points of the last commit and
+of --check other commits are compared with full `run_static_pipeline` runs
+on those commits.  Prints one JSON document with the timings and commits per
+minute; exits non-zero if a point differs from its pipeline run.
+
+Runs offline: bundled hardware profiles, no LaTeX build.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+os.environ.setdefault("SYPEC_HW_OFFLINE", "1")
+os.environ["SYPEC_FILE_CACHE"] = "0"          # the pipeline checks run cold too
+
+from synth import add_history, generate  # noqa: E402
+
+CHECKED = ("score", "grade", "loc", "kwh", "test_coverage")
+
+
+def _walk(repo: Path, commits: int, store) -> dict:
+    from backend.src.static_analyzer.commit_walk import CommitWalk
+
+    walk = CommitWalk(repo / ".git", store)
+    started = time.perf_counter()
+    points = walk.run("HEAD", commits)
+    seconds = time.perf_counter() - started
+    return {
+        "points": points,
+        "seconds": round(seconds, 3),
+        "analysed": walk.analysed,
+        "commits_per_min": round(len(points) / seconds * 60),
+    }
+
+
+def _pipeline(repo: Path, sha: str) -> dict:
+    from backend.src.static_analyzer.git_tree import build_git_index
+    from backend.src.static_analyzer.static_pipeline import run_static_pipeline
+
+    index = build_git_index(repo / ".git", sha)
+    try:
+        result = run_static_pipeline(index)
+    finally:
+        index.close()
+    return {
+        **{k: result[k] for k in CHECKED},
+        "warnings": len(result["warnings"]),
+        "apis": sorted(result["apis_used"]),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--files", type=int, default=2000)
+    ap.add_argument("--commits", type=int, default=2000)
+    ap.add_argument("--check", type=int, default=5, help="commits besides the last checked against the pipeline")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sypec-bench-") as tmp:
+        repo = Path(tmp) / "repo"
+        generate(repo, args.files, args.seed, git=True)
+        add_history(repo, args.commits, args.seed)
+        os.chdir(tmp)                           # reports / caches land in the scratch dir
+
+        import logging
+
+        from backend.src.report import service
+        from backend.src.static_analyzer import parallel
+        from backend.src.static_analyzer.file_records import RecordStore
+
+        logging.disable(logging.CRITICAL)
+        service.generate_pdf_report = lambda *, output_base, ctx: None
+
+        store = RecordStore(Path(tmp) / "records.sqlite")
+        cold = _walk(repo, args.commits + 1, store)
+        warm = _walk(repo, args.commits + 1, store)
+        if warm["points"] != cold["points"]:
+            raise SystemExit("warm walk differs from the cold one")
+
+        points = cold["points"]
+        picks = sorted(set(random.Random(args.seed).sample(range(len(points) - 1), min(args.check, len(points) - 1))))
+        mismatches = []
+        for i in picks + [len(points) - 1]:
+            point = points[i]
+            expected = _pipeline(repo, point["commit"])
+            got = {**{k: point[k] for k in CHECKED}, "warnings": point["warnings"], "apis": point["apis"]}
+            if got != expected:
+                mismatches.append({"commit": point["commit"], "index": i, "walk": got, "pipeline": expected})
+        parallel.shutdown()
+        store.close()
+
+        report = {
+            "files": args.files,
+            "commits": len(points),
+            "cold": {k: v for k, v in cold.items() if k != "points"},
+            "warm": {k: v for k, v in warm.items() if k != "points"},
+            "checked": len(picks) + 1,
+            "mismatches": mismatches,
+            "first": {k: points[0][k] for k in ("score", "loc", "warnings")},
+            "last": {k: points[-1][k] for k in ("score", "loc", "warnings")},
+        }
+    print(json.dumps(report, indent=2))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
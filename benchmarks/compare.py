@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Compare two `run.py` result files.
+
+    python benchmarks/compare.py results/base.json results/head.json [--threshold 0.10] [--fail]
+
+Prints time and peak-RSS deltas per (scale, benchmark) and marks changes
+beyond --threshold (relative) as regressions / improvements.  With --fail
+the exit status is 1 when anything regressed, for use in CI.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+
+def _load(path: Path) -> Tuple[Dict[str, Any], Dict[Tuple[str, str], Dict[str, Any]]]:
+    data = json.loads(path.read_text())
+    return data["meta"], {(r["scale"], r["benchmark"]): r for r in data["results"] if "error" not in r}
+
+
+def _delta(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    ap.add_argument("base", type=Path)
+    ap.add_argument("head", type=Path)
+    ap.add_argument("--threshold", type=float, default=0.10, help="relative change worth flagging")
+    ap.add_argument("--min-seconds", type=float, default=0.005, help="ignore timings below this (noise)")
+    ap.add_argument("--fail", action="store_true", help="exit 1 on any regression")
+    args = ap.parse_args()
+
+    base_meta, base = _load(args.base)
+    head_meta, head = _load(args.head)
+    print(f"base {base_meta['commit']} ({base_meta['timestamp']})  →  head {head_meta['commit']} ({head_meta['timestamp']})")
+    print(f"{'scale':<6} {'benchmark':<17} {'base s':>9} {'head s':>9} {'Δ time':>8} {'base MB':>8} {'head MB':>8} {'Δ rss':>7}")
+
+    regressions = 0
+    for key in sorted(base.keys() & head.keys(), key=lambda k: (k[0], k[1])):
+        b, h = base[key], head[key]
+        dt = _delta(b["seconds"], h["seconds"])
+        dm = _delta(b["peak_rss_mb"], h["peak_rss_mb"])
+        noisy = max(b["seconds"], h["seconds"]) < args.min_seconds
+        flag = ""
+        if (not noisy and dt > args.threshold) or dm > args.threshold:
+            flag, regressions = "  REGRESSION", regressions + 1
+        elif not noisy and dt < -args.threshold:
+            flag = "  faster"
+        print(f"{key[0]:<6} {key[1]:<17} {b['seconds']:>9.4f} {h['seconds']:>9.4f} {dt:>+8.1%} "
+              f"{b['peak_rss_mb']:>8.1f} {h['peak_rss_mb']:>8.1f} {dm:>+7.1%}{flag}")
+
+    for key in sorted(base.keys() ^ head.keys()):
+        print(f"{key[0]:<6} {key[1]:<17} only in {'base' if key in base else 'head'}")
+
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
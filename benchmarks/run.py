@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Benchmark every analyser and the full pipeline on synthetic repositories.
+
+    python benchmarks/run.py                          # 1k + 10k files
+    python benchmarks/run.py --scales 1k 10k 100k 1m --repeat 3
+    python benchmarks/run.py --only digest secrets pipeline --out base.json
+
+For each scale of the ladder a deterministic repo is generated (and cached,
+see `synth.py`); every benchmark then runs in a fresh interpreter so its
+peak RSS is its own.  Inputs a benchmark needs (the file index, say) are
+rebuilt outside the timed section before every repeat, so every repeat
+reads the files again.
+
+Everything runs offline: hardware profiles come from the bundled snapshot
+(SYPEC_HW_OFFLINE), the LaTeX build is replaced by a no-op, and the per-file
+record store is disabled so every run is cold.
+
+Results go to ``benchmarks/results/<commit>.json`` (or --out); compare two
+runs with ``benchmarks/compare.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synth import SCALES, ensure_repo  # noqa: E402
+
+BUDGET_BYTES = 8 * 1024 * 1024       # pipeline_budget
+
+# ──────────── child side ─────────────────────────────────────────────
+def _setup() -> None:
+    """Offline stubs; must run before the pipeline is used."""
+    import logging
+
+    from backend.src.report import service
+
+    logging.disable(logging.CRITICAL)
+    service.generate_pdf_report = lambda *, output_base, ctx: None
+
+
+def _prepare(name: str, repo: Path) -> Callable[[], Any]:
+    """
+    Return the zero-argument callable to time for benchmark *name*.
+
+    Called again before every repeat (untimed), so no repeat sees contents
+    or LOC cached by the previous one.
+    """
+    from backend.src.static_analyzer import (
+        api_usage, code_smells, digest, file_index, file_records, git_tree,
+        language_detector, secrets_scanner, security, static_pipeline, test_coverage,
+    )
+
+    if name == "index":
+        return lambda: file_index.build_file_index(repo)
+    if name == "git_index":
+        return lambda: git_tree.build_git_index(repo, "HEAD").close()
+    if name == "pipeline":
+        return lambda: static_pipeline.run_static_pipeline(repo)
+    if name == "pipeline_objects":
+        def objects() -> None:
+            index = git_tree.build_git_index(repo, "HEAD")
+            try:
+                static_pipeline.run_static_pipeline(index)
+            finally:
+                index.close()
+        return objects
+    if name == "pipeline_budget":
+        from backend.src.static_analyzer.sampling import Budget
+        # fixed read budget: small scales fit it, large ones get sampled
+        return lambda: static_pipeline.run_static_pipeline(repo, Budget(max_bytes=BUDGET_BYTES))
+
+    per_index = {
+        "digest": digest.get_repo_digest,
+        "records": file_records.collect_records,
+        "languages": language_detector.detect_languages,
+        "apis": api_usage.find_api_usage,
+        "secrets": secrets_scanner.scan_for_secrets,
+        "security": security.run_security_checks,
+        "smells": code_smells.detect_code_smells,
+        "tests": test_coverage.estimate_test_coverage,
+    }
+    fn = per_index[name]
+    index = file_index.build_file_index(repo)
+    return lambda: fn(index)
+
+
+def _child(name: str, repo: Path, repeat: int) -> Dict[str, Any]:
+    _setup()
+    rss_base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times: List[float] = []
+    for _ in range(repeat):
+        fn = _prepare(name, repo)
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return {
+        "seconds": min(times),
+        "seconds_all": [round(t, 5) for t in times],
+        "peak_rss_mb": round(peak / 1024, 1),          # ru_maxrss is in KiB on Linux
+        "base_rss_mb": round(rss_base / 1024, 1),
+    }
+
+
+# ──────────── parent side ────────────────────────────────────────────
+BENCHMARKS = [
+    "index", "git_index", "digest", "records", "languages", "apis", "secrets",
+    "security", "smells", "tests", "pipeline", "pipeline_objects", "pipeline_budget",
+]
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _run_one(name: str, repo: Path, repeat: int, workdir: Path) -> Dict[str, Any]:
+    # reports are built inline, so the plot is part of the pipeline timing
+    env = {
+        **os.environ,
+        "SYPEC_FILE_CACHE": "0",
+        "SYPEC_REPORT_WORKERS": "0",
+        "SYPEC_HW_OFFLINE": "1",          # bundled hardware snapshot, no network
+        "PYTHONHASHSEED": "0",
+    }
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", name, str(repo), str(repeat)],
+        cwd=workdir,                      # reports / logs land in the scratch dir
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _, _, name, repo, repeat = sys.argv
+        print(json.dumps(_child(name, Path(repo), int(repeat))))
+        return
+
+    ap = argparse.ArgumentParser(description="Benchmark the analysers on synthetic repositories.")
+    ap.add_argument("--scales", nargs="+", default=["1k", "10k"], choices=list(SCALES))
+    ap.add_argument("--only", nargs="+", choices=BENCHMARKS, help="subset of benchmarks")
+    ap.add_argument("--repeat", type=int, default=3, help="timed repeats (best is reported)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", type=Path, help="result file (default benchmarks/results/<commit>.json)")
+    args = ap.parse_args()
+
+    commit = _commit()
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix="sypec-bench-") as workdir:
+        for scale in args.scales:
+            print(f"[{scale}] preparing repository …", file=sys.stderr)
+            repo = ensure_repo(SCALES[scale], args.seed, git=True)
+            for name in args.only or BENCHMARKS:
+                res = _run_one(name, repo, args.repeat, Path(workdir))
+                report["results"].append({"scale": scale, "files": SCALES[scale], "benchmark": name, **res})
+                shown = res.get("error") or f"{res['seconds']:.3f}s  peak {res['peak_rss_mb']} MB"
+                print(f"[{scale}] {name:<17} {shown}", file=sys.stderr)
+
+    out = args.out or ROOT / "benchmarks" / "results" / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(out)
+
+
+if __name__ == "__main__":
+    main()